@@ -0,0 +1,44 @@
+"""add votes count in videos
+
+Revision ID: 5e2b9f0c7a13
+Revises: c41e8b7d2f90
+Create Date: 2025-11-09 15:22:47.913604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b9f0c7a13'
+down_revision: Union[str, None] = 'c41e8b7d2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'videos',
+        sa.Column('votes_count', sa.BigInteger(), server_default='0', nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE videos v SET votes_count = c.votes
+        FROM (SELECT video_id, count(*) AS votes FROM votes GROUP BY video_id) c
+        WHERE c.video_id = v.id
+        """
+    )
+    op.create_index(
+        'ix_videos_public_listing',
+        'videos',
+        [sa.text('updated_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text("is_public IS true AND status = 'done'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_public_listing', table_name='videos')
+    op.drop_column('videos', 'votes_count')
@@ -0,0 +1,58 @@
+"""add unique vote per user and video
+
+Revision ID: 8d1f4a6b2c57
+Revises: 5e2b9f0c7a13
+Create Date: 2025-11-16 10:41:05.218337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1f4a6b2c57'
+down_revision: Union[str, None] = '5e2b9f0c7a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Votos duplicados que dejo pasar la verificacion previa al insert; los
+    # contadores se recalculan aqui mismo (misma consulta que
+    # rebuild_vote_totals) en vez de esperar a la reconciliacion.
+    op.execute(
+        """
+        DELETE FROM votes a USING votes b
+        WHERE a.user_id = b.user_id AND a.video_id = b.video_id AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_votes_user_video', 'votes', ['user_id', 'video_id']
+    )
+    op.execute(
+        """
+        UPDATE videos v SET votes_count = c.votes
+        FROM (
+            SELECT v2.id, count(vo.id) AS votes
+            FROM videos v2 LEFT JOIN votes vo ON vo.video_id = v2.id
+            GROUP BY v2.id
+        ) c
+        WHERE c.id = v.id AND v.votes_count <> c.votes
+        """
+    )
+    op.execute("DELETE FROM user_vote_totals")
+    op.execute(
+        """
+        INSERT INTO user_vote_totals (user_id, city, votes)
+        SELECT u.id, u.city, count(vo.id)
+        FROM users u
+        JOIN videos v ON v.user_id = u.id AND v.is_public
+        LEFT JOIN votes vo ON vo.video_id = v.id
+        GROUP BY u.id, u.city
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_votes_user_video', 'votes', type_='unique')
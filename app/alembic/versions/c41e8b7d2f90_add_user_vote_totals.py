@@ -0,0 +1,58 @@
+"""add user vote totals
+
+Revision ID: c41e8b7d2f90
+Revises: 998dce611d04
+Create Date: 2025-11-09 09:41:12.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8b7d2f90'
+down_revision: Union[str, None] = '998dce611d04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_vote_totals',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('city', sa.String(length=255), nullable=True),
+        sa.Column('votes', sa.BigInteger(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index(
+        'ix_user_vote_totals_rank',
+        'user_vote_totals',
+        [sa.text('votes DESC'), 'user_id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_user_vote_totals_city_rank',
+        'user_vote_totals',
+        ['city', sa.text('votes DESC'), 'user_id'],
+        unique=False,
+    )
+    # backfill desde votes (mismo criterio que el job de reconciliacion)
+    op.execute(
+        """
+        INSERT INTO user_vote_totals (user_id, city, votes)
+        SELECT u.id, u.city, count(vo.id)
+        FROM users u
+        JOIN videos v ON v.user_id = u.id AND v.is_public
+        LEFT JOIN votes vo ON vo.video_id = v.id
+        GROUP BY u.id, u.city
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_vote_totals_city_rank', table_name='user_vote_totals')
+    op.drop_index('ix_user_vote_totals_rank', table_name='user_vote_totals')
+    op.drop_table('user_vote_totals')
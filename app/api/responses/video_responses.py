@@ -5,8 +5,10 @@ from app.api.responses.common_responses import unauthorized_response
 from app.api.schemas.schemas import ErrorMessage
 from app.api.schemas.videos import (
     DeleteVideoResponse,
+    DirectUploadResponse,
     PublicVideoResponse,
     RankingItem,
+    ResumableUploadResponse,
     UploadVideoResponse,
     UserVideoResponse,
     VideoDetailResponse,
@@ -56,6 +58,131 @@ upload_video_responses = {
     },
 }
 
+direct_upload_responses = {
+    **unauthorized_response,
+    HTTPStatus.CREATED: {
+        "model": DirectUploadResponse,
+        "description": "Subida directa a S3 creada. Suba cada parte a su URL y complete la subida.",
+        "status_code": HTTPStatus.CREATED,
+        "content": {
+            "application/json": {
+                "example": {
+                    "video_id": "a1b2c3d4",
+                    "part_size": 8388608,
+                    "parts": [
+                        {
+                            "part_number": 1,
+                            "url": "https://bucket.s3.amazonaws.com/uploads/a1b2c3d4_original.mp4?partNumber=1&uploadId=...",
+                        }
+                    ],
+                    "expires_in": 3600,
+                }
+            }
+        },
+    },
+    HTTPStatus.BAD_REQUEST: upload_video_responses[HTTPStatus.BAD_REQUEST],
+    HTTPStatus.CONFLICT: {
+        "model": ErrorMessage,
+        "description": "Subida directa no disponible sin almacenamiento S3",
+        "status_code": HTTPStatus.CONFLICT,
+        "content": {
+            "application/json": {
+                "example": {
+                    "detail": "Subida directa solo disponible con almacenamiento S3, use /api/videos/upload",
+                }
+            }
+        },
+    },
+}
+
+complete_upload_responses = {
+    **upload_video_responses,
+    HTTPStatus.NOT_FOUND: {
+        "model": ErrorMessage,
+        "description": "La subida no existe o no pertenece al usuario",
+        "status_code": HTTPStatus.NOT_FOUND,
+        "content": {"application/json": {"example": {"detail": "Subida no encontrada"}}},
+    },
+    HTTPStatus.CONFLICT: {
+        "model": ErrorMessage,
+        "description": "La subida ya fue completada",
+        "status_code": HTTPStatus.CONFLICT,
+        "content": {
+            "application/json": {"example": {"detail": "La subida ya fue completada"}}
+        },
+    },
+}
+
+resumable_status_example = {
+    "video_id": "a1b2c3d4",
+    "offset": 8388608,
+    "size_bytes": 52428800,
+    "chunk_size": 8388608,
+    "expires_at": "2025-03-16T14:22:00Z",
+}
+
+create_resumable_responses = {
+    **unauthorized_response,
+    HTTPStatus.CREATED: {
+        "model": ResumableUploadResponse,
+        "description": "Sesion de subida reanudable creada. Envie chunks de chunk_size bytes desde offset.",
+        "status_code": HTTPStatus.CREATED,
+        "content": {
+            "application/json": {"example": {**resumable_status_example, "offset": 0}}
+        },
+    },
+    HTTPStatus.BAD_REQUEST: upload_video_responses[HTTPStatus.BAD_REQUEST],
+}
+
+resumable_status_responses = {
+    **unauthorized_response,
+    HTTPStatus.OK: {
+        "model": ResumableUploadResponse,
+        "description": "Offset actual de la sesion de subida",
+        "status_code": HTTPStatus.OK,
+        "content": {"application/json": {"example": resumable_status_example}},
+    },
+    HTTPStatus.NOT_FOUND: complete_upload_responses[HTTPStatus.NOT_FOUND],
+    HTTPStatus.CONFLICT: complete_upload_responses[HTTPStatus.CONFLICT],
+    HTTPStatus.GONE: {
+        "model": ErrorMessage,
+        "description": "La sesion de subida expiro por inactividad",
+        "status_code": HTTPStatus.GONE,
+        "content": {
+            "application/json": {"example": {"detail": "La sesion de subida expiro"}}
+        },
+    },
+}
+
+upload_chunk_responses = {
+    **resumable_status_responses,
+    HTTPStatus.BAD_REQUEST: {
+        "model": ErrorMessage,
+        "description": "El chunk no respeta chunk_size o excede el tamaño declarado",
+        "status_code": HTTPStatus.BAD_REQUEST,
+        "content": {
+            "application/json": {
+                "example": {"detail": "El chunk excede el tamaño declarado"}
+            }
+        },
+    },
+    HTTPStatus.CONFLICT: {
+        "model": ErrorMessage,
+        "description": "El offset no coincide con lo recibido; el header Upload-Offset trae el actual",
+        "status_code": HTTPStatus.CONFLICT,
+        "content": {
+            "application/json": {
+                "example": {"detail": "Offset invalido, offset actual 8388608"}
+            }
+        },
+    },
+}
+
+complete_resumable_responses = {
+    **complete_upload_responses,
+    HTTPStatus.GONE: resumable_status_responses[HTTPStatus.GONE],
+}
+
 user_videos_responses = {
     **unauthorized_response,
     HTTPStatus.OK: {
@@ -180,7 +307,17 @@ public_videos_responses = {
                 ]
             }
         },
-    }
+    },
+    HTTPStatus.NOT_MODIFIED: {
+        "description": "La pagina no cambio desde el ETag enviado en If-None-Match",
+        "status_code": HTTPStatus.NOT_MODIFIED,
+    },
+    HTTPStatus.BAD_REQUEST: {
+        "model": ErrorMessage,
+        "description": "Cursor de paginacion invalido",
+        "status_code": HTTPStatus.BAD_REQUEST,
+        "content": {"application/json": {"example": {"detail": "Cursor invalido"}}},
+    },
 }
 
 vote_video_responses = {
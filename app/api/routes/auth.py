@@ -1,39 +1,44 @@
 from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas.schemas import Token, UserCreate
 from app.core.config import settings
-from app.core.database import get_db
-from app.core.security import create_access_token, hash_password, verify_password
+from app.core.database import get_async_db
+from app.core.principal import principal_claims
+from app.core.security import (
+    create_access_token,
+    hash_password_async,
+    verify_and_update_password,
+)
 from app.models import User
 
 router = APIRouter()
 
 
 @router.post("/signup", status_code=201)
-def signup(payload: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == payload.email).first():
+async def signup(payload: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    if await db.scalar(select(User).where(User.email == payload.email)):
         raise HTTPException(HTTPStatus.BAD_REQUEST, "El email ya esta registrado")
     if payload.password1 != payload.password2:
         raise HTTPException(HTTPStatus.BAD_REQUEST, "Las contraseñas no coinciden")
     u = User(
         email=payload.email,
-        hashed_password=hash_password(payload.password1),
+        hashed_password=await hash_password_async(payload.password1),
         first_name=payload.first_name,
         last_name=payload.last_name,
         city=payload.city,
         country=payload.country,
     )
     db.add(u)
-    db.commit()
-    db.refresh(u)
+    await db.commit()
     return {"id": u.id, "email": u.email}
 
 
 @router.post("/login", response_model=Token)
-async def login(request: Request, db: Session = Depends(get_db)):
+async def login(request: Request, db: AsyncSession = Depends(get_async_db)):
     email = None
     password = None
     ct = request.headers.get("content-type", "")
@@ -45,10 +50,17 @@ async def login(request: Request, db: Session = Depends(get_db)):
         form = await request.form()
         email = form.get("username")
         password = form.get("password")
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user:
         raise HTTPException(HTTPStatus.UNAUTHORIZED, "Credenciales invalidas")
-    token = create_access_token({"sub": str(user.id)})
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
+        raise HTTPException(HTTPStatus.UNAUTHORIZED, "Credenciales invalidas")
+    if new_hash:
+        # BCRYPT_ROUNDS cambio: se guarda el hash con el costo actual
+        user.hashed_password = new_hash
+        await db.commit()
+    token = create_access_token({"sub": str(user.id), **principal_claims(user)})
     return {
         "access_token": token,
         "token_type": "bearer",
@@ -1,8 +1,10 @@
+import json
 from http import HTTPStatus
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy import and_, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api.responses.video_responses import (
@@ -17,8 +19,20 @@ from app.api.schemas.videos import (
     VoteMessageResponse,
 )
 from app.core.database import get_db
+from app.core.leaderboard import RankingCursor, cast_vote, ranking_page
+from app.core.public_catalog import (
+    decode_cursor,
+    get_catalog_version,
+    get_page_cache,
+    etag_matches,
+    make_etag,
+    mark_catalog_changed,
+    public_videos_page,
+)
+from app.core.principal import Principal
 from app.core.security import get_current_user
-from app.models import User, Video, VideoStatus, Vote
+from app.core.vote_buffer import buffer_vote, get_vote_buffer
+from app.models import Video, VideoStatus
 
 router = APIRouter()
 
@@ -28,17 +42,47 @@ router = APIRouter()
     responses=public_videos_responses,
     response_model=List[PublicVideoResponse],
 )
-def list_public_videos(request: Request, db: Session = Depends(get_db)):
+def list_public_videos(
+    request: Request,
+    db: Session = Depends(get_db),
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+):
+    """
+    Pagina de a lo sumo `limit` videos, del mas reciente al mas antiguo. La
+    siguiente se pide con el header X-Next-Cursor como ?cursor=. Las
+    respuestas llevan ETag y un If-None-Match vigente devuelve 304 sin ir a
+    la base de datos.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, "Cursor invalido")
     processed_base_url = get_processed_videos_url(request)
-    q = (
-        db.query(Video, func.count(Vote.id).label("votes"))
-        .outerjoin(Vote, Vote.video_id == Video.id)
-        .filter(and_(Video.is_public, Video.status == VideoStatus.done.value))
-        .group_by(Video.id)
-        .order_by(Video.updated_at.desc())
-    )
+    cache = get_page_cache()
+    key = (get_catalog_version().current(), processed_base_url, limit, cursor)
+    page = cache.get(key)
+    if page is None:
+        videos, next_cursor = public_videos_page(db, limit, after)
+        items = public_video_items(videos, processed_base_url)
+        body = json.dumps(jsonable_encoder(items)).encode()
+        page = (body, make_etag(key, body), next_cursor)
+        cache.put(key, page)
+
+    body, etag, next_cursor = page
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def public_video_items(
+    videos: List[Video], processed_base_url: str
+) -> List[PublicVideoResponse]:
     items: List[PublicVideoResponse] = []
-    for v, votes in q:
+    for v in videos:
         processed_url = None
         if v.processed_path:
             processed_url = f"{processed_base_url}{v.processed_path.split('/')[-1]}"
@@ -47,7 +91,7 @@ def list_public_videos(request: Request, db: Session = Depends(get_db)):
                 video_id=v.video_id,
                 title=v.title,
                 processed_url=processed_url,
-                votes=int(votes or 0),
+                votes=int(v.votes_count or 0),
             )
         )
     return items
@@ -61,64 +105,66 @@ def list_public_videos(request: Request, db: Session = Depends(get_db)):
 def vote_public_video(
     video_id: str,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    video = (
-        db.query(Video)
-        .filter(
-            and_(
-                Video.video_id == video_id,
-                Video.is_public,
-                Video.status == VideoStatus.done.value,
-            )
-        )
-        .first()
-    )
-    if not video:
-        raise HTTPException(HTTPStatus.NOT_FOUND, "Video no encontrado.")
+    if get_vote_buffer() is not None:
+        return buffer_public_vote(db, user, video_id)
 
-    already = (
-        db.query(Vote)
-        .filter(and_(Vote.user_id == user.id, Vote.video_id == video.id))
-        .first()
-    )
-    if already:
+    counted = cast_vote(db, user.id, video_id)
+    if counted is None:
+        raise HTTPException(HTTPStatus.NOT_FOUND, "Video no encontrado.")
+    if not counted:
         raise HTTPException(HTTPStatus.BAD_REQUEST, "Ya has votado por este video.")
 
-    v = Vote(user_id=user.id, video_id=video.id)
-    db.add(v)
+    mark_catalog_changed(db)
     db.commit()
     return VoteMessageResponse(message="Voto registrado exitosamente.")
 
 
+def buffer_public_vote(
+    db: Session, user: Principal, video_id: str
+) -> VoteMessageResponse:
+    """Modo write-behind: el voto queda aceptado y se escribe en el siguiente flush."""
+    video_db_id = db.scalar(
+        select(Video.id).where(
+            Video.video_id == video_id,
+            Video.is_public.is_(True),
+            Video.status == VideoStatus.done.value,
+        )
+    )
+    if video_db_id is None:
+        raise HTTPException(HTTPStatus.NOT_FOUND, "Video no encontrado.")
+    if not buffer_vote(db, user.id, video_db_id):
+        raise HTTPException(HTTPStatus.BAD_REQUEST, "Ya has votado por este video.")
+    return VoteMessageResponse(message="Voto registrado exitosamente.")
+
+
 @router.get("/rankings", responses=rankings_responses, response_model=List[RankingItem])
 def get_rankings(
+    response: Response,
     db: Session = Depends(get_db),
     city: str | None = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None),
 ):
-    offset = (page - 1) * page_size
-    base = (
-        db.query(
-            User.id,
-            User.first_name,
-            User.last_name,
-            User.city,
-            func.count(Vote.id).label("votes"),
-        )
-        .join(Video, Video.user_id == User.id)
-        .outerjoin(Vote, Vote.video_id == Video.id)
-        .filter(Video.is_public)
-        .group_by(User.id, User.first_name, User.last_name, User.city)
-        .order_by(func.count(Vote.id).desc(), User.id.asc())
+    """
+    Lee el ranking mantenido en user_vote_totals. La pagina siguiente se
+    pide con el header X-Next-Cursor como ?cursor= (keyset); page sigue
+    disponible pero usa OFFSET.
+    """
+    try:
+        after = RankingCursor.decode(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, "Cursor invalido")
+    rows, next_cursor = ranking_page(
+        db, page_size, city=city, cursor=after, offset=(page - 1) * page_size
     )
-    if city:
-        base = base.filter(User.city == city)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor.encode()
 
-    rows = base.offset(offset).limit(page_size).all()
     items: List[RankingItem] = []
-    for idx, (uid, first_name, last_name, ucity, votes) in enumerate(rows):
+    for position, uid, first_name, last_name, ucity, votes in rows:
         username = (first_name or "").strip()
         if last_name:
             username = f"{username} {last_name}".strip()
@@ -126,7 +172,7 @@ def get_rankings(
             username = f"user-{uid}"
         items.append(
             RankingItem(
-                position=offset + idx + 1,
+                position=position,
                 username=username,
                 city=ucity,
                 votes=int(votes or 0),
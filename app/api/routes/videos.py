@@ -1,37 +1,71 @@
+import asyncio
+import hashlib
+import subprocess
 import uuid
 from datetime import datetime
 from http import HTTPStatus
 from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from botocore.exceptions import BotoCoreError, ClientError
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+)
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.responses.video_responses import (
+    complete_resumable_responses,
+    complete_upload_responses,
+    create_resumable_responses,
     delete_video_responses,
+    direct_upload_responses,
+    resumable_status_responses,
+    upload_chunk_responses,
     upload_video_responses,
     user_videos_responses,
     video_detail_responses,
 )
 from app.api.schemas.videos import (
+    CompleteUploadRequest,
     DeleteVideoResponse,
+    DirectUploadRequest,
+    DirectUploadResponse,
+    ResumableUploadResponse,
     UploadVideoResponse,
     UserVideoResponse,
     VideoDetailResponse,
 )
-from app.celery_worker import process_video_task
+from app.celery_worker import current_pipeline_version, enqueue_video_task
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.dedup import reuse_processed_output
+from app.core.principal import Principal
+from app.core.progress import read_progress
 from app.core.security import get_current_user
-from app.core.storage import get_storage
+from app.core.storage import DirectUpload, get_s3_client, get_storage, parse_s3_uri
+from app.core.storage import OffsetConflict
 from app.core.storage import is_s3_uri, generate_presigned_get_url
-from app.models import User, Video, VideoStatus, Vote
+from app.core.upload_sessions import (
+    part_size_for,
+    resumable_for_video,
+    session_expired,
+    session_expires_at,
+)
+from app.core.utils.planner import ProbeInfo, probe_video
+from app.models import Video, VideoStatus, Vote
 from app.models.models import UTC
 import os
 
 
-def auth_and_set_user(request: Request, user: User = Depends(get_current_user)):
+def auth_and_set_user(request: Request, user: Principal = Depends(get_current_user)):
     request.state.user = user
 
 
@@ -43,6 +77,96 @@ def get_processed_videos_url(request: Request):
     return f"{scheme}://{host}/{processed_route}/"
 
 
+def probe_media(saved_path: str) -> ProbeInfo | None:
+    """ffprobe del original guardado (local o S3); None si no se puede leer."""
+    source = (
+        generate_presigned_get_url(saved_path) if is_s3_uri(saved_path) else saved_path
+    )
+    try:
+        return probe_video(source)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def probe_duration(saved_path: str) -> float | None:
+    """
+    Duracion del original recien guardado para el enrutamiento por cola; None
+    si el enrutamiento esta apagado o ffprobe no la obtiene.
+    """
+    if not (settings.PRIORITY_ROUTING and settings.UPLOAD_PROBE_DURATION):
+        return None
+    info = probe_media(saved_path)
+    return info.duration if info else None
+
+
+def validate_upload_request(payload: DirectUploadRequest) -> str:
+    """Valida tipo, extension y tamano declarados; retorna la extension."""
+    if not payload.content_type.startswith("video/"):
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST, "Tipo de archivo invalido, debe ser un video"
+        )
+    ext = (Path(payload.filename).suffix or ".mp4").lower()
+    if ext not in ALLOWED_EXTS:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST, f"Tipo de archivo no soportado {ext}"
+        )
+    if payload.size_bytes > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST, "El archivo excede el tamaño limite"
+        )
+    return ext
+
+
+async def get_pending_upload(
+    db: AsyncSession, video_id: str, user: Principal
+) -> Video:
+    video = await db.scalar(select(Video).where(Video.video_id == video_id))
+    if not video or video.user_id != user.id:
+        raise HTTPException(HTTPStatus.NOT_FOUND, "Subida no encontrada")
+    if video.status != VideoStatus.pending_upload.value or not video.upload_id:
+        raise HTTPException(HTTPStatus.CONFLICT, "La subida ya fue completada")
+    if session_expired(video):
+        raise HTTPException(HTTPStatus.GONE, "La sesion de subida expiro")
+    return video
+
+
+async def finish_pending_upload(
+    db: AsyncSession, video: Video, duration: float | None = None
+) -> dict:
+    """
+    Marca como subido un video de sesion pendiente y encola su procesamiento.
+    duration evita un segundo ffprobe si el llamador ya lo hizo.
+    """
+    video.status = VideoStatus.uploaded.value
+    video.upload_id = None
+    video.duration_seconds = duration or await asyncio.to_thread(
+        probe_duration, video.original_path
+    )
+    video.uploaded_at = datetime.now(UTC)
+    video.updated_at = datetime.now(UTC)
+    await db.commit()
+
+    task = enqueue_video_task(video, video.original_path)
+    video.task_id = task.id
+    await db.commit()
+
+    return {
+        "message": "Video subido correctamente. Procesamiento en progeso.",
+        "task_id": task.id,
+        "video_id": video.video_id,
+    }
+
+
+def resumable_status(video: Video, offset: int) -> ResumableUploadResponse:
+    return ResumableUploadResponse(
+        video_id=video.video_id,
+        offset=offset,
+        size_bytes=video.size_bytes,
+        chunk_size=part_size_for(video.size_bytes),
+        expires_at=session_expires_at(video),
+    )
+
+
 router = APIRouter(dependencies=[Depends(auth_and_set_user)])
 CHUNK_SIZE = 1024 * 1024
 ALLOWED_EXTS = {".mp4", ".mov", ".mkv", ".webm"}
@@ -58,7 +182,7 @@ async def upload_video(
     request: Request,
     video_file: UploadFile = File(...),
     title: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if not video_file.content_type or not video_file.content_type.startswith("video/"):
         raise HTTPException(
@@ -75,6 +199,7 @@ async def upload_video(
     original_rel = f"{video_uuid}_original{ext}"
     storage_backend = os.getenv("STORAGE_BACKEND", settings.STORAGE_BACKEND)
     storage = get_storage(base_dir=settings.UPLOAD_PATH, storage_backend=storage_backend)
+    hasher = hashlib.sha256()
     try:
         dest_path = (
             f"{settings.S3_UPLOAD_PREFIX}/{original_rel}"
@@ -86,6 +211,7 @@ async def upload_video(
             dest_path,
             chunk_size=CHUNK_SIZE,
             max_size=settings.MAX_FILE_SIZE,
+            hasher=hasher,
         )
    
     except ValueError:
@@ -103,14 +229,25 @@ async def upload_video(
         user_id=current_user.id,
         uploaded_at=datetime.now(UTC),
         updated_at=datetime.now(UTC),
+        size_bytes=video_file.size,
+        duration_seconds=await asyncio.to_thread(probe_duration, saved_path),
+        content_hash=hasher.hexdigest(),
     )
     db.add(v)
-    db.commit()
-    db.refresh(v)
-
-    task = process_video_task.delay(v.id, saved_path)
+    await db.commit()
+
+    if await db.run_sync(reuse_processed_output, v, current_pipeline_version()):
+        v.task_id = f"dedup-{video_uuid}"
+        await db.commit()
+        return {
+            "message": "Video subido correctamente. Contenido ya procesado, reutilizado.",
+            "task_id": v.task_id,
+            "video_id": v.video_id,
+        }
+
+    task = enqueue_video_task(v, saved_path)
     v.task_id = task.id
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Video subido correctamente. Procesamiento en progeso.",
@@ -119,6 +256,243 @@ async def upload_video(
     }
 
 
+@router.post(
+    "/uploads",
+    status_code=HTTPStatus.CREATED,
+    responses=direct_upload_responses,
+    response_model=DirectUploadResponse,
+)
+async def create_direct_upload(
+    request: Request,
+    payload: DirectUploadRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Crea el Video y un multipart upload en S3 con una URL prefirmada por
+    parte: el cliente sube los bytes directo a S3 y luego llama a
+    /uploads/{video_id}/complete. /upload sigue disponible como alternativa.
+    """
+    ext = validate_upload_request(payload)
+    storage_backend = os.getenv("STORAGE_BACKEND", settings.STORAGE_BACKEND)
+    if storage_backend != "s3":
+        raise HTTPException(
+            HTTPStatus.CONFLICT,
+            "Subida directa solo disponible con almacenamiento S3, use /api/videos/upload",
+        )
+
+    video_uuid = str(uuid.uuid4())
+    upload = get_storage(storage_backend="s3").direct_upload(
+        f"{video_uuid}_original{ext}"
+    )
+    part_size = DirectUpload.part_size_for(
+        payload.size_bytes, settings.S3_MULTIPART_PART_SIZE
+    )
+    part_count = -(-payload.size_bytes // part_size)
+    expires = settings.S3_URL_EXPIRE_SECONDS
+    upload_id = await asyncio.to_thread(upload.create, payload.content_type)
+    try:
+        urls = await asyncio.to_thread(
+            upload.part_urls, upload_id, part_count, expires
+        )
+        current_user = request.state.user
+        v = Video(
+            video_id=video_uuid,
+            title=payload.title,
+            status=VideoStatus.pending_upload.value,
+            original_path=upload.uri,
+            user_id=current_user.id,
+            uploaded_at=datetime.now(UTC),
+            updated_at=datetime.now(UTC),
+            size_bytes=payload.size_bytes,
+            upload_id=upload_id,
+        )
+        db.add(v)
+        await db.commit()
+    except Exception:
+        # sin fila en la base el GC de sesiones no lo veria: se aborta ya
+        await asyncio.to_thread(upload.abort, upload_id)
+        raise
+
+    return DirectUploadResponse(
+        video_id=video_uuid,
+        part_size=part_size,
+        parts=[
+            {"part_number": number, "url": url}
+            for number, url in enumerate(urls, start=1)
+        ],
+        expires_in=expires,
+    )
+
+
+@router.post(
+    "/uploads/{video_id}/complete",
+    status_code=HTTPStatus.CREATED,
+    responses=complete_upload_responses,
+    response_model=UploadVideoResponse,
+)
+async def complete_direct_upload(
+    video_id: str,
+    payload: CompleteUploadRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    v = await get_pending_upload(db, video_id, request.state.user)
+    upload = DirectUpload(get_s3_client(), *parse_s3_uri(v.original_path))
+    parts = [{"PartNumber": p.part_number, "ETag": p.etag} for p in payload.parts]
+    try:
+        head = await asyncio.to_thread(upload.complete, v.upload_id, parts)
+    except (BotoCoreError, ClientError) as exc:
+        # partes faltantes o ETags invalidos: el cliente puede reintentar
+        print(f"Error al completar multipart {upload.uri}: {exc}")
+        raise HTTPException(HTTPStatus.BAD_REQUEST, "No se pudo completar la subida")
+
+    # tamano y tipo declarados no prueban nada (ContentType lo fijo la API con
+    # lo que dijo el cliente): se valida el objeto real antes de encolar
+    size = head["ContentLength"]
+    error = None
+    info = None
+    if size > settings.MAX_FILE_SIZE:
+        error = "El archivo excede el tamaño limite"
+    else:
+        info = await asyncio.to_thread(probe_media, v.original_path)
+        if info is None or info.vcodec is None:
+            error = "Tipo de archivo invalido, debe ser un video"
+    if error:
+        await asyncio.to_thread(upload.delete)
+        v.status = VideoStatus.failed.value
+        v.upload_id = None
+        v.updated_at = datetime.now(UTC)
+        await db.commit()
+        raise HTTPException(HTTPStatus.BAD_REQUEST, error)
+
+    v.size_bytes = size
+    return await finish_pending_upload(db, v, duration=info.duration)
+
+
+@router.post(
+    "/resumable",
+    status_code=HTTPStatus.CREATED,
+    responses=create_resumable_responses,
+    response_model=ResumableUploadResponse,
+)
+async def create_resumable_upload(
+    request: Request,
+    payload: DirectUploadRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Crea una sesion de subida reanudable. El cliente envia chunks con
+    PUT /resumable/{video_id}?offset=N, consulta el offset con GET si se
+    corta la conexion (solo reenvia lo que falta) y cierra con /complete.
+    Los bytes van al backend configurado: append en local/NFS, partes de
+    un multipart upload en S3.
+    """
+    ext = validate_upload_request(payload)
+    video_uuid = str(uuid.uuid4())
+    original_rel = f"{video_uuid}_original{ext}"
+    storage_backend = os.getenv("STORAGE_BACKEND", settings.STORAGE_BACKEND)
+    storage = get_storage(base_dir=settings.UPLOAD_PATH, storage_backend=storage_backend)
+    if storage_backend == "s3":
+        upload = storage.resumable(original_rel, part_size_for(payload.size_bytes))
+    else:
+        upload = storage.resumable(original_rel)
+    upload_id = await asyncio.to_thread(upload.start, payload.content_type)
+
+    current_user = request.state.user
+    v = Video(
+        video_id=video_uuid,
+        title=payload.title,
+        status=VideoStatus.pending_upload.value,
+        original_path=upload.uri,
+        user_id=current_user.id,
+        uploaded_at=datetime.now(UTC),
+        updated_at=datetime.now(UTC),
+        size_bytes=payload.size_bytes,
+        upload_id=upload_id,
+    )
+    db.add(v)
+    await db.commit()
+    return resumable_status(v, 0)
+
+
+@router.get(
+    "/resumable/{video_id}",
+    responses=resumable_status_responses,
+    response_model=ResumableUploadResponse,
+)
+async def get_resumable_upload(
+    video_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    v = await get_pending_upload(db, video_id, request.state.user)
+    offset = await asyncio.to_thread(resumable_for_video(v).offset)
+    return resumable_status(v, offset)
+
+
+@router.put(
+    "/resumable/{video_id}",
+    responses=upload_chunk_responses,
+    response_model=ResumableUploadResponse,
+)
+async def upload_resumable_chunk(
+    video_id: str,
+    request: Request,
+    offset: int = Query(ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Anexa el cuerpo de la peticion en `offset`; debe coincidir con lo recibido."""
+    v = await get_pending_upload(db, video_id, request.state.user)
+    upload = resumable_for_video(v)
+    try:
+        new_offset = await upload.append(
+            request.stream(),
+            offset,
+            max_bytes=v.size_bytes - offset,
+            chunk_size=CHUNK_SIZE,
+        )
+    except OffsetConflict as exc:
+        raise HTTPException(
+            HTTPStatus.CONFLICT,
+            f"Offset invalido, offset actual {exc.offset}",
+            headers={"Upload-Offset": str(exc.offset)},
+        )
+    except ValueError:
+        raise HTTPException(
+            HTTPStatus.BAD_REQUEST,
+            "El chunk excede el tamaño declarado o no respeta chunk_size",
+        )
+
+    # cada chunk renueva la sesion frente al GC de sesiones expiradas
+    v.updated_at = datetime.now(UTC)
+    await db.commit()
+    return resumable_status(v, new_offset)
+
+
+@router.post(
+    "/resumable/{video_id}/complete",
+    status_code=HTTPStatus.CREATED,
+    responses=complete_resumable_responses,
+    response_model=UploadVideoResponse,
+)
+async def complete_resumable_upload(
+    video_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    v = await get_pending_upload(db, video_id, request.state.user)
+    upload = resumable_for_video(v)
+    offset = await asyncio.to_thread(upload.offset)
+    if offset != v.size_bytes:
+        raise HTTPException(
+            HTTPStatus.CONFLICT,
+            f"La subida esta incompleta, offset actual {offset}",
+            headers={"Upload-Offset": str(offset)},
+        )
+    v.original_path = await asyncio.to_thread(upload.finish)
+    return await finish_pending_upload(db, v)
+
+
 @router.post(
     "/upload-mock",
     status_code=HTTPStatus.ACCEPTED,
@@ -129,7 +503,7 @@ async def upload_video_mock(
     request: Request,
     video_file: UploadFile = File(...),
     title: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if not video_file.content_type or not video_file.content_type.startswith("video/"):
         print(video_file.content_type)
@@ -177,12 +551,11 @@ async def upload_video_mock(
         updated_at=datetime.now(UTC),
     )
     db.add(v)
-    db.commit()
-    db.refresh(v)
+    await db.commit()
 
     mock_task_id = f"mock-{video_uuid}"
     v.task_id = mock_task_id
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Video subido correctamente (mock mode - sin procesamiento).",
@@ -194,16 +567,14 @@ async def upload_video_mock(
 @router.get("", responses=user_videos_responses, response_model=List[UserVideoResponse])
 async def get_user_videos(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     current_user = request.state.user
-    videos = (
-        db.query(Video)
-        .filter(
+    videos = await db.scalars(
+        select(Video).where(
             Video.user_id == current_user.id,
             Video.status == VideoStatus.done.value,
         )
-        .all()
     )
     processed_base_url = get_processed_videos_url(request)
     response: List[UserVideoResponse] = []
@@ -235,9 +606,9 @@ async def get_user_videos(
 async def get_video_detail(
     video_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    video = db.query(Video).filter(Video.video_id == video_id).first()
+    video = await db.scalar(select(Video).where(Video.video_id == video_id))
     if not video:
         raise HTTPException(HTTPStatus.NOT_FOUND, "Video no encontrado")
 
@@ -259,7 +630,8 @@ async def get_video_detail(
         processed_at = video.updated_at
 
     votes_count = (
-        db.query(func.count(Vote.id)).filter(Vote.video_id == video.id).scalar() or 0
+        await db.scalar(select(func.count(Vote.id)).where(Vote.video_id == video.id))
+        or 0
     )
 
     return VideoDetailResponse(
@@ -271,6 +643,7 @@ async def get_video_detail(
         original_url=original_url,
         processed_url=processed_url,
         votes=votes_count,
+        progress=read_progress(video),
     )
 
 
@@ -282,10 +655,10 @@ async def get_video_detail(
 async def delete_video(
     video_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     current_user = request.state.user
-    video = db.query(Video).filter(Video.video_id == video_id).first()
+    video = await db.scalar(select(Video).where(Video.video_id == video_id))
     if not video:
         raise HTTPException(HTTPStatus.NOT_FOUND, "Video no encontrado")
     if video.user_id != current_user.id:
@@ -309,8 +682,8 @@ async def delete_video(
     except Exception:
         pass
 
-    db.delete(video)
-    db.commit()
+    await db.delete(video)
+    await db.commit()
 
     return DeleteVideoResponse(
         message="El video ha sido eliminado exitosamente.", video_id=video_id
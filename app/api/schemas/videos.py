@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Video(BaseModel):
@@ -25,6 +25,42 @@ class UploadVideoResponse(BaseModel):
     video_id: str
 
 
+class DirectUploadRequest(BaseModel):
+    title: str
+    filename: str
+    content_type: str
+    size_bytes: int = Field(gt=0)
+
+
+class DirectUploadPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class DirectUploadResponse(BaseModel):
+    video_id: str
+    part_size: int
+    parts: list[DirectUploadPart]
+    expires_in: int
+
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    parts: list[CompletedPart] = Field(min_length=1)
+
+
+class ResumableUploadResponse(BaseModel):
+    video_id: str
+    offset: int
+    size_bytes: int
+    chunk_size: int
+    expires_at: datetime
+
+
 class UserVideoResponse(BaseModel):
     video_id: str
     title: str
@@ -34,6 +70,14 @@ class UserVideoResponse(BaseModel):
     processed_url: Optional[str] = None
 
 
+class VideoProgress(BaseModel):
+    stage: Optional[str] = None
+    percent: float = 0.0
+    eta_seconds: Optional[float] = None
+    speed: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+
 class VideoDetailResponse(BaseModel):
     video_id: str
     title: str
@@ -43,6 +87,7 @@ class VideoDetailResponse(BaseModel):
     original_url: Optional[str] = None
     processed_url: Optional[str] = None
     votes: int
+    progress: Optional[VideoProgress] = None
 
 
 class DeleteVideoResponse(BaseModel):
@@ -1,19 +1,51 @@
+import json
+import logging
 import os
+import subprocess
 import tempfile
+import time
+from contextlib import ExitStack, nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
 import shutil
 
 from celery import Celery
+from celery.signals import before_task_publish, worker_init, worker_process_shutdown
 
 from app.core.config import settings
 from app.core.database import SessionLocal
+from app.core.dedup import pipeline_version
+from app.core.encoding import get_profile_selector, profile_from_info
+from app.core.leaderboard import rebuild_vote_totals
+from app.core.progress import ProgressReporter, current_reporter, get_progress_store
+from app.core.routing import WeightedDrain, classify_job, queue_for_class
+from app.core.scheduler import get_job_slots
+from app.core.upload_sessions import expire_upload_sessions
+from app.core.metrics import (
+    BYTES_TOTAL,
+    QUEUE_WAIT_SECONDS,
+    TASKS_TOTAL,
+    classify_failure,
+    mark_process_dead,
+    start_worker_metrics_server,
+    track_stage,
+)
 from app.core.utils import video_utils as vu
+from app.core.utils.checkpoints import CheckpointStore
+from app.core.utils.planner import plan_pipeline, probe_video
+from app.core.utils.remote_input import RangeProxy, S3RangeSource
+from app.core.utils.segment_cache import SegmentCache
 from app.models import Video, VideoStatus
-from app.core.storage import is_s3_uri, parse_s3_uri
-import boto3
+from app.core.storage import (
+    S3MultipartWriter,
+    get_s3_client,
+    get_transfer_config,
+    is_s3_uri,
+    parse_s3_uri,
+)
 
 UTC = timezone.utc
+logger = logging.getLogger(__name__)
 
 try:
     celery_app = Celery("worker", broker="sqs://")
@@ -30,17 +62,53 @@ try:
         timezone="UTC",
         worker_prefetch_multiplier=1,
         task_acks_late=True,
+        # solo aplica con --autoscale=max,min
+        worker_autoscaler="app.core.scheduler:CpuAutoscaler",
+        # lo encola el servicio celery_beat de los compose (uno por despliegue;
+        # las tareas son idempotentes si se duplicara)
+        beat_schedule={
+            "expire-upload-sessions": {
+                "task": "app.celery_worker.expire_upload_sessions_task",
+                "schedule": settings.UPLOAD_SESSION_GC_INTERVAL_SECONDS,
+            },
+            "reconcile-leaderboard": {
+                "task": "app.celery_worker.reconcile_leaderboard_task",
+                "schedule": settings.LEADERBOARD_RECONCILE_INTERVAL_SECONDS,
+            },
+        },
     )
     celery_app.conf.result_backend = None
     celery_app.conf.task_always_eager = (
         bool(int(os.getenv("CELERY_EAGER", "0"))) or settings.TESTING
     )
     celery_app.conf.task_eager_propagates = True
+    if settings.PRIORITY_ROUTING:
+        # el worker se lanza con -Q {cola}-short,{cola}-medium,{cola}-long
+        celery_app.steps["consumer"].add(WeightedDrain)
 
 except Exception as e:
     print(f"Error inicializando Celery/Redis: {e}")
     celery_app = None
 
+
+@before_task_publish.connect
+def _stamp_enqueued_at(headers=None, **kwargs):
+    # el worker lo lee como self.request.enqueued_at para medir la espera en cola
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@worker_init.connect
+def _start_metrics_server(**kwargs):
+    if settings.WORKER_METRICS_PORT:
+        start_worker_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def _cleanup_process_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
 ASSETS_DIR = Path(getattr(settings, "ASSETS_DIR", "assets"))
 INTRO_OUTRO_FILENAME = "intro-outro.jpg"
 INTRO = ASSETS_DIR / INTRO_OUTRO_FILENAME
@@ -48,36 +116,338 @@ OUTRO = ASSETS_DIR / INTRO_OUTRO_FILENAME
 WATERMARK = ASSETS_DIR / "watermark.png"
 INTRO_OUTRO_IMG = ASSETS_DIR / INTRO_OUTRO_FILENAME
 
+_segment_cache: SegmentCache | None = None
+_checkpoint_store: CheckpointStore | None = None
 
-def process_video(video_db_id: int, original_path: str):
-    with tempfile.TemporaryDirectory() as td:
-        td = Path(td)
+
+def current_pipeline_version(
+    profile: vu.EncodeProfile = vu.DEFAULT_PROFILE,
+) -> str | None:
+    try:
+        return pipeline_version(WATERMARK, INTRO_OUTRO_IMG, profile)
+    except OSError:
+        # sin assets no hay version comparable: no se deduplica
+        return None
+
+
+def get_segment_cache() -> SegmentCache:
+    global _segment_cache
+    if _segment_cache is None:
+        _segment_cache = SegmentCache(
+            settings.SEGMENT_CACHE_DIR, max_bytes=settings.SEGMENT_CACHE_MAX_BYTES
+        )
+    return _segment_cache
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore(
+            settings.CHECKPOINT_DIR,
+            max_bytes=settings.CHECKPOINT_MAX_BYTES,
+            ttl_seconds=settings.CHECKPOINT_TTL_SECONDS,
+        )
+    return _checkpoint_store
+
+
+STREAMABLE_PIPELINES = ("segments", "fused")
+
+
+def _plan_for(input_ref: str, stats: dict):
+    """
+    Un solo ffprobe sobre la entrada para decidir que etapas se pueden
+    omitir. Si el probe falla se aplica el pipeline completo.
+    """
+    if not settings.ADAPTIVE_PIPELINE:
+        return None
+    try:
+        with track_stage("probe"):
+            info = probe_video(input_ref)
+    except (OSError, subprocess.CalledProcessError, ValueError) as exc:
+        logger.warning("ffprobe fallo (%s), se aplica el pipeline completo", exc)
+        return None
+    plan = plan_pipeline(info)
+    stats["plan"] = plan.to_dict()
+    return plan
+
+
+def _render(
+    input_path: str,
+    output_path: str,
+    workdir: Path,
+    sink=None,
+    plan=None,
+    threads: int | None = None,
+    profile=vu.DEFAULT_PROFILE,
+    checkpoints=None,
+):
+    try:
+        if settings.VIDEO_PIPELINE == "segments":
+            vu.process_with_cached_segments(
+                input_path,
+                output_path,
+                watermark_path=str(WATERMARK),
+                image_path=str(INTRO_OUTRO_IMG),
+                cache=get_segment_cache(),
+                workdir=str(workdir),
+                parallel_workers=settings.PARALLEL_ENCODE_WORKERS,
+                chunk_seconds=settings.PARALLEL_ENCODE_CHUNK_SECONDS,
+                sink=sink,
+                plan=plan,
+                threads=threads,
+                profile=profile,
+                checkpoints=checkpoints,
+                # con slot reservado, cada fragmento pide el presupuesto vigente
+                thread_budget=(
+                    get_job_slots().current_budget if threads is not None else None
+                ),
+            )
+            return
+        if settings.VIDEO_PIPELINE == "fused":
+            vu.process_fused(
+                input_path,
+                output_path,
+                watermark_path=str(WATERMARK),
+                image_path=str(INTRO_OUTRO_IMG),
+                sink=sink,
+                plan=plan,
+                threads=threads,
+                profile=profile,
+            )
+            return
+    except subprocess.CalledProcessError as exc:
+        # con sink la salida ya se esta subiendo: el llamador aborta y reintenta
+        if sink is not None:
+            raise
+        logger.warning(
+            "Pipeline %s fallo (%s), usando pipeline por etapas",
+            settings.VIDEO_PIPELINE,
+            exc,
+        )
+    vu.process_step_by_step(
+        input_path,
+        output_path,
+        watermark_path=str(WATERMARK),
+        image_path=str(INTRO_OUTRO_IMG),
+        workdir=str(workdir),
+    )
+
+
+def _open_input(
+    s3_client,
+    bucket: str,
+    key: str,
+    td: Path,
+    stack: ExitStack,
+    stats: dict,
+    checkpoints=None,
+) -> str:
+    """
+    Resuelve la entrada de ffmpeg para un original en S3 segun S3_INPUT_MODE:
+    - download: descarga completa a disco (comportamiento original); con
+      checkpoints la descarga se conserva para los reintentos
+    - stream: proxy local con Range que solo trae los bytes que ffmpeg lee
+    - presigned: ffmpeg lee directo la URL prefirmada (sin conteo de bytes)
+    """
+    mode = settings.S3_INPUT_MODE
+    stats["input_mode"] = mode
+    if mode == "stream":
+        proxy = stack.enter_context(
+            RangeProxy(S3RangeSource(s3_client, bucket, key))
+        )
+        stack.callback(lambda: stats.update(proxy.stats()))
+        return proxy.url
+    if mode == "presigned":
+        return s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=settings.S3_URL_EXPIRE_SECONDS,
+        )
+
+    def download(path: Path):
+        with track_stage("download"):
+            s3_client.download_file(
+                bucket, key, str(path), Config=get_transfer_config()
+            )
+
+    started = time.perf_counter()
+    if checkpoints is None:
+        resumed = False
         local_input = td / "input.mp4"
-        trimmed = td / "trimmed.mp4"
-        v720 = td / "v720.mp4"
-        muted = td / "muted.mp4"
-        wm = td / "wm.mp4"
+        download(local_input)
+    else:
+        resumed = checkpoints.done("input")
+        local_input = checkpoints.run("input", download)
+    size = local_input.stat().st_size
+    stats.update(
+        {
+            "object_size": size,
+            "bytes_fetched": 0 if resumed else size,
+            "first_byte_seconds": time.perf_counter() - started,
+        }
+    )
+    return str(local_input)
+
+
+def _render_to_s3(
+    s3_client,
+    bucket: str,
+    key: str,
+    input_ref: str,
+    td: Path,
+    plan=None,
+    threads: int | None = None,
+    profile=vu.DEFAULT_PROFILE,
+    checkpoints=None,
+) -> bool:
+    """
+    Codifica emitiendo MP4 fragmentado por stdout y lo sube con multipart
+    upload mientras ffmpeg sigue corriendo. En el pipeline fused eso solapa
+    la subida con la codificacion; en segments el cuerpo se codifica primero
+    a disco y solo el stream copy final va por el multipart upload. Retorna
+    False si el modo no aplica o si ffmpeg fallo (el multipart upload queda
+    abortado).
+    """
+    if not settings.S3_STREAM_UPLOAD or settings.VIDEO_PIPELINE not in STREAMABLE_PIPELINES:
+        return False
+    try:
+        with S3MultipartWriter(
+            s3_client,
+            bucket,
+            key,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            concurrency=settings.S3_MULTIPART_CONCURRENCY,
+            content_type="video/mp4",
+        ) as writer:
+            _render(
+                input_ref,
+                vu.STREAM_OUTPUT,
+                td,
+                sink=writer,
+                plan=plan,
+                threads=threads,
+                profile=profile,
+                checkpoints=checkpoints,
+            )
+        BYTES_TOTAL.labels(direction="out").inc(writer.bytes_written)
+        return True
+    except subprocess.CalledProcessError as exc:
+        logger.warning(
+            "Subida en streaming fallo (%s), reintentando con archivo local", exc
+        )
+        return False
+
+
+def _render_final(input_ref: str, td: Path, checkpoints=None, **kwargs) -> Path:
+    """Renderiza a un archivo local; con checkpoints sobrevive al reintento."""
+    if checkpoints is None:
         final_tmp = td / "final.mp4"
+        _render(input_ref, str(final_tmp), td, **kwargs)
+        return final_tmp
+    return checkpoints.run(
+        "final",
+        lambda path: _render(
+            input_ref, str(path), td, checkpoints=checkpoints, **kwargs
+        ),
+    )
+
+
+def _select_profile(checkpoints=None):
+    """
+    Perfil de codificacion del trabajo. Con checkpoints se fija en el primer
+    intento: el cuerpo conservado y la intro/outro deben compartir perfil
+    para poder unirse por stream copy.
+    """
+    profile, encoding = get_profile_selector().select()
+    if checkpoints is None:
+        return profile, encoding
+    saved = checkpoints.run(
+        "encoding",
+        lambda path: path.write_text(json.dumps(encoding)),
+        suffix=".json",
+    )
+    encoding = json.loads(saved.read_text())
+    return profile_from_info(encoding), encoding
+
+
+def process_video(video_db_id: int, original_path: str, stats: dict | None = None):
+    stats = {} if stats is None else stats
+    checkpoints = None
+    hold = nullcontext()
+    if settings.CHECKPOINTS_ENABLED:
+        store = get_checkpoint_store()
+        store.evict()
+        checkpoints = store.job(video_db_id, current_pipeline_version())
+        # hasta mover el final: evict() de otro proceso no lo borra a mitad
+        hold = checkpoints.hold()
+    with hold, tempfile.TemporaryDirectory() as td, ExitStack() as stack:
+        td = Path(td)
 
         s3_bucket = None
         s3_key = None
         if is_s3_uri(original_path):
             s3_bucket, s3_key = parse_s3_uri(original_path)
-            s3_client = boto3.client("s3", region_name=settings.AWS_REGION)
-            s3_client.download_file(s3_bucket, s3_key, str(local_input))
+            s3_client = get_s3_client()
+            input_ref = _open_input(
+                s3_client, s3_bucket, s3_key, td, stack, stats, checkpoints
+            )
         else:
-            local_input = Path(original_path)
-
-        vu.trim_to_seconds(str(local_input), str(trimmed), seconds=30)
-        vu.scale_to_720p(str(trimmed), str(v720))
-        vu.remove_audio(str(v720), str(muted), reencode=False)
-        vu.add_watermark(str(muted), str(wm), watermark_path=str(Path(WATERMARK)))
-        vu.add_image_intro_outro(str(Path(INTRO_OUTRO_IMG)), str(wm), str(final_tmp))
+            input_ref = original_path
 
+        plan = _plan_for(input_ref, stats)
+        if plan is not None:
+            logger.info("Video %s: plan %s", video_db_id, plan.operations)
+        reporter = current_reporter.get()
+        if reporter is not None and plan is not None and plan.probe:
+            duration = plan.probe.get("duration")
+            if duration:
+                reporter.total_seconds = min(float(duration), 30.0)
 
+        profile, stats["encoding"] = _select_profile(checkpoints)
+        threads = stack.enter_context(get_job_slots().reserve())
+        stats["threads"] = threads
+        render = dict(plan=plan, threads=threads, profile=profile)
         if s3_bucket:
             dest_key = f"{settings.S3_PROCESSED_PREFIX}/{video_db_id}_processed.mp4"
-            s3_client.upload_file(str(final_tmp), s3_bucket, dest_key)
+            # con el final ya en checkpoint solo falta subirlo
+            final_done = checkpoints is not None and checkpoints.done("final")
+            if final_done or not _render_to_s3(
+                s3_client,
+                s3_bucket,
+                dest_key,
+                input_ref,
+                td,
+                checkpoints=checkpoints,
+                **render,
+            ):
+                final_tmp = _render_final(input_ref, td, checkpoints, **render)
+                BYTES_TOTAL.labels(direction="out").inc(final_tmp.stat().st_size)
+                with track_stage("upload"):
+                    s3_client.upload_file(
+                        str(final_tmp),
+                        s3_bucket,
+                        dest_key,
+                        Config=get_transfer_config(),
+                    )
+        else:
+            final_tmp = _render_final(input_ref, td, checkpoints, **render)
+            BYTES_TOTAL.labels(direction="out").inc(final_tmp.stat().st_size)
+
+        stack.close()
+        if "bytes_fetched" in stats:
+            BYTES_TOTAL.labels(direction="in").inc(stats["bytes_fetched"])
+        elif not s3_bucket and os.path.exists(original_path):
+            BYTES_TOTAL.labels(direction="in").inc(os.path.getsize(original_path))
+        if "object_size" in stats:
+            logger.info(
+                "Video %s: entrada %s, %s de %s bytes transferidos",
+                video_db_id,
+                stats["input_mode"],
+                stats["bytes_fetched"],
+                stats["object_size"],
+            )
+
+        if s3_bucket:
             # Condicional: no borrar original en S3 a menos que esté habilitado explícitamente
             if getattr(settings, "S3_DELETE_ORIGINAL", False) and s3_key:
                 try:
@@ -96,6 +466,10 @@ def process_video(video_db_id: int, original_path: str):
 
 @celery_app.task(bind=True, max_retries=3, soft_time_limit=600, time_limit=1200)
 def process_video_task(self, video_db_id: int, original_path: str):
+    enqueued_at = getattr(self.request, "enqueued_at", None)
+    if enqueued_at and not self.request.retries:
+        QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - float(enqueued_at)))
+
     db = SessionLocal()
     video = None
     try:
@@ -104,26 +478,60 @@ def process_video_task(self, video_db_id: int, original_path: str):
             raise ValueError(f"Video with id {video_db_id} not found")
 
         if video.status in (VideoStatus.processing.value, VideoStatus.done.value):
+            TASKS_TOTAL.labels(outcome="skipped", failure_class="").inc()
             return video.processed_path
 
+        # un reintento encuentra el video en failed (lo marco el intento anterior)
+        claimable = [VideoStatus.uploaded.value]
+        if self.request.retries:
+            claimable.append(VideoStatus.failed.value)
         updated_rows = (
             db.query(Video)
             .filter(
                 Video.id == video_db_id,
-                Video.status == VideoStatus.uploaded.value,
+                Video.status.in_(claimable),
             )
             .update({"status": VideoStatus.processing.value, "updated_at": datetime.now(UTC)}, synchronize_session=False)
         )
         db.commit()
         if updated_rows == 0:
+            TASKS_TOTAL.labels(outcome="skipped", failure_class="").inc()
             video = db.query(Video).filter(Video.id == video_db_id).first()
             return getattr(video, "processed_path", None)
 
-        v_processed = process_video(video_db_id, original_path)
-        video.processed_path = v_processed
-        video.updated_at = datetime.now(UTC)
-        video.status = VideoStatus.done.value
-        db.commit()
+        processing_info: dict = {}
+        reporter = ProgressReporter(
+            video_db_id,
+            total_seconds=30,
+            store=get_progress_store(),
+            interval=settings.PROGRESS_INTERVAL_SECONDS,
+        )
+        token = current_reporter.set(reporter)
+        try:
+            v_processed = process_video(
+                video_db_id, original_path, stats=processing_info
+            )
+        except Exception:
+            reporter.finish(VideoStatus.failed.value)
+            raise
+        finally:
+            current_reporter.reset(token)
+        reporter.finish(VideoStatus.done.value)
+        with track_stage("db_update"):
+            video.processed_path = v_processed
+            video.processing_info = processing_info
+            # version del perfil realmente usado: con ENCODING_ADAPTIVE una
+            # salida de otro preset/CRF no se reutiliza como la de defecto
+            encoding = processing_info.get("encoding")
+            video.pipeline_version = current_pipeline_version(
+                profile_from_info(encoding) if encoding else vu.DEFAULT_PROFILE
+            )
+            video.updated_at = datetime.now(UTC)
+            video.status = VideoStatus.done.value
+            db.commit()
+        TASKS_TOTAL.labels(outcome="success", failure_class="").inc()
+        if settings.CHECKPOINTS_ENABLED:
+            get_checkpoint_store().discard(video_db_id)
         try:
             if original_path and os.path.exists(original_path):
                 os.remove(original_path)
@@ -133,6 +541,10 @@ def process_video_task(self, video_db_id: int, original_path: str):
             )
         return v_processed
     except Exception as e:
+        TASKS_TOTAL.labels(
+            outcome="retry" if self.request.retries < self.max_retries else "failure",
+            failure_class=classify_failure(e),
+        ).inc()
         try:
             db.rollback()
         except Exception:
@@ -146,3 +558,40 @@ def process_video_task(self, video_db_id: int, original_path: str):
         raise self.retry(exc=e, countdown=60)
     finally:
         db.close()
+
+
+@celery_app.task
+def expire_upload_sessions_task():
+    db = SessionLocal()
+    try:
+        expired = expire_upload_sessions(db)
+    finally:
+        db.close()
+    if expired:
+        logger.info("Sesiones de subida expiradas eliminadas: %s", expired)
+    return expired
+
+
+@celery_app.task
+def reconcile_leaderboard_task():
+    db = SessionLocal()
+    try:
+        users = rebuild_vote_totals(db)
+        db.commit()
+    finally:
+        db.close()
+    logger.info("Ranking reconstruido desde votes: %s usuarios", users)
+    return users
+
+
+def enqueue_video_task(video: Video, original_path: str):
+    """
+    Encola el procesamiento. Con PRIORITY_ROUTING la tarea va a la cola de
+    su clase (short | medium | long) segun size_bytes y duration_seconds.
+    """
+    if not settings.PRIORITY_ROUTING:
+        return process_video_task.delay(video.id, original_path)
+    job_class = classify_job(video.size_bytes, video.duration_seconds)
+    return process_video_task.apply_async(
+        args=(video.id, original_path), queue=queue_for_class(job_class)
+    )
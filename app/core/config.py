@@ -4,9 +4,26 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str | None = None  # por defecto DATABASE_URL con asyncpg
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 3
+    DB_POOL_TIMEOUT: float = 15
+    DB_POOL_RECYCLE: int = 1800  # -1 = sin reciclar
+    DB_POOL_AUTO: bool = False  # tamano desde DB_CONNECTION_BUDGET / procesos
+    DB_CONNECTION_BUDGET: int = 80  # conexiones a Postgres para todo el despliegue
+    DB_POOL_PROCESSES: int = 0  # 0 = $WORKERS o 2*nproc+1 como prestart.sh
+    DB_PGBOUNCER: bool = False  # NullPool y sin prepared statements
     REDIS_URL: str | None = None
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    BCRYPT_ROUNDS: int = 12  # al cambiarlo los hashes se regeneran en el login
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = nproc hilos para bcrypt
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60  # obsolescencia maxima entre procesos
+    AUTH_CACHE_REDIS: bool = False  # segundo nivel compartido en REDIS_URL
+    AUTH_CACHE_REDIS_TTL_SECONDS: int = 300
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False  # principal en el JWT, sin ir a la DB
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ACCESS_TOKEN_EXPIRE_SECONDS: int = 3600
     UPLOAD_PATH: str = "my-app/uploads"
@@ -16,6 +33,35 @@ class Settings(BaseSettings):
     TESTING: bool = False
     CELERY_EAGER: bool = False
     ASSETS_DIR: str = "assets"
+    VIDEO_PIPELINE: str = "segments"  # options: segments | fused | legacy
+    SEGMENT_CACHE_DIR: str = "/tmp/video-segment-cache"
+    SEGMENT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    ADAPTIVE_PIPELINE: bool = True
+    CHECKPOINTS_ENABLED: bool = True  # reintentos retoman desde la ultima etapa completa
+    CHECKPOINT_DIR: str = "/tmp/video-checkpoints"
+    CHECKPOINT_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    CHECKPOINT_TTL_SECONDS: int = 6 * 3600
+    PARALLEL_ENCODE_WORKERS: int = 0  # 0/1 = codificacion serial
+    PARALLEL_ENCODE_CHUNK_SECONDS: int = 5
+    ENCODING_ADAPTIVE: bool = False  # preset/CRF segun el backlog de la cola
+    ENCODING_BACKLOG_SOURCE: str = "sqs"  # options: sqs | db
+    ENCODING_BACKLOG_CACHE_SECONDS: float = 5.0
+    ENCODING_IDLE_BACKLOG: int = 0
+    ENCODING_BUSY_BACKLOG: int = 20
+    ENCODING_IDLE_PRESET: str = "medium"
+    ENCODING_BUSY_PRESET: str = "superfast"
+    ENCODING_IDLE_CRF: int = 23
+    ENCODING_BUSY_CRF: int = 26
+    PROGRESS_BACKEND: str = "redis"  # options: redis | db | none
+    PROGRESS_INTERVAL_SECONDS: float = 1.0
+    PROGRESS_TTL_SECONDS: int = 3600
+    WORKER_SLOTS_DIR: str = "/tmp/worker-job-slots"
+    WORKER_MIN_THREADS: int = 1
+    WORKER_MAX_JOB_SHARE: float = 0.5  # fraccion maxima de nucleos por trabajo
+    WORKER_AUTOSCALE_TARGET_UTILIZATION: float = 0.85
+    WORKER_AUTOSCALE_OVERLOAD: float = 1.5  # hilos ejecutables por nucleo
+    WORKER_AUTOSCALE_COOLDOWN: int = 30
+    WORKER_METRICS_PORT: int = 9808  # 0 = sin endpoint de metricas en el worker
     STORAGE_BACKEND: str = "s3"  # options: s3 | nfs | local
     AWS_REGION: str | None = None
     AWS_S3_BUCKET: str | None = None
@@ -23,7 +69,32 @@ class Settings(BaseSettings):
     S3_PROCESSED_PREFIX: str = "processed"
     S3_URL_EXPIRE_SECONDS: int = 3600
     S3_DELETE_ORIGINAL: bool = False
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+    S3_TRANSFER_CONCURRENCY: int = 10
+    S3_INPUT_MODE: str = "download"  # options: download | stream | presigned
+    S3_STREAM_UPLOAD: bool = False  # solapa con el encode solo en VIDEO_PIPELINE=fused
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
     SQS_QUEUE_NAME: str = "cola-nube"
+    UPLOAD_PROBE_DURATION: bool = True  # solo con PRIORITY_ROUTING
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600  # sin chunks nuevos
+    UPLOAD_SESSION_GC_INTERVAL_SECONDS: int = 3600
+    UPLOAD_DEDUP: bool = True
+    LEADERBOARD_RECONCILE_INTERVAL_SECONDS: int = 6 * 3600
+    PUBLIC_VIDEOS_CACHE_SECONDS: float = 5  # ademas se invalida al votar/publicar
+    VOTE_WRITE_BEHIND: str = "off"  # off | local | redis (ver app.core.vote_buffer)
+    VOTE_BUFFER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    VOTE_BUFFER_FLUSH_SIZE: int = 500
+    VOTE_BUFFER_JOURNAL_DIR: str = "/tmp/vote-buffer"
+    VOTE_BUFFER_JOURNAL_FSYNC: bool = False
+    PRIORITY_ROUTING: bool = False  # colas {SQS_QUEUE_NAME}-short|medium|long
+    ROUTING_SHORT_MAX_MB: int = 25
+    ROUTING_LONG_MIN_MB: int = 60  # por debajo de MAX_FILE_SIZE o nunca clasifica
+    ROUTING_SHORT_MAX_SECONDS: int = 60
+    ROUTING_LONG_MIN_SECONDS: int = 300
+    ROUTING_DRAIN_WEIGHTS: str = "short:6,medium:3,long:1"
+    ROUTING_IDLE_SKIP_SECONDS: float = 2.0
     SQS_VISIBILITY_TIMEOUT: int = 1500
     SQS_WAIT_TIME_SECONDS: int = 20
 settings = Settings()
\ No newline at end of file
@@ -1,18 +1,37 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.core.db_pool import instrument_pool, pool_options
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=5,
-    max_overflow=3 ,
-    pool_timeout=15,
-    pool_pre_ping=True,
-)
+# driver async por backend para derivar la URL de la API desde DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+engine = create_engine(settings.DATABASE_URL, **pool_options("sync"))
+instrument_pool(engine.pool)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# la API (rutas async) usa asyncpg; Celery y las rutas sync siguen con engine
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    **pool_options("async", is_async=True),
+)
+instrument_pool(async_engine.sync_engine.pool)
+# sin expire_on_commit: leer atributos tras commit no debe disparar IO lazy
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -20,3 +39,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
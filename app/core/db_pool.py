@@ -0,0 +1,127 @@
+"""
+Dimensionamiento y metricas de los pools de conexiones a Postgres.
+
+Cada proceso (worker de gunicorn o de Celery) abre sus propios pools, asi
+que con DB_POOL_AUTO el tamano se reparte desde un presupuesto de
+conexiones por despliegue (DB_CONNECTION_BUDGET) entre los procesos y los
+engines de cada uno. Con DB_PGBOUNCER no hay pool local: PgBouncer es el
+pool y SQLAlchemy abre/cierra por checkout (NullPool).
+"""
+
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Conexiones del pool en uso",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Espera para obtener una conexion del pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts que agotaron pool_timeout sin obtener conexion",
+    ["pool"],
+)
+
+# engines por proceso: sync (Celery y rutas sync) + async (rutas async)
+ENGINES_PER_PROCESS = 2
+
+
+def _pool_name(pool) -> str:
+    return getattr(pool, "_orig_logging_name", None) or "default"
+
+
+class _TimedPoolMixin:
+    """Mide la espera de cada checkout; el pool no expone un evento previo."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(pool=_pool_name(self)).inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.labels(pool=_pool_name(self)).observe(
+                time.perf_counter() - start
+            )
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(pool) -> None:
+    gauge = POOL_CHECKED_OUT.labels(pool=_pool_name(pool))
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        gauge.inc()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        gauge.dec()
+
+
+def deployment_processes() -> int:
+    """Procesos que comparten el presupuesto; por defecto los de prestart.sh."""
+    if settings.DB_POOL_PROCESSES > 0:
+        return settings.DB_POOL_PROCESSES
+    workers = os.getenv("WORKERS")
+    if workers and workers.isdigit():
+        return int(workers)
+    return 2 * (os.cpu_count() or 1) + 1
+
+
+def budget_pool_size(
+    budget: int, processes: int, engines: int = ENGINES_PER_PROCESS
+) -> tuple[int, int]:
+    """(pool_size, max_overflow) por pool: 3/4 fijas y 1/4 de overflow."""
+    per_pool = max(1, budget // max(1, processes * engines))
+    max_overflow = per_pool // 4
+    return per_pool - max_overflow, max_overflow
+
+
+def pool_options(name: str, is_async: bool = False) -> dict:
+    """Argumentos de create_engine/create_async_engine segun Settings."""
+    if settings.DB_PGBOUNCER:
+        options = {"poolclass": NullPool, "pool_logging_name": name}
+        if is_async:
+            # PgBouncer en modo transaccion no conserva prepared statements
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        return options
+
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_POOL_AUTO:
+        pool_size, max_overflow = budget_pool_size(
+            settings.DB_CONNECTION_BUDGET, deployment_processes()
+        )
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "pool_logging_name": name,
+    }
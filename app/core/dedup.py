@@ -0,0 +1,146 @@
+"""
+Deduplicacion de uploads por hash de contenido.
+
+La API calcula el sha256 del original mientras lo escribe. Si ya existe un
+video procesado con el mismo hash y la misma version de pipeline, el nuevo
+video reutiliza esa salida (copy_object en S3, hardlink en disco) y no se
+encola ninguna tarea.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from botocore.exceptions import BotoCoreError, ClientError
+from prometheus_client import Counter
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.storage import get_s3_client, is_s3_uri, parse_s3_uri
+from app.core.utils.video_utils import DEFAULT_PROFILE, EncodeProfile
+from app.models import Video, VideoStatus
+
+UTC = timezone.utc
+logger = logging.getLogger(__name__)
+
+# subir cuando cambie la salida del pipeline sin cambiar perfil ni assets
+PIPELINE_REVISION = 1
+
+DEDUP_LOOKUPS = Counter(
+    "upload_dedup_lookups_total",
+    "Busquedas de salida procesada reutilizable por hash (hit | miss)",
+    ["result"],
+)
+
+_digests: dict[tuple, str] = {}
+
+
+def _file_digest(path: str | Path) -> str:
+    st = os.stat(path)
+    memo_key = (str(path), st.st_mtime_ns, st.st_size)
+    if memo_key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        _digests[memo_key] = h.hexdigest()
+    return _digests[memo_key]
+
+
+def pipeline_version(
+    watermark_path: str | Path,
+    image_path: str | Path,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+) -> str:
+    """
+    Huella de todo lo que define la salida: pipeline, perfil y assets. Con
+    ENCODING_ADAPTIVE cada salida lleva la huella del perfil con que se
+    codifico; las busquedas usan DEFAULT_PROFILE, asi que solo se reutilizan
+    salidas de la calidad por defecto.
+    """
+    payload = json.dumps(
+        {
+            "revision": PIPELINE_REVISION,
+            "pipeline": settings.VIDEO_PIPELINE,
+            "profile": profile.cache_fields(),
+            "watermark": _file_digest(watermark_path),
+            "image": _file_digest(image_path),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def find_processed_duplicate(
+    db: Session, content_hash: str, version: str, exclude_id: int | None = None
+) -> Video | None:
+    query = db.query(Video).filter(
+        Video.content_hash == content_hash,
+        Video.pipeline_version == version,
+        Video.status == VideoStatus.done.value,
+        Video.processed_path.isnot(None),
+    )
+    if exclude_id is not None:
+        query = query.filter(Video.id != exclude_id)
+    return query.order_by(Video.id.desc()).first()
+
+
+def copy_processed_output(processed_path: str, video_db_id: int) -> str:
+    """
+    Copia la salida procesada para otro video: server-side copy en S3 o
+    hardlink en disco (copia normal si el hardlink no es posible).
+    """
+    name = f"{video_db_id}_processed.mp4"
+    if is_s3_uri(processed_path):
+        bucket, key = parse_s3_uri(processed_path)
+        dest_key = f"{settings.S3_PROCESSED_PREFIX}/{name}"
+        get_s3_client().copy_object(
+            Bucket=bucket,
+            Key=dest_key,
+            CopySource={"Bucket": bucket, "Key": key},
+        )
+        return f"s3://{bucket}/{dest_key}"
+
+    dest = Path(settings.PROCESSED_PATH) / name
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(processed_path, dest)
+    except OSError:
+        shutil.copyfile(processed_path, dest)
+    return str(dest)
+
+
+def reuse_processed_output(db: Session, video: Video, version: str | None) -> bool:
+    """
+    Marca el video como procesado reutilizando la salida de un duplicado.
+    Retorna False (y el video sigue el flujo normal) si no hay duplicado o
+    si la copia falla.
+    """
+    if not settings.UPLOAD_DEDUP or not video.content_hash or not version:
+        return False
+    source = find_processed_duplicate(db, video.content_hash, version, video.id)
+    if source is None:
+        DEDUP_LOOKUPS.labels(result="miss").inc()
+        return False
+    try:
+        processed_path = copy_processed_output(source.processed_path, video.id)
+    except (OSError, BotoCoreError, ClientError) as exc:
+        logger.warning(
+            "No se pudo reutilizar la salida de %s: %s", source.video_id, exc
+        )
+        DEDUP_LOOKUPS.labels(result="miss").inc()
+        return False
+
+    video.processed_path = processed_path
+    video.pipeline_version = version
+    video.processing_info = {"dedup_of": source.video_id}
+    video.status = VideoStatus.done.value
+    video.updated_at = datetime.now(UTC)
+    db.commit()
+    DEDUP_LOOKUPS.labels(result="hit").inc()
+    return True
@@ -0,0 +1,201 @@
+"""
+Perfil de codificacion segun el backlog de la cola.
+
+Antes de codificar, el worker lee la profundidad de la cola (SQS
+ApproximateNumberOfMessages o un contador local) y elige preset/CRF de
+libx264 entre dos extremos configurables: con la cola ociosa usa el preset
+lento (mejor compresion) y con la cola profunda el rapido, subiendo el CRF
+para compensar el mayor tamano de los presets rapidos. El perfil elegido se
+guarda en processing_info["encoding"] del video.
+"""
+
+import logging
+import time
+from dataclasses import replace
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.utils.video_utils import DEFAULT_PROFILE, EncodeProfile
+
+logger = logging.getLogger(__name__)
+
+# de mas rapido a mas lento (mejor compresion a igual CRF)
+PRESETS = (
+    "ultrafast",
+    "superfast",
+    "veryfast",
+    "faster",
+    "fast",
+    "medium",
+    "slow",
+    "slower",
+    "veryslow",
+)
+
+ENCODING_BACKLOG = Gauge(
+    "worker_encoding_backlog",
+    "Profundidad de cola vista al elegir el perfil de codificacion",
+    multiprocess_mode="max",
+)
+ENCODING_PROFILES = Counter(
+    "worker_encoding_profiles_total",
+    "Trabajos codificados por preset elegido",
+    ["preset"],
+)
+
+
+class SqsBacklog:
+    """Mensajes visibles en la cola de tareas (y en las de clase si hay routing)."""
+
+    def __init__(self, queue_names: list[str], region: str | None = None):
+        self.queue_names = queue_names
+        self.region = region or "us-east-1"
+        self._client = None
+        self._urls: dict[str, str] = {}
+
+    def _url(self, name: str) -> str:
+        if name not in self._urls:
+            self._urls[name] = self._client.get_queue_url(QueueName=name)["QueueUrl"]
+        return self._urls[name]
+
+    def __call__(self) -> int:
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("sqs", region_name=self.region)
+        depth = 0
+        for name in self.queue_names:
+            try:
+                attrs = self._client.get_queue_attributes(
+                    QueueUrl=self._url(name),
+                    AttributeNames=["ApproximateNumberOfMessages"],
+                )["Attributes"]
+            except self._client.exceptions.QueueDoesNotExist:
+                continue
+            depth += int(attrs.get("ApproximateNumberOfMessages", 0))
+        return depth
+
+
+class DBBacklog:
+    """Contador local: videos subidos que aun no empezaron a procesarse."""
+
+    def __call__(self) -> int:
+        from app.core.database import SessionLocal
+        from app.models import Video, VideoStatus
+
+        db = SessionLocal()
+        try:
+            return (
+                db.query(Video)
+                .filter(Video.status == VideoStatus.uploaded.value)
+                .count()
+            )
+        finally:
+            db.close()
+
+
+class ProfileSelector:
+    """
+    Interpola preset y CRF entre idle_depth (perfil idle) y busy_depth
+    (perfil busy). La profundidad se cachea cache_seconds para no consultar
+    la cola en cada tarea; si la lectura falla se usa la ultima conocida.
+    """
+
+    def __init__(
+        self,
+        backlog=None,
+        *,
+        base: EncodeProfile = DEFAULT_PROFILE,
+        idle_preset: str = "medium",
+        busy_preset: str = "superfast",
+        idle_crf: int = 23,
+        busy_crf: int = 26,
+        idle_depth: int = 0,
+        busy_depth: int = 20,
+        cache_seconds: float = 5.0,
+        clock=time.monotonic,
+    ):
+        self.backlog = backlog
+        self.base = base
+        self.idle_index = PRESETS.index(idle_preset)
+        self.busy_index = PRESETS.index(busy_preset)
+        self.idle_crf = idle_crf
+        self.busy_crf = busy_crf
+        self.idle_depth = idle_depth
+        self.busy_depth = max(busy_depth, idle_depth + 1)
+        self.cache_seconds = cache_seconds
+        self.clock = clock
+        self._depth: int | None = None
+        self._read_at = float("-inf")
+
+    def depth(self) -> int | None:
+        if self.backlog is None:
+            return None
+        now = self.clock()
+        if now - self._read_at >= self.cache_seconds:
+            try:
+                self._depth = int(self.backlog())
+            except Exception as exc:
+                logger.warning("No se pudo leer el backlog de la cola: %s", exc)
+            self._read_at = now
+        return self._depth
+
+    def profile_for(self, depth: int | None) -> EncodeProfile:
+        if depth is None:
+            return self.base
+        pressure = (depth - self.idle_depth) / (self.busy_depth - self.idle_depth)
+        pressure = min(1.0, max(0.0, pressure))
+        index = round(self.idle_index + pressure * (self.busy_index - self.idle_index))
+        crf = round(self.idle_crf + pressure * (self.busy_crf - self.idle_crf))
+        return replace(self.base, preset=PRESETS[index], crf=crf)
+
+    def select(self) -> tuple[EncodeProfile, dict]:
+        """(perfil, resumen para processing_info)"""
+        depth = self.depth()
+        profile = self.profile_for(depth)
+        if depth is not None:
+            ENCODING_BACKLOG.set(depth)
+        ENCODING_PROFILES.labels(preset=profile.preset).inc()
+        return profile, {"preset": profile.preset, "crf": profile.crf, "backlog": depth}
+
+
+def profile_from_info(
+    info: dict, base: EncodeProfile = DEFAULT_PROFILE
+) -> EncodeProfile:
+    """Reconstruye el perfil a partir del resumen de select()."""
+    return replace(base, preset=info["preset"], crf=info["crf"])
+
+
+def _backlog_source():
+    source = settings.ENCODING_BACKLOG_SOURCE
+    if source == "sqs":
+        from app.core.routing import JOB_CLASSES, queue_for_class
+
+        names = [settings.SQS_QUEUE_NAME]
+        if settings.PRIORITY_ROUTING:
+            names += [queue_for_class(c) for c in JOB_CLASSES]
+        return SqsBacklog(names, settings.AWS_REGION)
+    if source == "db":
+        return DBBacklog()
+    return None
+
+
+_selector: ProfileSelector | None = None
+
+
+def get_profile_selector() -> ProfileSelector:
+    """Selector segun ENCODING_ADAPTIVE; sin el, siempre DEFAULT_PROFILE."""
+    global _selector
+    if _selector is None:
+        _selector = ProfileSelector(
+            _backlog_source() if settings.ENCODING_ADAPTIVE else None,
+            idle_preset=settings.ENCODING_IDLE_PRESET,
+            busy_preset=settings.ENCODING_BUSY_PRESET,
+            idle_crf=settings.ENCODING_IDLE_CRF,
+            busy_crf=settings.ENCODING_BUSY_CRF,
+            idle_depth=settings.ENCODING_IDLE_BACKLOG,
+            busy_depth=settings.ENCODING_BUSY_BACKLOG,
+            cache_seconds=settings.ENCODING_BACKLOG_CACHE_SECONDS,
+        )
+    return _selector
@@ -0,0 +1,255 @@
+"""
+Contadores de votos y ranking de usuarios mantenidos incrementalmente.
+
+videos.votes_count cuenta los votos de cada video y user_vote_totals
+guarda, por usuario con algun video publico, el total de votos de esos
+videos y su ciudad. Los eventos del ORM los mantienen en la misma
+transaccion que el cambio: cada Vote insertado suma 1 al video y al
+dueno del video, publicar un video crea la fila (en 0) y un cambio de ciudad se
+copia. Despublicar videos o borrar votos no descuenta: eso lo corrige
+rebuild_vote_totals, que corre periodicamente (reconcile-leaderboard).
+
+cast_vote registra un voto y suma ambos contadores en una sola sentencia
+(sin pasar por el ORM), apoyada en uq_votes_user_video para que dos votos
+concurrentes del mismo usuario no se cuenten dos veces.
+
+Las paginas se leen con keyset sobre (votes DESC, user_id ASC); el cursor
+lleva tambien la posicion del ultimo item para no tener que contarla.
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    and_,
+    delete,
+    event,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import User, UserVoteTotal, Video, VideoStatus, Vote
+
+totals = UserVoteTotal.__table__
+
+
+def bump_owner_total(connection, video_db_id: int, amount: int = 1) -> None:
+    """Suma `amount` votos al dueno del video si el video es publico."""
+    stmt = pg_insert(totals).from_select(
+        ["user_id", "city", "votes"],
+        select(Video.user_id, User.city, literal(amount))
+        .join(User, User.id == Video.user_id)
+        .where(Video.id == video_db_id, Video.is_public),
+    )
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[totals.c.user_id],
+            set_={"votes": totals.c.votes + stmt.excluded.votes},
+        )
+    )
+
+
+def ensure_owner_row(connection, video: Video) -> None:
+    stmt = pg_insert(totals).from_select(
+        ["user_id", "city", "votes"],
+        select(User.id, User.city, literal(0)).where(User.id == video.user_id),
+    )
+    connection.execute(stmt.on_conflict_do_nothing(index_elements=[totals.c.user_id]))
+
+
+def bump_video_count(connection, video_db_id: int, amount: int = 1) -> None:
+    connection.execute(
+        update(Video.__table__)
+        .where(Video.__table__.c.id == video_db_id)
+        .values(votes_count=Video.__table__.c.votes_count + amount)
+    )
+
+
+def cast_vote(db: Session, user_id: int, video_id: str) -> bool | None:
+    """
+    Inserta el voto de `user_id` por el video publico `video_id` (el id
+    publico, no el de la base) y suma 1 a videos.votes_count y al total del
+    dueno, todo en un round-trip. None si el video no existe o no es
+    votable, False si el usuario ya habia votado, True si se conto. El
+    llamador hace commit.
+    """
+    videos = Video.__table__
+    votes = Vote.__table__
+    target = (
+        select(videos.c.id)
+        .where(
+            videos.c.video_id == video_id,
+            videos.c.is_public.is_(True),
+            videos.c.status == VideoStatus.done.value,
+        )
+        .cte("target")
+    )
+    inserted = (
+        pg_insert(votes)
+        .from_select(
+            ["user_id", "video_id", "created_at"],
+            select(literal(user_id), target.c.id, func.now()),
+        )
+        .on_conflict_do_nothing(index_elements=[votes.c.user_id, votes.c.video_id])
+        .returning(votes.c.video_id)
+        .cte("inserted")
+    )
+    counted = (
+        update(videos)
+        .where(videos.c.id.in_(select(inserted.c.video_id)))
+        .values(votes_count=videos.c.votes_count + 1)
+        .returning(videos.c.user_id)
+        .cte("counted")
+    )
+    owner = pg_insert(totals).from_select(
+        ["user_id", "city", "votes"],
+        select(User.id, User.city, literal(1)).join(
+            counted, counted.c.user_id == User.id
+        ),
+    )
+    owner = (
+        owner.on_conflict_do_update(
+            index_elements=[totals.c.user_id],
+            set_={"votes": totals.c.votes + owner.excluded.votes},
+        )
+        .returning(totals.c.user_id)
+        .cte("owner")
+    )
+    video_db_id, added, _ = db.execute(
+        select(
+            select(target.c.id).scalar_subquery(),
+            select(func.count()).select_from(inserted).scalar_subquery(),
+            select(func.count()).select_from(owner).scalar_subquery(),
+        )
+    ).one()
+    if video_db_id is None:
+        return None
+    return bool(added)
+
+
+@event.listens_for(Vote, "after_insert")
+def _count_vote(mapper, connection, target):
+    bump_video_count(connection, target.video_id)
+    bump_owner_total(connection, target.video_id)
+
+
+@event.listens_for(Video, "after_insert")
+@event.listens_for(Video, "after_update")
+def _track_published(mapper, connection, target):
+    if target.is_public and inspect(target).attrs.is_public.history.has_changes():
+        ensure_owner_row(connection, target)
+
+
+@event.listens_for(User, "after_update")
+def _track_city(mapper, connection, target):
+    if inspect(target).attrs.city.history.has_changes():
+        connection.execute(
+            update(totals)
+            .where(totals.c.user_id == target.id)
+            .values(city=target.city)
+        )
+
+
+def rebuild_vote_totals(db: Session) -> int:
+    """
+    Reconstruye videos.votes_count y user_vote_totals desde votes; el
+    llamador hace commit. Hasta
+    entonces bloquea las escrituras del ranking (las lecturas siguen viendo
+    la version previa).
+    """
+    db.execute(text("LOCK TABLE user_vote_totals IN EXCLUSIVE MODE"))
+    per_video = (
+        select(func.count(Vote.id))
+        .where(Vote.video_id == Video.id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Video.__table__)
+        .where(Video.__table__.c.votes_count != per_video)
+        .values(votes_count=per_video)
+    )
+    db.execute(delete(totals))
+    recount = (
+        select(User.id, User.city, func.count(Vote.id))
+        .join(Video, and_(Video.user_id == User.id, Video.is_public))
+        .outerjoin(Vote, Vote.video_id == Video.id)
+        .group_by(User.id, User.city)
+    )
+    result = db.execute(
+        pg_insert(totals).from_select(["user_id", "city", "votes"], recount)
+    )
+    return result.rowcount
+
+
+@dataclass(frozen=True)
+class RankingCursor:
+    votes: int
+    user_id: int
+    position: int
+
+    def encode(self) -> str:
+        return f"{self.votes}.{self.user_id}.{self.position}"
+
+    @classmethod
+    def decode(cls, raw: str) -> "RankingCursor":
+        """ValueError si el cursor no tiene el formato de encode()."""
+        votes, user_id, position = (int(part) for part in raw.split("."))
+        if votes < 0 or position < 0:
+            raise ValueError(raw)
+        return cls(votes, user_id, position)
+
+
+def ranking_page(
+    db: Session,
+    page_size: int,
+    city: str | None = None,
+    cursor: RankingCursor | None = None,
+    offset: int = 0,
+) -> tuple[list[tuple], RankingCursor | None]:
+    """
+    Filas (position, user_id, first_name, last_name, city, votes) y el
+    cursor de la pagina siguiente (None si no hay mas).
+    """
+    query = (
+        select(
+            totals.c.user_id,
+            User.first_name,
+            User.last_name,
+            totals.c.city,
+            totals.c.votes,
+        )
+        .join(User, User.id == totals.c.user_id)
+        .order_by(totals.c.votes.desc(), totals.c.user_id.asc())
+        .limit(page_size)
+    )
+    if city:
+        query = query.where(totals.c.city == city)
+    start = offset
+    if cursor is not None:
+        start = cursor.position
+        query = query.where(
+            or_(
+                totals.c.votes < cursor.votes,
+                and_(
+                    totals.c.votes == cursor.votes,
+                    totals.c.user_id > cursor.user_id,
+                ),
+            )
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    rows = [
+        (start + idx + 1, *row) for idx, row in enumerate(db.execute(query).all())
+    ]
+    next_cursor = None
+    if len(rows) == page_size:
+        position, user_id, _, _, _, votes = rows[-1]
+        next_cursor = RankingCursor(int(votes), user_id, position)
+    return rows, next_cursor
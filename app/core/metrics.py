@@ -0,0 +1,99 @@
+"""
+Metricas Prometheus del worker de Celery.
+
+Con PROMETHEUS_MULTIPROC_DIR definido (antes de importar prometheus_client)
+cada proceso hijo del prefork escribe sus valores en ese directorio y el
+servidor HTTP del proceso principal los agrega con MultiProcessCollector.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+STAGE_SECONDS = Histogram(
+    "worker_stage_duration_seconds",
+    "Duracion de cada etapa del procesamiento de un video",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+BYTES_TOTAL = Counter(
+    "worker_bytes_total",
+    "Bytes leidos del original (in) y escritos como procesado (out)",
+    ["direction"],
+)
+FFMPEG_SPEED = Histogram(
+    "worker_ffmpeg_speed_ratio",
+    "Velocidad reportada por ffmpeg (speed=, tiempo de media / tiempo real)",
+    ["stage"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+TASKS_TOTAL = Counter(
+    "worker_tasks_total",
+    "Tareas de procesamiento por resultado y clase de fallo",
+    ["outcome", "failure_class"],
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "worker_queue_wait_seconds",
+    "Tiempo entre el encolado de la tarea y el inicio de su ejecucion",
+    buckets=(0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+@contextmanager
+def track_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def classify_failure(exc: BaseException) -> str:
+    import subprocess
+
+    from botocore.exceptions import BotoCoreError, ClientError
+    from celery.exceptions import SoftTimeLimitExceeded
+    from sqlalchemy.exc import SQLAlchemyError
+
+    if isinstance(exc, subprocess.CalledProcessError):
+        return "ffmpeg"
+    if isinstance(exc, (BotoCoreError, ClientError)):
+        return "storage"
+    if isinstance(exc, SQLAlchemyError):
+        return "database"
+    if isinstance(exc, SoftTimeLimitExceeded):
+        return "timeout"
+    if isinstance(exc, (ValueError, FileNotFoundError)):
+        return "input"
+    return "other"
+
+
+def start_worker_metrics_server(port: int) -> None:
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        path = Path(multiproc_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        # valores de una ejecucion anterior del worker
+        for stale in path.glob("*.db"):
+            stale.unlink(missing_ok=True)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+
+
+def mark_process_dead(pid: int) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,244 @@
+"""
+Principal autenticado en cache para no consultar users en cada request.
+
+get_current_user resuelve el usuario del JWT en este orden: claims del
+token (solo con AUTH_TRUST_TOKEN_CLAIMS), LRU con TTL del proceso, Redis
+compartido (AUTH_CACHE_REDIS) y por ultimo la base de datos. Cualquier
+UPDATE/DELETE de un User hecho con el ORM invalida su entrada al hacer
+commit; el LRU de otros procesos queda obsoleto a lo sumo
+AUTH_CACHE_TTL_SECONDS.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from prometheus_client import Counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import User
+
+PRINCIPAL_LOOKUPS = Counter(
+    "auth_principal_lookups_total",
+    "Resolucion del usuario autenticado por origen (token | local | redis | db)",
+    ["source"],
+)
+
+# claim con el principal embebido en el token (modo AUTH_TRUST_TOKEN_CLAIMS)
+PRINCIPAL_CLAIM = "usr"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lo que las rutas necesitan del usuario autenticado."""
+
+    id: int
+    email: str
+    first_name: str | None
+    last_name: str
+    city: str
+    country: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            city=user.city,
+            country=user.country,
+            is_active=user.is_active is not False,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Principal":
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class PrincipalCache:
+    """LRU acotado con TTL por entrada, seguro entre hilos."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        with self._lock:
+            self._entries[principal.id] = (
+                time.monotonic() + self.ttl_seconds,
+                principal,
+            )
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisPrincipalStore:
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"auth:principal:{user_id}"
+
+    def get(self, user_id: int) -> Principal | None:
+        raw = self.client.get(self._key(user_id))
+        return Principal.from_dict(json.loads(raw)) if raw else None
+
+    def put(self, principal: Principal) -> None:
+        self.client.set(
+            self._key(principal.id),
+            json.dumps(principal.to_dict()),
+            ex=self.ttl_seconds,
+        )
+
+    def invalidate(self, user_id: int) -> None:
+        self.client.delete(self._key(user_id))
+
+
+_local_cache: PrincipalCache | None = None
+_redis_store = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = PrincipalCache(
+            settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS
+        )
+    return _local_cache
+
+
+def get_redis_store() -> RedisPrincipalStore | None:
+    global _redis_store
+    if _redis_store is None:
+        if settings.AUTH_CACHE_REDIS and settings.REDIS_URL:
+            _redis_store = RedisPrincipalStore(
+                settings.REDIS_URL, settings.AUTH_CACHE_REDIS_TTL_SECONDS
+            )
+        else:
+            _redis_store = False
+    return _redis_store or None
+
+
+def cached_principal(user_id: int) -> Principal | None:
+    """Principal en cache (local y luego Redis) o None si hay que ir a la DB."""
+    if not settings.AUTH_CACHE_ENABLED:
+        return None
+    local = get_principal_cache()
+    principal = local.get(user_id)
+    if principal is not None:
+        PRINCIPAL_LOOKUPS.labels(source="local").inc()
+        return principal
+    store = get_redis_store()
+    if store is not None:
+        try:
+            principal = store.get(user_id)
+        except Exception:
+            # Redis caido: se degrada a la DB
+            principal = None
+        if principal is not None:
+            PRINCIPAL_LOOKUPS.labels(source="redis").inc()
+            local.put(principal)
+            return principal
+    return None
+
+
+def remember_principal(principal: Principal) -> None:
+    PRINCIPAL_LOOKUPS.labels(source="db").inc()
+    if not settings.AUTH_CACHE_ENABLED:
+        return
+    get_principal_cache().put(principal)
+    store = get_redis_store()
+    if store is not None:
+        try:
+            store.put(principal)
+        except Exception:
+            pass
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Descarta el principal cacheado (p. ej. al desactivar o editar el usuario)."""
+    get_principal_cache().invalidate(user_id)
+    store = get_redis_store()
+    if store is not None:
+        try:
+            store.invalidate(user_id)
+        except Exception:
+            pass
+
+
+def principal_claims(user: User) -> dict:
+    """Claims extra para create_access_token con AUTH_TRUST_TOKEN_CLAIMS."""
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return {}
+    return {PRINCIPAL_CLAIM: Principal.from_user(user).to_dict()}
+
+
+def principal_from_claims(payload: dict) -> Principal | None:
+    """
+    Principal embebido en el token; solo se confia en el con
+    AUTH_TRUST_TOKEN_CLAIMS (una desactivacion aplica al expirar el token).
+    """
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return None
+    claims = payload.get(PRINCIPAL_CLAIM)
+    if not isinstance(claims, dict):
+        return None
+    try:
+        principal = Principal.from_dict(claims)
+    except (KeyError, TypeError):
+        return None
+    if str(principal.id) != str(payload.get("sub")):
+        return None
+    PRINCIPAL_LOOKUPS.labels(source="token").inc()
+    return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_principal(user_id)
+
@@ -0,0 +1,199 @@
+"""
+Progreso en vivo del procesamiento de un video.
+
+run_ffmpeg lanza ffmpeg con -progress y entrega cada bloque al
+ProgressReporter activo (contextvar), que calcula porcentaje/ETA y lo
+publica con un ritmo acotado en Redis o en la columna videos.progress.
+"""
+
+import json
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from app.core.config import settings
+
+UTC = timezone.utc
+
+# etapas cuya salida es el cuerpo del video: su out_time mide el avance
+BODY_STAGES = ("fused", "encode_body", "encode_chunk")
+
+current_reporter: ContextVar["ProgressReporter | None"] = ContextVar(
+    "current_reporter", default=None
+)
+
+
+def parse_progress_block(lines: list[str]) -> dict:
+    """
+    Convierte un bloque key=value de ffmpeg -progress en
+    {"out_seconds", "speed", "done"}. Los valores N/A se omiten.
+    """
+    data = dict(line.split("=", 1) for line in lines if "=" in line)
+    block: dict = {"done": data.get("progress") == "end"}
+    out_us = data.get("out_time_us") or data.get("out_time_ms")
+    if out_us and out_us.lstrip("-").isdigit():
+        block["out_seconds"] = max(0, int(out_us)) / 1_000_000
+    speed = (data.get("speed") or "").strip().rstrip("x")
+    try:
+        block["speed"] = float(speed)
+    except ValueError:
+        pass
+    return block
+
+
+class RedisProgressStore:
+    def __init__(self, url: str, ttl_seconds: int = 3600):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(video_db_id: int) -> str:
+        return f"video:progress:{video_db_id}"
+
+    def publish(self, video_db_id: int, payload: dict) -> None:
+        self.client.set(
+            self._key(video_db_id), json.dumps(payload), ex=self.ttl_seconds
+        )
+
+    def read(self, video_db_id: int) -> dict | None:
+        raw = self.client.get(self._key(video_db_id))
+        return json.loads(raw) if raw else None
+
+
+class DBProgressStore:
+    """Escribe en videos.progress con una sesion propia y corta."""
+
+    def publish(self, video_db_id: int, payload: dict) -> None:
+        from app.core.database import SessionLocal
+        from app.models import Video
+
+        db = SessionLocal()
+        try:
+            db.query(Video).filter(Video.id == video_db_id).update(
+                {"progress": payload}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def read(self, video_db_id: int) -> dict | None:
+        return None
+
+
+_store = None
+
+
+def get_progress_store():
+    """
+    Store segun PROGRESS_BACKEND (redis | db | none); redis sin REDIS_URL
+    cae a db. None si no aplica.
+    """
+    global _store
+    if _store is None:
+        backend = settings.PROGRESS_BACKEND
+        if backend == "redis" and settings.REDIS_URL:
+            _store = RedisProgressStore(
+                settings.REDIS_URL, ttl_seconds=settings.PROGRESS_TTL_SECONDS
+            )
+        elif backend in ("redis", "db"):
+            _store = DBProgressStore()
+        else:
+            _store = False
+    return _store or None
+
+
+def read_progress(video) -> dict | None:
+    """Progreso publicado para un Video (modelo ORM)."""
+    store = get_progress_store()
+    if isinstance(store, RedisProgressStore):
+        try:
+            return store.read(video.id)
+        except Exception:
+            return None
+    return getattr(video, "progress", None)
+
+
+class ProgressReporter:
+    """
+    Acumula el avance de las etapas de ffmpeg de un trabajo.
+
+    total_seconds es la duracion esperada del cuerpo de salida. El porcentaje
+    suma el out_time de cada proceso de BODY_STAGES (los fragmentos en
+    paralelo se suman entre si) y el ETA extrapola la tasa observada desde
+    el primer bloque. Las publicaciones se limitan a una cada interval
+    segundos, salvo cambios de etapa y el cierre.
+    """
+
+    def __init__(
+        self,
+        video_db_id: int,
+        total_seconds: float,
+        store=None,
+        interval: float = 1.0,
+        clock=time.monotonic,
+    ):
+        self.video_db_id = video_db_id
+        self.total_seconds = max(float(total_seconds), 0.001)
+        self.store = store
+        self.interval = interval
+        self.clock = clock
+        self.stage: str | None = None
+        self.published: dict | None = None
+        self._done_by_call: dict[int, float] = {}
+        self._started_at: float | None = None
+        self._last_publish = float("-inf")
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        done = min(sum(self._done_by_call.values()), self.total_seconds)
+        percent = round(min(99.0, 100 * done / self.total_seconds), 1)
+        eta = None
+        if done > 0 and self._started_at is not None:
+            elapsed = self.clock() - self._started_at
+            eta = round(elapsed * (self.total_seconds - done) / done, 1)
+        return {
+            "stage": self.stage,
+            "percent": percent,
+            "eta_seconds": eta,
+            "updated_at": datetime.now(UTC).isoformat(),
+        }
+
+    def update(self, stage: str, call_id: int, block: dict) -> None:
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = self.clock()
+            stage_changed = stage != self.stage
+            self.stage = stage
+            if stage in BODY_STAGES and "out_seconds" in block:
+                self._done_by_call[call_id] = block["out_seconds"]
+            now = self.clock()
+            if not stage_changed and now - self._last_publish < self.interval:
+                return
+            self._last_publish = now
+            payload = self.snapshot()
+            if "speed" in block:
+                payload["speed"] = block["speed"]
+        self._publish(payload)
+
+    def finish(self, status: str) -> None:
+        self._publish(
+            {
+                "stage": status,
+                "percent": 100.0 if status == "done" else self.snapshot()["percent"],
+                "eta_seconds": 0 if status == "done" else None,
+                "updated_at": datetime.now(UTC).isoformat(),
+            }
+        )
+
+    def _publish(self, payload: dict) -> None:
+        self.published = payload
+        if self.store is None:
+            return
+        try:
+            self.store.publish(self.video_db_id, payload)
+        except Exception:
+            # el progreso es informativo: nunca debe tumbar el procesamiento
+            pass
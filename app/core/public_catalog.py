@@ -0,0 +1,197 @@
+"""
+Listado paginado y cacheado de /api/public/videos.
+
+Las paginas se leen con keyset sobre (updated_at DESC, id DESC) usando el
+indice parcial ix_videos_public_listing, y los votos salen de
+videos.votes_count (ver app.core.leaderboard), sin agregar votes.
+
+Cada pagina serializada se guarda PUBLIC_VIDEOS_CACHE_SECONDS en el
+proceso, junto con su ETag, bajo la version actual del catalogo. Publicar
+un video o registrar un voto sube la version al hacer commit (en Redis si
+hay REDIS_URL, para que todos los procesos la vean), asi que las entradas
+anteriores dejan de usarse sin borrarlas una por una.
+"""
+
+import base64
+import hashlib
+import itertools
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, event, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Video, VideoStatus, Vote
+
+VERSION_KEY = "public:videos:version"
+
+
+def encode_cursor(updated_at: datetime, video_db_id: int) -> str:
+    raw = f"{updated_at.isoformat()}|{video_db_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """ValueError si el cursor no viene de encode_cursor."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    updated_at, video_db_id = base64.urlsafe_b64decode(padded).decode().split("|")
+    return datetime.fromisoformat(updated_at), int(video_db_id)
+
+
+def public_videos_page(
+    db: Session, limit: int, cursor: tuple[datetime, int] | None = None
+) -> tuple[list[Video], str | None]:
+    query = (
+        select(Video)
+        .where(Video.is_public.is_(True), Video.status == VideoStatus.done.value)
+        .order_by(Video.updated_at.desc(), Video.id.desc())
+        .limit(limit)
+    )
+    if cursor is not None:
+        updated_at, video_db_id = cursor
+        query = query.where(
+            or_(
+                Video.updated_at < updated_at,
+                and_(Video.updated_at == updated_at, Video.id < video_db_id),
+            )
+        )
+    videos = list(db.scalars(query))
+    next_cursor = None
+    if len(videos) == limit and videos[-1].updated_at is not None:
+        next_cursor = encode_cursor(videos[-1].updated_at, videos[-1].id)
+    return videos, next_cursor
+
+
+def make_etag(key: tuple, body: bytes) -> str:
+    """
+    ETag debil de la pagina: la clave de cache (version del catalogo,
+    cursor, limit...) mas el contenido, asi que subir la version siempre lo
+    cambia aunque el cuerpo salga igual.
+    """
+    digest = hashlib.sha256(repr(key).encode())
+    digest.update(body)
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparacion debil (RFC 9110) contra una lista If-None-Match o *."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class CatalogVersion:
+    """Version del catalogo: contador en Redis o local al proceso."""
+
+    def __init__(self, redis_url: str | None = None):
+        self._local = itertools.count(1)
+        self._value = 0
+        self.client = None
+        if redis_url:
+            import redis
+
+            self.client = redis.Redis.from_url(redis_url)
+
+    def current(self) -> str:
+        if self.client is not None:
+            try:
+                return (self.client.get(VERSION_KEY) or b"0").decode()
+            except Exception:
+                pass
+        return f"local-{self._value}"
+
+    def bump(self) -> None:
+        self._value = next(self._local)
+        if self.client is not None:
+            try:
+                self.client.incr(VERSION_KEY)
+            except Exception:
+                pass
+
+
+class PageCache:
+    """TTL cache de paginas serializadas: key -> (expira, (body, etag, cursor))."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[tuple, tuple[float, tuple]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[0]:
+                self._entries.pop(key, None)
+                return None
+            return entry[1]
+
+    def put(self, key: tuple, page: tuple) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                for stale in [k for k, e in self._entries.items() if e[0] <= now]:
+                    del self._entries[stale]
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, page)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_version: CatalogVersion | None = None
+_page_cache: PageCache | None = None
+
+
+def get_catalog_version() -> CatalogVersion:
+    global _version
+    if _version is None:
+        _version = CatalogVersion(settings.REDIS_URL)
+    return _version
+
+
+def get_page_cache() -> PageCache:
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = PageCache(settings.PUBLIC_VIDEOS_CACHE_SECONDS)
+    return _page_cache
+
+
+@event.listens_for(Vote, "after_insert")
+def _vote_changed_catalog(mapper, connection, target):
+    _mark_catalog_changed(target)
+
+
+@event.listens_for(Video, "after_insert")
+@event.listens_for(Video, "after_update")
+@event.listens_for(Video, "after_delete")
+def _video_changed_catalog(mapper, connection, target):
+    if target.is_public or inspect(target).attrs.is_public.history.has_changes():
+        _mark_catalog_changed(target)
+
+
+def _mark_catalog_changed(target) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        mark_catalog_changed(session)
+
+
+def mark_catalog_changed(session: Session) -> None:
+    """Para escrituras que no pasan por el ORM (p. ej. cast_vote)."""
+    session.info["public_catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog_version(session):
+    if session.info.pop("public_catalog_changed", False):
+        get_catalog_version().bump()
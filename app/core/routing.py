@@ -0,0 +1,161 @@
+"""
+Enrutamiento de tareas de procesamiento por tamano/duracion del original.
+
+El productor clasifica cada video en short | medium | long y lo encola en
+{SQS_QUEUE_NAME}-{clase}. El worker consume esas colas con un turno
+ponderado (smooth weighted round-robin, p. ej. short:6,medium:3,long:1):
+en cada turno solo consume la cola de la clase elegida hasta recibir una
+tarea, y si esa cola esta vacia mientras hay procesos libres pasa a la
+siguiente clase sin esperar.
+"""
+
+import logging
+import threading
+import time
+
+from celery import bootsteps
+from celery.signals import task_received
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_CLASSES = ("short", "medium", "long")
+MB = 1024 * 1024
+
+ROUTED_TASKS = Counter(
+    "worker_routed_tasks_total",
+    "Tareas recibidas por clase de tamano/duracion",
+    ["job_class"],
+)
+
+
+def classify_job(size_bytes: int | None, duration_seconds: float | None) -> str:
+    """Clase del trabajo: la mayor entre la clase por tamano y por duracion."""
+    rank = 0
+    if size_bytes is not None:
+        if size_bytes > settings.ROUTING_LONG_MIN_MB * MB:
+            rank = 2
+        elif size_bytes > settings.ROUTING_SHORT_MAX_MB * MB:
+            rank = 1
+    if duration_seconds is not None:
+        if duration_seconds > settings.ROUTING_LONG_MIN_SECONDS:
+            rank = max(rank, 2)
+        elif duration_seconds > settings.ROUTING_SHORT_MAX_SECONDS:
+            rank = max(rank, 1)
+    return JOB_CLASSES[rank]
+
+
+def queue_for_class(job_class: str) -> str:
+    return f"{settings.SQS_QUEUE_NAME}-{job_class}"
+
+
+def class_for_queue(queue_name: str | None) -> str | None:
+    prefix = f"{settings.SQS_QUEUE_NAME}-"
+    if queue_name and queue_name.startswith(prefix):
+        job_class = queue_name[len(prefix):]
+        if job_class in JOB_CLASSES:
+            return job_class
+    return None
+
+
+def parse_weights(spec: str) -> dict[str, int]:
+    """'short:6,medium:3,long:1' -> {'short': 6, 'medium': 3, 'long': 1}"""
+    weights = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition(":")
+        name = name.strip()
+        if name not in JOB_CLASSES:
+            raise ValueError(f"Clase de trabajo desconocida: {name}")
+        weights[name] = int(weight or 1)
+    return {name: w for name, w in weights.items() if w > 0}
+
+
+class WeightedRoundRobin:
+    """Smooth weighted round-robin (como el de nginx): reparte los turnos sin rafagas."""
+
+    def __init__(self, weights: dict[str, int]):
+        if not weights:
+            raise ValueError("Se necesita al menos una clase con peso > 0")
+        self.weights = dict(weights)
+        self._current = {name: 0 for name in weights}
+        self._total = sum(weights.values())
+
+    def next(self) -> str:
+        for name, weight in self.weights.items():
+            self._current[name] += weight
+        chosen = max(self._current, key=self._current.get)
+        self._current[chosen] -= self._total
+        return chosen
+
+
+class WeightedDrain(bootsteps.StartStopStep):
+    """
+    Bootstep del consumer: alterna las colas consumidas segun el turno
+    ponderado usando add_task_queue/cancel_task_queue (el mismo mecanismo
+    que `celery control add_consumer/cancel_consumer`).
+    """
+
+    requires = {"celery.worker.consumer.tasks:Tasks"}
+
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.rr = WeightedRoundRobin(parse_weights(settings.ROUTING_DRAIN_WEIGHTS))
+        self.idle_skip = settings.ROUTING_IDLE_SKIP_SECONDS
+        self.turn: str | None = None
+        self._turn_started = 0.0
+        self._received = threading.Event()
+        self._timer = None
+
+    def start(self, c):
+        self.consumer = c
+        task_received.connect(self._on_received, weak=False)
+        self._advance()
+        # -Q trae todas las colas de clase: solo queda la del primer turno
+        for queue in list(c.task_consumer.queues):
+            if class_for_queue(queue.name) not in (None, self.turn):
+                c.cancel_task_queue(queue.name)
+        self._timer = c.timer.call_repeatedly(1.0, self._tick)
+
+    def stop(self, c):
+        task_received.disconnect(self._on_received)
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def _on_received(self, request=None, **kwargs):
+        queue = (getattr(request, "delivery_info", None) or {}).get("routing_key")
+        job_class = class_for_queue(queue)
+        if job_class:
+            ROUTED_TASKS.labels(job_class=job_class).inc()
+        if job_class == self.turn:
+            self._received.set()
+
+    def _has_free_slots(self) -> bool:
+        from celery.worker import state
+
+        return len(state.reserved_requests) < self.consumer.pool.num_processes
+
+    def _tick(self):
+        if self._received.is_set():
+            self._advance()
+        elif (
+            time.monotonic() - self._turn_started > self.idle_skip
+            and self._has_free_slots()
+        ):
+            # la cola del turno esta vacia: no dejar procesos ociosos
+            self._advance()
+
+    def _advance(self):
+        self._received.clear()
+        self._turn_started = time.monotonic()
+        turn = self.rr.next()
+        if turn == self.turn:
+            return
+        previous, self.turn = self.turn, turn
+        self.consumer.add_task_queue(queue_for_class(turn))
+        if previous is not None:
+            self.consumer.cancel_task_queue(queue_for_class(previous))
+        logger.debug("WeightedDrain: turno %s", turn)
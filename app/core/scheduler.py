@@ -0,0 +1,274 @@
+"""
+Planificacion de CPU del worker de Celery dentro de un host.
+
+- JobSlots reparte los nucleos del host entre los trabajos en curso: cada
+  trabajo toma un slot (archivo con flock, compartido entre los procesos del
+  prefork) y recibe un presupuesto de hilos = nucleos // trabajos activos,
+  que se traduce en -threads/-filter_threads de ffmpeg. Un ffmpeg ya lanzado
+  no cambia sus hilos: la codificacion por fragmentos vuelve a pedir el
+  presupuesto (current_budget) en cada fragmento, y un encode de un solo
+  proceso queda con el de su inicio, acotado a WORKER_MAX_JOB_SHARE de los
+  nucleos para dejar sitio a los trabajos que lleguen despues.
+- CpuAutoscaler reemplaza el autoscaler de Celery (--autoscale=max,min):
+  agrega procesos mientras haya tareas reservadas esperando y la CPU tenga
+  margen, y quita procesos cuando hay mas hilos ejecutables que nucleos
+  (thrashing) o cuando sobran procesos ociosos.
+"""
+
+import fcntl
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from celery.worker.autoscale import Autoscaler
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_CONCURRENCY = Gauge(
+    "worker_scheduler_concurrency",
+    "Procesos del pool decididos por el autoscaler",
+    multiprocess_mode="max",
+)
+SCHEDULER_CPU_UTILIZATION = Gauge(
+    "worker_scheduler_cpu_utilization",
+    "Utilizacion de CPU del host (0-1) en la ultima ventana del autoscaler",
+    multiprocess_mode="max",
+)
+SCHEDULER_RUN_QUEUE = Gauge(
+    "worker_scheduler_runnable_per_core",
+    "Hilos ejecutables por nucleo en la ultima ventana del autoscaler",
+    multiprocess_mode="max",
+)
+SCHEDULER_DECISIONS = Counter(
+    "worker_scheduler_decisions_total",
+    "Cambios de concurrencia del autoscaler por accion y motivo",
+    ["action", "reason"],
+)
+JOB_THREAD_BUDGET = Histogram(
+    "worker_job_thread_budget",
+    "Hilos asignados a cada trabajo de procesamiento",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+ACTIVE_JOBS = Gauge(
+    "worker_active_jobs",
+    "Trabajos de procesamiento en curso en el host",
+    multiprocess_mode="livesum",
+)
+
+
+def host_cpu_count() -> int:
+    """Nucleos utilizables: afinidad del proceso acotada por la cuota de cgroup v2."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cores)
+
+
+class JobSlots:
+    def __init__(
+        self,
+        root: str,
+        cores: int | None = None,
+        min_threads: int = 1,
+        max_share: float = 1.0,
+    ):
+        self.root = Path(root)
+        self.cores = cores or host_cpu_count()
+        self.min_threads = min_threads
+        self.max_share = max_share
+
+    def active(self) -> int:
+        """Slots tomados; los de procesos muertos (sin flock) se limpian."""
+        for path in self.root.glob("*.tmp"):
+            # reserve() interrumpido antes del rename
+            self._unlink_if_unlocked(path)
+        count = 0
+        for path in self.root.glob("*.slot"):
+            if not self._unlink_if_unlocked(path):
+                count += 1
+        return count
+
+    @staticmethod
+    def _unlink_if_unlocked(path: Path) -> bool:
+        """False si otro proceso tiene el flock (slot vivo)."""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        else:
+            path.unlink(missing_ok=True)
+            return True
+        finally:
+            os.close(fd)
+
+    def budget(self, active: int) -> int:
+        share = max(1, int(self.cores * self.max_share))
+        return max(self.min_threads, min(share, self.cores // max(1, active)))
+
+    def current_budget(self) -> int:
+        """Presupuesto con los trabajos activos ahora (para cada fragmento)."""
+        return self.budget(self.active())
+
+    @contextmanager
+    def reserve(self):
+        """Toma un slot y entrega el presupuesto de hilos del trabajo."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        # se bloquea con un nombre que active() no cuenta y recien despues se
+        # publica como .slot: active() no puede borrar un slot aun sin flock.
+        # Si limpio el .tmp antes del flock, el rename falla y se reintenta.
+        while True:
+            name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            pending = self.root / f"{name}.tmp"
+            path = self.root / f"{name}.slot"
+            fd = os.open(pending, os.O_CREAT | os.O_RDWR, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                os.rename(pending, path)
+                break
+            except FileNotFoundError:
+                os.close(fd)
+        ACTIVE_JOBS.inc()
+        try:
+            threads = self.current_budget()
+            JOB_THREAD_BUDGET.observe(threads)
+            yield threads
+        finally:
+            ACTIVE_JOBS.dec()
+            path.unlink(missing_ok=True)
+            os.close(fd)
+
+
+_job_slots: JobSlots | None = None
+
+
+def get_job_slots() -> JobSlots:
+    global _job_slots
+    if _job_slots is None:
+        _job_slots = JobSlots(
+            settings.WORKER_SLOTS_DIR,
+            min_threads=settings.WORKER_MIN_THREADS,
+            max_share=settings.WORKER_MAX_JOB_SHARE,
+        )
+    return _job_slots
+
+
+class CpuSampler:
+    """Utilizacion y procesos ejecutables por nucleo a partir de /proc/stat."""
+
+    def __init__(self, cores: int, stat_path: str = "/proc/stat"):
+        self.cores = cores
+        self.stat_path = stat_path
+        self._last = self._read_times()
+        self._runnable: list[int] = []
+
+    def _read_lines(self) -> list[str]:
+        with open(self.stat_path) as f:
+            return f.read().splitlines()
+
+    def _read_times(self) -> tuple[int, int] | None:
+        try:
+            fields = [int(x) for x in self._read_lines()[0].split()[1:]]
+        except (OSError, IndexError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        return idle, sum(fields)
+
+    def tick(self) -> None:
+        try:
+            for line in self._read_lines():
+                if line.startswith("procs_running"):
+                    self._runnable.append(int(line.split()[1]))
+                    break
+        except (OSError, ValueError):
+            pass
+
+    def sample(self) -> tuple[float, float]:
+        """(utilizacion 0-1, ejecutables por nucleo) desde la muestra anterior."""
+        current = self._read_times()
+        utilization = 0.0
+        if current and self._last:
+            idle = current[0] - self._last[0]
+            total = current[1] - self._last[1]
+            if total > 0:
+                utilization = 1 - idle / total
+        self._last = current
+        runnable = (
+            sum(self._runnable) / len(self._runnable) if self._runnable else 0.0
+        )
+        self._runnable = []
+        return utilization, runnable / self.cores
+
+
+class CpuAutoscaler(Autoscaler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sampler = CpuSampler(host_cpu_count())
+        self.target_utilization = settings.WORKER_AUTOSCALE_TARGET_UTILIZATION
+        self.overload = settings.WORKER_AUTOSCALE_OVERLOAD
+        self.cooldown = settings.WORKER_AUTOSCALE_COOLDOWN
+        self._window_started = time.monotonic()
+
+    def _decide(self, procs: int, qty: int, utilization: float, runnable: float):
+        """(accion, n, motivo) o None si se mantiene la concurrencia."""
+        if runnable > self.overload and procs > max(1, self.min_concurrency):
+            return "down", 1, "cpu_overload"
+        if (
+            qty > procs
+            and procs < self.max_concurrency
+            and utilization < self.target_utilization
+        ):
+            return "up", 1, "cpu_headroom"
+        idle_target = max(qty, self.min_concurrency, 1)
+        if procs > idle_target:
+            return "down", procs - idle_target, "idle"
+        return None
+
+    def _maybe_scale(self, req=None):
+        self.sampler.tick()
+        procs = self.processes
+        SCHEDULER_CONCURRENCY.set(procs)
+        # un trabajo nuevo tarda en llevar la CPU a regimen: se decide por ventana
+        if time.monotonic() - self._window_started < self.cooldown:
+            return False
+        utilization, runnable = self.sampler.sample()
+        SCHEDULER_CPU_UTILIZATION.set(utilization)
+        SCHEDULER_RUN_QUEUE.set(runnable)
+        self._window_started = time.monotonic()
+
+        decision = self._decide(procs, self.qty, utilization, runnable)
+        if decision is None:
+            return False
+        action, n, reason = decision
+        logger.info(
+            "Autoscaler: %s %s (procs=%s, cpu=%.2f, ejecutables/nucleo=%.2f, %s)",
+            action,
+            n,
+            procs,
+            utilization,
+            runnable,
+            reason,
+        )
+        SCHEDULER_DECISIONS.labels(action=action, reason=reason).inc()
+        if action == "up":
+            self.scale_up(n)
+        else:
+            self._shrink(n)
+        SCHEDULER_CONCURRENCY.set(self.processes)
+        return True
@@ -1,3 +1,7 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from fastapi import Depends, HTTPException, status
@@ -5,15 +9,44 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.principal import (
+    Principal,
+    cached_principal,
+    principal_from_claims,
+    remember_principal,
+)
 from app.models import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max_rounds = BCRYPT_ROUNDS: al cambiar el costo, verify_and_update
+# devuelve el hash nuevo en el siguiente login (en ambos sentidos)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 security = HTTPBearer(auto_error=False)
 
+PASSWORD_HASH_QUEUE = Gauge(
+    "password_hash_queue_depth",
+    "Operaciones bcrypt encoladas o en curso en el executor",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Tiempo de una operacion bcrypt incluida la espera en el executor",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16),
+)
+
+_hash_executor: ThreadPoolExecutor | None = None
+
 
 def hash_password(pw: str) -> str:
     return pwd_context.hash(pw)
@@ -23,6 +56,42 @@ def verify_password(pw: str, hashed: str) -> bool:
     return pwd_context.verify(pw, hashed)
 
 
+def get_hash_executor() -> ThreadPoolExecutor:
+    """
+    Hilos dedicados a bcrypt (libera el GIL): las rafagas de login esperan
+    aqui en vez de bloquear el event loop o el threadpool de las rutas sync.
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+            thread_name_prefix="bcrypt",
+        )
+    return _hash_executor
+
+
+async def _run_hash(operation: str, fn, *args):
+    start = time.perf_counter()
+    PASSWORD_HASH_QUEUE.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hash_executor(), fn, *args)
+    finally:
+        PASSWORD_HASH_QUEUE.dec()
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(
+            time.perf_counter() - start
+        )
+
+
+async def hash_password_async(pw: str) -> str:
+    return await _run_hash("hash", hash_password, pw)
+
+
+async def verify_and_update_password(pw: str, hashed: str) -> tuple[bool, str | None]:
+    """(valido, hash nuevo si el costo configurado cambio o None)."""
+    return await _run_hash("verify", pwd_context.verify_and_update, pw, hashed)
+
+
 def create_access_token(data: dict, expires_seconds: int | None = None) -> str:
     to_encode = data.copy()
     UTC = timezone.utc
@@ -33,10 +102,10 @@ def create_access_token(data: dict, expires_seconds: int | None = None) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
     if not credentials or credentials.scheme.lower() != "bearer":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid auth scheme"
@@ -69,9 +138,17 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    principal = principal_from_claims(payload) or cached_principal(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+        principal = Principal.from_user(user)
+        remember_principal(principal)
+    if not principal.is_active:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user"
         )
-    return user
+    return principal
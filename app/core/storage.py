@@ -1,13 +1,18 @@
 import asyncio
+import fcntl
 import os
 import tempfile
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, AsyncGenerator, AsyncIterable, BinaryIO, Iterable
 from urllib.parse import urlparse
 
 import aiofiles
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 
 from app.core.config import settings
 
@@ -40,17 +45,21 @@ class LocalStorage(StoragePort):
         *,
         chunk_size: int = 1024 * 1024,
         max_size: int | None = None,
+        hasher=None,
     ) -> str:
         full_path = self.base_dir / dest_path
         full_path.parent.mkdir(parents=True, exist_ok=True)
 
         async with aiofiles.open(full_path, "wb") as out:
             await _write_stream_to_file(
-                file, out, chunk_size=chunk_size, max_size=max_size
+                file, out, chunk_size=chunk_size, max_size=max_size, hasher=hasher
             )
 
         return str(full_path)
 
+    def resumable(self, dest_path: str) -> "LocalResumable":
+        return LocalResumable(self.base_dir / dest_path)
+
 
 class NFSStore(LocalStorage):
     """
@@ -84,6 +93,7 @@ class NFSStore(LocalStorage):
         *,
         chunk_size: int = 1024 * 1024,
         max_size: int | None = None,
+        hasher=None,
     ) -> str:
         full_path = self.base_dir / dest_path
         full_path.parent.mkdir(parents=True, exist_ok=True)
@@ -91,7 +101,11 @@ class NFSStore(LocalStorage):
         try:
             async with aiofiles.open(full_path, "wb") as out:
                 await _write_stream_to_file(
-                    file, out, chunk_size=chunk_size, max_size=max_size
+                    file,
+                    out,
+                    chunk_size=chunk_size,
+                    max_size=max_size,
+                    hasher=hasher,
                 )
                 await out.flush()
 
@@ -106,6 +120,9 @@ class NFSStore(LocalStorage):
             print(f"Error al guardar el archivo (async): {e}")
             raise
 
+    def resumable(self, dest_path: str) -> "LocalResumable":
+        return LocalResumable(self.base_dir / dest_path, fsync=True)
+
 
 def is_s3_uri(uri: str | None) -> bool:
     if not uri:
@@ -121,8 +138,60 @@ def parse_s3_uri(uri: str) -> tuple[str, str]:
     return p.netloc, p.path.lstrip("/")
 
 
-def _get_s3_client():
-    return boto3.client("s3", region_name=settings.AWS_REGION)
+_s3_clients: dict[str | None, Any] = {}
+_s3_clients_lock = threading.Lock()
+_transfer_config: TransferConfig | None = None
+
+
+def _reset_s3_clients() -> None:
+    """
+    Descarta los clientes heredados. Se registra con os.register_at_fork para
+    que cada worker de gunicorn / hijo del prefork de Celery cree su propio
+    pool de conexiones en vez de compartir sockets con el padre.
+    """
+    global _s3_clients_lock
+    _s3_clients.clear()
+    _s3_clients_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_s3_clients)
+
+
+def get_s3_client(region_name: str | None = None):
+    """
+    Cliente S3 compartido por proceso (los clientes de boto3 son thread-safe)
+    con un pool de hasta S3_MAX_POOL_CONNECTIONS conexiones reutilizables.
+    """
+    region = region_name or settings.AWS_REGION
+    client = _s3_clients.get(region)
+    if client is not None:
+        return client
+    with _s3_clients_lock:
+        client = _s3_clients.get(region)
+        if client is None:
+            client = boto3.session.Session().client(
+                "s3",
+                region_name=region,
+                config=Config(
+                    max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                    retries={"max_attempts": 5, "mode": "standard"},
+                ),
+            )
+            _s3_clients[region] = client
+    return client
+
+
+def get_transfer_config() -> TransferConfig:
+    """TransferConfig compartido para upload_file/download_file multipart."""
+    global _transfer_config
+    if _transfer_config is None:
+        _transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_PART_SIZE,
+            max_concurrency=settings.S3_TRANSFER_CONCURRENCY,
+            use_threads=True,
+        )
+    return _transfer_config
 
 
 def generate_presigned_get_url(s3_uri: str, expires: int | None = None) -> str:
@@ -130,7 +199,7 @@ def generate_presigned_get_url(s3_uri: str, expires: int | None = None) -> str:
     Genera una URL prefirmada GET para un URI S3.
     """
     bucket, key = parse_s3_uri(s3_uri)
-    client = _get_s3_client()
+    client = get_s3_client()
     return client.generate_presigned_url(
         "get_object",
         Params={"Bucket": bucket, "Key": key},
@@ -138,6 +207,195 @@ def generate_presigned_get_url(s3_uri: str, expires: int | None = None) -> str:
     )
 
 
+class S3MultipartWriter:
+    """
+    Sube a S3 un stream de bytes de longitud desconocida usando multipart
+    upload. Las partes se envian en paralelo mientras se siguen escribiendo
+    datos; como maximo hay `concurrency` partes en vuelo, asi que la memoria
+    queda acotada a part_size * (concurrency + 1).
+
+    Usado como context manager: al salir sin error completa la subida y si
+    hubo una excepcion aborta el multipart upload (no quedan partes huerfanas).
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        *,
+        part_size: int = 8 * 1024 * 1024,
+        concurrency: int = 4,
+        content_type: str | None = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.concurrency = max(1, concurrency)
+        self.content_type = content_type
+        self.upload_id: str | None = None
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._next_part = 1
+        self._futures: list[Future] = []
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._pool: ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> "S3MultipartWriter":
+        extra = {"ContentType": self.content_type} if self.content_type else {}
+        resp = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=self.key, **extra
+        )
+        self.upload_id = resp["UploadId"]
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            try:
+                self.complete()
+            except BaseException:
+                self.abort()
+                raise
+        else:
+            self.abort()
+
+    def _upload_part(self, part_number: int, data: bytes) -> dict:
+        try:
+            resp = self.client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return {"PartNumber": part_number, "ETag": resp["ETag"]}
+        finally:
+            self._slots.release()
+
+    def _raise_failed(self) -> None:
+        for f in self._futures:
+            if f.done() and f.exception() is not None:
+                raise f.exception()
+
+    def _submit(self, data: bytes) -> None:
+        self._raise_failed()
+        self._slots.acquire()
+        part_number = self._next_part
+        self._next_part += 1
+        try:
+            future = self._pool.submit(self._upload_part, part_number, data)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._futures.append(future)
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            with memoryview(self._buffer) as view:
+                part = bytes(view[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._submit(part)
+
+    def complete(self) -> None:
+        if self._buffer or not self._futures:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        parts = [f.result() for f in self._futures]
+        self._pool.shutdown(wait=True)
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])},
+        )
+
+    def abort(self) -> None:
+        if self._pool is not None:
+            for f in self._futures:
+                f.cancel()
+            self._pool.shutdown(wait=True)
+        if self.upload_id:
+            try:
+                self.client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+                )
+            except Exception as abort_exc:
+                print(f"Error al abortar multipart s3://{self.bucket}/{self.key}: {abort_exc}")
+
+
+class DirectUpload:
+    """
+    Multipart upload que el cliente sube directo a S3 con URLs prefirmadas
+    por parte; la API solo lo crea y lo completa, sin tocar los bytes.
+    """
+
+    MAX_PARTS = 10000
+
+    def __init__(self, client, bucket: str, key: str):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+
+    @property
+    def uri(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+    @classmethod
+    def part_size_for(cls, size: int, part_size: int) -> int:
+        part_size = max(part_size, S3MultipartWriter.MIN_PART_SIZE)
+        return max(part_size, -(-size // cls.MAX_PARTS))
+
+    def create(self, content_type: str) -> str:
+        resp = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=self.key, ContentType=content_type
+        )
+        return resp["UploadId"]
+
+    def part_urls(self, upload_id: str, parts: int, expires: int) -> list[str]:
+        return [
+            self.client.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": self.bucket,
+                    "Key": self.key,
+                    "UploadId": upload_id,
+                    "PartNumber": number,
+                },
+                ExpiresIn=expires,
+            )
+            for number in range(1, parts + 1)
+        ]
+
+    def complete(self, upload_id: str, parts: list[dict]) -> dict:
+        """Completa la subida y retorna el head_object del objeto final."""
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": sorted(parts, key=lambda p: p["PartNumber"])
+            },
+        )
+        return self.client.head_object(Bucket=self.bucket, Key=self.key)
+
+    def abort(self, upload_id: str) -> None:
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=upload_id
+            )
+        except Exception as abort_exc:
+            print(f"Error al abortar multipart {self.uri}: {abort_exc}")
+
+    def delete(self) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.key)
+
+
 class S3Storage(StoragePort):
     def __init__(
         self,
@@ -155,20 +413,35 @@ class S3Storage(StoragePort):
             return f"{self.upload_prefix}/{dest}"
         return dest
 
+    def direct_upload(self, dest_path: str) -> DirectUpload:
+        return DirectUpload(get_s3_client(), self.bucket, self._build_key(dest_path))
+
+    def resumable(self, dest_path: str, part_size: int) -> "S3Resumable":
+        return S3Resumable(
+            get_s3_client(), self.bucket, self._build_key(dest_path), part_size
+        )
+
     def save(self, file: BinaryIO | Iterable[bytes], dest_path: str) -> str:
-        client = _get_s3_client()
+        client = get_s3_client()
         key = self._build_key(dest_path)
 
         try:
             if hasattr(file, "read"):
-                client.upload_fileobj(file, self.bucket, key)  # type: ignore[arg-type]
+                client.upload_fileobj(
+                    file,  # type: ignore[arg-type]
+                    self.bucket,
+                    key,
+                    Config=get_transfer_config(),
+                )
             else:
                 with tempfile.NamedTemporaryFile("wb", delete=False) as tmp:
                     tmp_path = tmp.name
                     for chunk in file:
                         tmp.write(chunk)
                 try:
-                    client.upload_file(tmp_path, self.bucket, key)
+                    client.upload_file(
+                        tmp_path, self.bucket, key, Config=get_transfer_config()
+                    )
                 finally:
                     try:
                         os.remove(tmp_path)
@@ -185,28 +458,279 @@ class S3Storage(StoragePort):
         *,
         chunk_size: int = 1024 * 1024,
         max_size: int | None = None,
+        hasher=None,
     ) -> str:
+        """
+        Sube el stream a S3 mientras llega, sin archivo temporal. Si se
+        supera max_size (o falla cualquier parte) el multipart se aborta.
+        """
         key = self._build_key(dest_path)
-        client = _get_s3_client()
+        sink = _S3StreamSink(
+            get_s3_client(),
+            self.bucket,
+            key,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            concurrency=settings.S3_MULTIPART_CONCURRENCY,
+            content_type=getattr(file, "content_type", None),
+        )
+        try:
+            await _write_stream_to_file(
+                file,
+                sink,
+                chunk_size=chunk_size,
+                max_size=max_size,
+                hasher=hasher,
+            )
+            await sink.close()
+        except BaseException as e:
+            print(f"Error al subir a S3: {e}")
+            await sink.abort()
+            raise
+        return f"s3://{self.bucket}/{key}"
 
-        tmp_fd, tmp_path = tempfile.mkstemp()
-        os.close(tmp_fd)
+
+class _S3StreamSink:
+    """
+    Destino async de _write_stream_to_file que escribe en S3. Retiene la
+    primera parte en memoria: si el stream termina antes de part_size se sube
+    con un solo put_object; si no, se abre un S3MultipartWriter y las partes
+    se suben mientras siguen llegando bytes. La memoria queda acotada del
+    orden de part_size * (concurrency + 2), sin importar el tamano total.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        *,
+        part_size: int,
+        concurrency: int,
+        content_type: str | None = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, S3MultipartWriter.MIN_PART_SIZE)
+        self.concurrency = concurrency
+        self.content_type = content_type
+        self._head = bytearray()
+        self._writer: S3MultipartWriter | None = None
+
+    async def write(self, chunk: bytes) -> None:
+        if self._writer is None:
+            self._head += chunk
+            if len(self._head) < self.part_size:
+                return
+            writer = S3MultipartWriter(
+                self.client,
+                self.bucket,
+                self.key,
+                part_size=self.part_size,
+                concurrency=self.concurrency,
+                content_type=self.content_type,
+            )
+            await asyncio.to_thread(writer.__enter__)
+            self._writer = writer
+            chunk, self._head = self._head, bytearray()
+        # write bloquea si ya hay `concurrency` partes en vuelo: fuera del loop
+        await asyncio.to_thread(self._writer.write, chunk)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            await asyncio.to_thread(self._writer.complete)
+            return
+        extra = {"ContentType": self.content_type} if self.content_type else {}
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=self.key,
+            Body=bytes(self._head),
+            **extra,
+        )
+
+    async def abort(self) -> None:
+        self._head = bytearray()
+        if self._writer is not None:
+            await asyncio.to_thread(self._writer.abort)
+
+
+class OffsetConflict(Exception):
+    """El offset del chunk no coincide con lo ya recibido (o hay otro en curso)."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"offset actual {offset}")
+        self.offset = offset
+
+
+class LocalResumable:
+    """
+    Subida reanudable en disco (local/NFS): los chunks se anexan a
+    <destino>.part, asi que el offset es el tamano de ese archivo y un
+    chunk cortado a la mitad conserva los bytes que alcanzaron a llegar.
+    """
+
+    def __init__(self, path: str | Path, fsync: bool = False):
+        self.path = Path(path)
+        self.partial = self.path.with_name(self.path.name + ".part")
+        self.fsync = fsync
+
+    @property
+    def uri(self) -> str:
+        return str(self.path)
+
+    def start(self, content_type: str | None = None) -> str:
+        self.partial.parent.mkdir(parents=True, exist_ok=True)
+        self.partial.touch()
+        return "local"
+
+    def offset(self) -> int:
+        try:
+            return self.partial.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    async def append(
+        self,
+        source: Any | AsyncIterable[bytes],
+        offset: int,
+        max_bytes: int,
+        chunk_size: int = 1024 * 1024,
+    ) -> int:
+        fd = os.open(self.partial, os.O_WRONLY | os.O_APPEND)
         try:
-            async with aiofiles.open(tmp_path, "wb") as out:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise OffsetConflict(self.offset())
+            if os.fstat(fd).st_size != offset:
+                raise OffsetConflict(os.fstat(fd).st_size)
+            async with aiofiles.open(self.partial, "ab") as out:
                 await _write_stream_to_file(
-                    file, out, chunk_size=chunk_size, max_size=max_size
+                    source, out, chunk_size=chunk_size, max_size=max_bytes
                 )
-
-            await asyncio.to_thread(client.upload_file, tmp_path, self.bucket, key)
-        except Exception as e:
-            print(f"Error al subir a S3: {e}")
-            raise
+            if self.fsync:
+                os.fsync(fd)
+            return os.fstat(fd).st_size
         finally:
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-        return f"s3://{self.bucket}/{key}"
+            os.close(fd)
+
+    def finish(self) -> str:
+        os.replace(self.partial, self.path)
+        return str(self.path)
+
+    def discard(self) -> None:
+        self.partial.unlink(missing_ok=True)
+
+
+class S3Resumable:
+    """
+    Subida reanudable sobre un multipart upload: cada chunk es una parte de
+    part_size bytes (la ultima puede ser menor) y el offset se calcula con
+    list_parts, de modo que S3 es la fuente de verdad. Un chunk cortado no
+    deja nada y se reenvia completo (a lo sumo part_size bytes).
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: int,
+        upload_id: str | None = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.upload_id = upload_id
+
+    @property
+    def uri(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+    def start(self, content_type: str | None = None) -> str:
+        extra = {"ContentType": content_type} if content_type else {}
+        resp = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=self.key, **extra
+        )
+        self.upload_id = resp["UploadId"]
+        return self.upload_id
+
+    def _parts(self) -> list[dict]:
+        parts = []
+        paginator = self.client.get_paginator("list_parts")
+        for page in paginator.paginate(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+        ):
+            parts.extend(page.get("Parts", []))
+        return sorted(parts, key=lambda p: p["PartNumber"])
+
+    def offset(self) -> int:
+        offset = 0
+        for expected, part in enumerate(self._parts(), start=1):
+            if part["PartNumber"] != expected:
+                break
+            offset += part["Size"]
+        return offset
+
+    async def append(
+        self,
+        source: Any | AsyncIterable[bytes],
+        offset: int,
+        max_bytes: int,
+        chunk_size: int = 1024 * 1024,
+    ) -> int:
+        current = await asyncio.to_thread(self.offset)
+        if offset != current or offset % self.part_size:
+            raise OffsetConflict(current)
+        limit = min(self.part_size, max_bytes)
+        body = bytearray()
+        async for chunk in _iterate_chunks(source, chunk_size=chunk_size):
+            body += chunk
+            if len(body) > limit:
+                raise ValueError("chunk too large")
+        if len(body) < limit:
+            # solo el ultimo chunk puede ser menor que part_size
+            raise ValueError("chunk incompleto")
+        await asyncio.to_thread(
+            self.client.upload_part,
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=offset // self.part_size + 1,
+            Body=bytes(body),
+        )
+        return offset + len(body)
+
+    def finish(self) -> str:
+        parts = [
+            {"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in self._parts()
+        ]
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        return self.uri
+
+    def discard(self) -> None:
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+        except Exception as abort_exc:
+            print(f"Error al abortar multipart {self.uri}: {abort_exc}")
+
+
+def resumable_for(path: str, upload_id: str | None, part_size: int):
+    """Reconstruye la subida reanudable de un Video a partir de su original_path."""
+    if is_s3_uri(path):
+        bucket, key = parse_s3_uri(path)
+        return S3Resumable(get_s3_client(), bucket, key, part_size, upload_id)
+    storage_backend = os.getenv("STORAGE_BACKEND", settings.STORAGE_BACKEND)
+    return LocalResumable(path, fsync=storage_backend == "nfs")
 
 
 async def _iterate_chunks(
@@ -232,12 +756,20 @@ async def _write_stream_to_file(
     *,
     chunk_size: int,
     max_size: int | None,
+    hasher=None,
 ) -> None:
+    """
+    Copia el stream al archivo (o a cualquier destino con write async)
+    respetando max_size. Si se pasa un hasher
+    (p. ej. hashlib.sha256()) se actualiza con cada chunk mientras se escribe.
+    """
     total = 0
     async for chunk in _iterate_chunks(source, chunk_size=chunk_size):
         total += len(chunk)
         if max_size is not None and total > max_size:
             raise ValueError("file too large")
+        if hasher is not None:
+            hasher.update(chunk)
         await out_file.write(chunk)
 
 
@@ -0,0 +1,71 @@
+"""
+Sesiones de subida pendientes (reanudables y directas a S3).
+
+Un Video en estado pending_upload con upload_id es una sesion abierta: sus
+bytes viven en <destino>.part (local/NFS) o en un multipart upload de S3.
+Cada chunk recibido renueva updated_at; las sesiones sin actividad por mas
+de UPLOAD_SESSION_TTL_SECONDS se consideran expiradas y
+expire_upload_sessions libera su almacenamiento y borra el Video.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from prometheus_client import Counter
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.storage import DirectUpload, resumable_for
+from app.models import Video, VideoStatus
+
+UTC = timezone.utc
+
+EXPIRED_SESSIONS = Counter(
+    "upload_sessions_expired_total",
+    "Sesiones de subida pendientes eliminadas por inactividad",
+)
+
+
+def part_size_for(size_bytes: int) -> int:
+    return DirectUpload.part_size_for(size_bytes, settings.S3_MULTIPART_PART_SIZE)
+
+
+def session_expires_at(video: Video) -> datetime:
+    updated_at = video.updated_at or datetime.now(UTC)
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=UTC)
+    return updated_at + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def session_expired(video: Video, now: datetime | None = None) -> bool:
+    return (now or datetime.now(UTC)) >= session_expires_at(video)
+
+
+def resumable_for_video(video: Video):
+    return resumable_for(
+        video.original_path, video.upload_id, part_size_for(video.size_bytes or 0)
+    )
+
+
+def expire_upload_sessions(
+    db: Session, now: datetime | None = None, limit: int = 500
+) -> int:
+    """Libera hasta `limit` sesiones expiradas; retorna cuantas elimino."""
+    now = now or datetime.now(UTC)
+    cutoff = now - timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+    expired = (
+        db.query(Video)
+        .filter(
+            Video.status == VideoStatus.pending_upload.value,
+            Video.updated_at < cutoff,
+        )
+        .order_by(Video.updated_at)
+        .limit(limit)
+        .all()
+    )
+    for video in expired:
+        if video.upload_id:
+            resumable_for_video(video).discard()
+        db.delete(video)
+    db.commit()
+    EXPIRED_SESSIONS.inc(len(expired))
+    return len(expired)
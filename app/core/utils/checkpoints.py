@@ -0,0 +1,157 @@
+import fcntl
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+from prometheus_client import Counter
+
+CHECKPOINT_RESUMES = Counter(
+    "worker_checkpoint_resumes_total",
+    "Etapas omitidas en un reintento por existir su checkpoint",
+    ["stage"],
+)
+
+LOCK_NAME = ".lock"
+
+
+class JobCheckpoints:
+    """
+    Checkpoints de un trabajo: un archivo por etapa completada. El archivo
+    se escribe con otro nombre y se renombra al terminar, de modo que su
+    existencia implica que la etapa termino.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    @contextmanager
+    def hold(self):
+        """
+        flock sobre el .lock del trabajo mientras corre: evict() no borra un
+        trabajo activo aunque una etapa larga deje viejo el mtime.
+        """
+        lock_path = self.root / LOCK_NAME
+        while True:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(lock_path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            # evict() borro el directorio mientras se esperaba el flock
+            os.close(fd)
+        try:
+            yield self
+        finally:
+            os.close(fd)
+
+    def path(self, stage: str, suffix: str = ".mp4") -> Path:
+        return self.root / f"{stage}{suffix}"
+
+    def done(self, stage: str, suffix: str = ".mp4") -> bool:
+        return self.path(stage, suffix).exists()
+
+    def run(
+        self, stage: str, builder: Callable[[Path], None], suffix: str = ".mp4"
+    ) -> Path:
+        path = self.path(stage, suffix)
+        if path.exists():
+            os.utime(self.root)
+            CHECKPOINT_RESUMES.labels(stage=stage).inc()
+            return path
+        self.root.mkdir(parents=True, exist_ok=True)
+        # conserva la extension: ffmpeg deduce el formato de salida por ella
+        tmp = self.root / f".{stage}.{os.getpid()}.tmp{suffix}"
+        try:
+            builder(tmp)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        os.utime(self.root)
+        return path
+
+
+class CheckpointStore:
+    """
+    Cache local del worker con los resultados intermedios de cada video
+    (original descargado, cuerpo codificado, archivo final), para que un
+    reintento de Celery retome desde la primera etapa incompleta. La clave
+    es video id + version del pipeline: si cambia el pipeline o los assets
+    los checkpoints anteriores no se reutilizan. Los trabajos sin actividad
+    por mas de ttl_seconds se eliminan, y despues los menos recientes hasta
+    quedar por debajo de max_bytes; nunca los que tienen el flock de
+    JobCheckpoints.hold().
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        ttl_seconds: float = 6 * 3600,
+        min_age_seconds: float = 60.0,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.min_age_seconds = min_age_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def job(self, video_db_id: int, version: str | None) -> JobCheckpoints:
+        return JobCheckpoints(self.root / f"{video_db_id}-{version or 'none'}")
+
+    def discard(self, video_db_id: int) -> None:
+        for path in self.root.glob(f"{video_db_id}-*"):
+            shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        total = 0
+        for p in path.iterdir():
+            try:
+                total += p.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def evict(self) -> None:
+        entries = []
+        for p in self.root.iterdir():
+            try:
+                mtime = p.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if p.is_dir():
+                entries.append((mtime, self._size(p), p))
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, p in sorted(entries):
+            age = now - mtime
+            if age > self.ttl_seconds or (
+                total > self.max_bytes and age >= self.min_age_seconds
+            ):
+                if self._remove_unless_active(p):
+                    total -= size
+
+    @staticmethod
+    def _remove_unless_active(path: Path) -> bool:
+        """False si un proceso tiene el flock del trabajo (sigue corriendo)."""
+        try:
+            fd = os.open(path / LOCK_NAME, os.O_RDONLY)
+        except FileNotFoundError:
+            shutil.rmtree(path, ignore_errors=True)
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+            return True
+        finally:
+            os.close(fd)
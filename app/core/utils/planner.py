@@ -0,0 +1,165 @@
+import json
+import struct
+import subprocess
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from fractions import Fraction
+
+from app.core.utils.video_utils import DEFAULT_PROFILE, EncodeProfile
+
+
+@dataclass(frozen=True)
+class ProbeInfo:
+    duration: float | None
+    width: int | None
+    height: int | None
+    fps: float | None
+    vcodec: str | None
+    acodec: str | None
+    pix_fmt: str | None = None
+    moov_at_start: bool | None = None
+
+
+@dataclass(frozen=True)
+class PipelinePlan:
+    """
+    Operaciones minimas para llevar una entrada al perfil de salida. Las
+    etapas fijas (marca de agua, intro/outro, pista de silencio) siempre se
+    aplican; trim/scale/fps solo cuando la entrada lo necesita.
+    """
+
+    trim: bool = True
+    scale: bool = True
+    fps: bool = True
+    operations: list[str] = field(default_factory=list)
+    probe: dict | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+FULL_PLAN = PipelinePlan(
+    operations=["trim", "scale", "fps", "watermark", "intro_outro", "silence"]
+)
+
+
+def _parse_rate(rate: str | None) -> float | None:
+    if not rate or rate in ("0/0", "0"):
+        return None
+    try:
+        return float(Fraction(rate))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _rotation(stream: dict) -> int:
+    for side in stream.get("side_data_list") or []:
+        if "rotation" in side:
+            return int(side["rotation"])
+    return int((stream.get("tags") or {}).get("rotate", 0))
+
+
+def parse_probe(data: dict, moov_at_start: bool | None = None) -> ProbeInfo:
+    streams = data.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    fmt = data.get("format") or {}
+
+    duration = fmt.get("duration") or (video or {}).get("duration")
+    width = height = fps = None
+    if video:
+        width, height = video.get("width"), video.get("height")
+        # ffmpeg aplica la rotacion al decodificar: el filtro ve las dims giradas
+        if width and height and abs(_rotation(video)) % 180 == 90:
+            width, height = height, width
+        fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(
+            video.get("r_frame_rate")
+        )
+
+    return ProbeInfo(
+        duration=float(duration) if duration else None,
+        width=width,
+        height=height,
+        fps=fps,
+        vcodec=(video or {}).get("codec_name"),
+        acodec=(audio or {}).get("codec_name"),
+        pix_fmt=(video or {}).get("pix_fmt"),
+        moov_at_start=moov_at_start,
+    )
+
+
+def _read_at(source: str, offset: int, size: int) -> bytes:
+    if source.startswith(("http://", "https://")):
+        req = urllib.request.Request(
+            source, headers={"Range": f"bytes={offset}-{offset + size - 1}"}
+        )
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.read(size)
+    with open(source, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def moov_before_mdat(source: str, max_boxes: int = 32) -> bool | None:
+    """
+    Recorre las cajas de primer nivel del MP4 leyendo solo sus cabeceras.
+    True si el atomo moov aparece antes que mdat (faststart).
+    """
+    offset = 0
+    for _ in range(max_boxes):
+        header = _read_at(source, offset, 16)
+        if len(header) < 8:
+            return None
+        size, box = struct.unpack(">I4s", header[:8])
+        if size == 1 and len(header) >= 16:
+            size = struct.unpack(">Q", header[8:16])[0]
+        if box == b"moov":
+            return True
+        if box == b"mdat":
+            return False
+        if size < 8:
+            return None
+        offset += size
+    return None
+
+
+def probe_video(source: str) -> ProbeInfo:
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            source,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    try:
+        moov = moov_before_mdat(source)
+    except OSError:
+        moov = None
+    return parse_probe(json.loads(result.stdout), moov_at_start=moov)
+
+
+def plan_pipeline(
+    info: ProbeInfo, seconds: int = 30, profile: EncodeProfile = DEFAULT_PROFILE
+) -> PipelinePlan:
+    trim = info.duration is None or info.duration > seconds
+    scale = not (
+        info.width == profile.width and info.height == profile.height
+    )
+    fps = info.fps is None or abs(info.fps - profile.fps) > 0.01
+
+    operations = [
+        name for name, needed in (("trim", trim), ("scale", scale), ("fps", fps))
+        if needed
+    ]
+    operations += ["watermark", "intro_outro", "silence"]
+    return PipelinePlan(
+        trim=trim, scale=scale, fps=fps, operations=operations, probe=asdict(info)
+    )
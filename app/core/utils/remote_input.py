@@ -0,0 +1,192 @@
+import re
+import socket
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import BinaryIO
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class RangeSource(ABC):
+    """
+    Objeto remoto que se puede leer por rangos de bytes.
+    """
+
+    size: int
+
+    @abstractmethod
+    def open_range(self, start: int, end: int) -> BinaryIO:
+        """Abre un stream para los bytes [start, end] (end inclusivo)."""
+
+
+class S3RangeSource(RangeSource):
+    def __init__(self, client, bucket: str, key: str):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        head = client.head_object(Bucket=bucket, Key=key)
+        self.size = int(head["ContentLength"])
+
+    def open_range(self, start: int, end: int) -> BinaryIO:
+        resp = self.client.get_object(
+            Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-{end}"
+        )
+        return resp["Body"]
+
+
+class HTTPRangeSource(RangeSource):
+    """
+    Fuente sobre cualquier URL HTTP con soporte de Range (p. ej. una URL
+    prefirmada de S3 o un servidor local de pruebas).
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url
+        self.timeout = timeout
+        req = urllib.request.Request(url, headers={"Range": "bytes=0-0"})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            content_range = resp.headers.get("Content-Range")
+            if content_range:
+                self.size = int(content_range.rsplit("/", 1)[-1])
+            else:
+                self.size = int(resp.headers["Content-Length"])
+
+    def open_range(self, start: int, end: int) -> BinaryIO:
+        req = urllib.request.Request(
+            self.url, headers={"Range": f"bytes={start}-{end}"}
+        )
+        return urllib.request.urlopen(req, timeout=self.timeout)
+
+
+class RangeProxy:
+    """
+    Servidor HTTP local (127.0.0.1) que expone un RangeSource a ffmpeg.
+
+    ffmpeg lee por HTTP con peticiones Range, asi que solo se descargan los
+    bytes que realmente decodifica (los primeros segundos y el atomo moov,
+    aunque este al final). Cada peticion abre un unico GET por rango contra
+    el origen y se corta en cuanto ffmpeg cierra la conexion; los bytes
+    leidos del origen quedan en bytes_fetched.
+    """
+
+    def __init__(self, source: RangeSource, chunk_size: int = 256 * 1024):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.bytes_fetched = 0
+        self.requests = 0
+        self.first_byte_seconds: float | None = None
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/input"
+
+    def stats(self) -> dict:
+        return {
+            "object_size": self.source.size,
+            "bytes_fetched": self.bytes_fetched,
+            "range_requests": self.requests,
+            "first_byte_seconds": self.first_byte_seconds,
+        }
+
+    def _record(self, n: int) -> None:
+        with self._lock:
+            if self.first_byte_seconds is None:
+                self.first_byte_seconds = time.perf_counter() - self._started_at
+            self.bytes_fetched += n
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                # buffer de envio acotado: lo que ffmpeg no alcanza a leer
+                # antes de cerrar la conexion no se descarga del origen
+                self.connection.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_SNDBUF, proxy.chunk_size
+                )
+
+            def _send_headers(self, status: int, start: int, end: int):
+                self.send_response(status)
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(end - start + 1))
+                if status == 206:
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{end}/{proxy.source.size}"
+                    )
+                self.end_headers()
+
+            def _parse_range(self) -> tuple[int, int] | None:
+                size = proxy.source.size
+                m = _RANGE_RE.match(self.headers.get("Range", ""))
+                if not m:
+                    return None
+                first, last = m.groups()
+                if first == "":
+                    start, end = max(0, size - int(last)), size - 1
+                else:
+                    start = int(first)
+                    end = min(int(last), size - 1) if last else size - 1
+                return start, end
+
+            def do_HEAD(self):
+                self._send_headers(200, 0, proxy.source.size - 1)
+
+            def do_GET(self):
+                size = proxy.source.size
+                rng = self._parse_range()
+                if rng is None:
+                    status, (start, end) = 200, (0, size - 1)
+                else:
+                    status, (start, end) = 206, rng
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.end_headers()
+                    return
+
+                with proxy._lock:
+                    proxy.requests += 1
+                self._send_headers(status, start, end)
+                body = proxy.source.open_range(start, end)
+                try:
+                    while True:
+                        chunk = body.read(proxy.chunk_size)
+                        if not chunk:
+                            break
+                        proxy._record(len(chunk))
+                        self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    # ffmpeg cerro la conexion (seek o fin de lectura)
+                    pass
+                finally:
+                    body.close()
+
+        return Handler
+
+    def __enter__(self) -> "RangeProxy":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,97 @@
+import fcntl
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+
+class SegmentCache:
+    """
+    Cache en disco de segmentos pre-codificados (intro/outro), compartido
+    entre tareas y procesos del worker. La clave combina el hash del
+    contenido de la imagen con el perfil de salida, de modo que cualquier
+    cambio de asset o de parametros de codificacion genera otra entrada.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        min_age_seconds: float = 60.0,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.min_age_seconds = min_age_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._digests: dict[tuple, str] = {}
+
+    def _file_digest(self, path: str | Path) -> str:
+        st = os.stat(path)
+        memo_key = (str(path), st.st_mtime_ns, st.st_size)
+        if memo_key not in self._digests:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+            self._digests[memo_key] = h.hexdigest()
+        return self._digests[memo_key]
+
+    def key_for(self, image_path: str | Path, seconds: int, profile) -> str:
+        payload = json.dumps(
+            {
+                "image": self._file_digest(image_path),
+                "seconds": seconds,
+                "profile": profile.cache_fields(),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def get_or_create(self, key: str, builder: Callable[[Path], None]) -> Path:
+        path = self.root / f"{key}.mp4"
+        if path.exists():
+            os.utime(path)
+            return path
+
+        lock_path = self.root / f"{key}.lock"
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if not path.exists():
+                    tmp = self.root / f".{key}.{os.getpid()}.tmp.mp4"
+                    try:
+                        builder(tmp)
+                        os.replace(tmp, path)
+                    finally:
+                        tmp.unlink(missing_ok=True)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        """
+        Elimina las entradas usadas hace mas tiempo (LRU por mtime) hasta
+        quedar por debajo de max_bytes. Las entradas recientes se respetan
+        para no borrar segmentos que otra tarea esta a punto de concatenar.
+        """
+        entries = []
+        for p in self.root.glob("*.mp4"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if now - mtime < self.min_age_seconds:
+                continue
+            p.unlink(missing_ok=True)
+            total -= size
@@ -1,7 +1,165 @@
+import contextvars
+import itertools
+import logging
+import os
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
 
+from app.core.metrics import FFMPEG_SPEED, track_stage
+from app.core.progress import current_reporter, parse_progress_block
+
+logger = logging.getLogger(__name__)
+_ffmpeg_calls = itertools.count()
+
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """
+    Parametros de salida compartidos por todos los segmentos del pipeline.
+    """
+
+    width: int = 1280
+    height: int = 720
+    fps: int = 30
+    preset: str = "veryfast"
+    crf: int | None = None  # None = CRF por defecto de libx264
+    pix_fmt: str = "yuv420p"
+    h264_profile: str = "high"
+    h264_level: str = "4.0"
+    timescale: int = 15360
+    sample_rate: int = 48000
+    channel_layout: str = "stereo"
+
+    def video_args(self) -> list[str]:
+        # perfil/nivel/timescale fijos: los segmentos codificados por separado
+        # deben ser identicos en parametros para poder unirse con -c copy
+        return [
+            "-c:v",
+            "libx264",
+            "-preset",
+            self.preset,
+            *(["-crf", str(self.crf)] if self.crf is not None else []),
+            "-pix_fmt",
+            self.pix_fmt,
+            "-profile:v",
+            self.h264_profile,
+            "-level:v",
+            self.h264_level,
+            "-video_track_timescale",
+            str(self.timescale),
+        ]
+
+    def cache_fields(self) -> dict:
+        return asdict(self)
+
+    def audio_args(self) -> list[str]:
+        return ["-c:a", "aac", "-ar", str(self.sample_rate)]
+
+    def silence_source(self) -> str:
+        return (
+            f"anullsrc=channel_layout={self.channel_layout}"
+            f":sample_rate={self.sample_rate}"
+        )
+
+
+DEFAULT_PROFILE = EncodeProfile()
+STREAM_OUTPUT = "pipe:1"
+
+
+def _mp4_output_args(output_video: str) -> list[str]:
+    if output_video == STREAM_OUTPUT:
+        # MP4 fragmentado: se puede escribir a un pipe sin seeks
+        return [
+            "-movflags",
+            "frag_keyframe+empty_moov+default_base_moof",
+            "-f",
+            "mp4",
+            STREAM_OUTPUT,
+        ]
+    return ["-movflags", "+faststart", output_video]
+
+
+def run_ffmpeg(
+    cmd: list[str],
+    sink=None,
+    stage: str = "ffmpeg",
+    chunk_size: int = 1024 * 1024,
+):
+    """
+    Ejecuta ffmpeg con -progress sobre un pipe propio (stdout puede ir al
+    sink). Cada bloque de progreso se entrega al ProgressReporter activo y la
+    ultima velocidad (speed=) queda en las metricas junto con la duracion de
+    la etapa. Si se pasa un sink (objeto con write), la salida de ffmpeg por
+    stdout se le entrega a medida que se produce.
+    """
+    reporter = current_reporter.get()
+    call_id = next(_ffmpeg_calls)
+    stderr = bytearray()
+    last_block: dict = {}
+    progress_r, progress_w = os.pipe()
+    with track_stage(stage):
+        try:
+            proc = subprocess.Popen(
+                [cmd[0], "-nostats", "-progress", f"pipe:{progress_w}", *cmd[1:]],
+                stdout=subprocess.PIPE if sink is not None else None,
+                stderr=subprocess.PIPE,
+                pass_fds=(progress_w,),
+            )
+        finally:
+            os.close(progress_w)
+
+        def drain_stderr():
+            for chunk in iter(lambda: proc.stderr.read(64 * 1024), b""):
+                stderr.extend(chunk)
+                if len(stderr) > 256 * 1024:
+                    del stderr[: -64 * 1024]
+
+        def read_progress():
+            lines: list[str] = []
+            with os.fdopen(progress_r, "r", errors="ignore") as progress:
+                for line in progress:
+                    line = line.strip()
+                    lines.append(line)
+                    if not line.startswith("progress="):
+                        continue
+                    block = parse_progress_block(lines)
+                    lines = []
+                    last_block.update(block)
+                    if reporter is not None:
+                        reporter.update(stage, call_id, block)
+
+        readers = [
+            threading.Thread(target=drain_stderr, daemon=True),
+            threading.Thread(target=read_progress, daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            if sink is not None:
+                for chunk in iter(lambda: proc.stdout.read(chunk_size), b""):
+                    sink.write(chunk)
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            if sink is not None:
+                proc.stdout.close()
+        returncode = proc.wait()
+        for reader in readers:
+            reader.join()
+
+    if "speed" in last_block:
+        FFMPEG_SPEED.labels(stage=stage).observe(last_block["speed"])
+    if returncode != 0:
+        text = stderr.decode(errors="ignore")
+        logger.error("ffmpeg fallo en la etapa %s:\n%s", stage, text[-4000:])
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=text[-4000:])
+
 
 def trim_to_seconds(input_video: str, output_video: str, seconds: int = 30):
     cmd = [
@@ -17,16 +175,10 @@ def trim_to_seconds(input_video: str, output_video: str, seconds: int = 30):
         "copy",
         output_video,
     ]
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, stage="trim")
 
 
-def add_watermark(
-    input_video: str,
-    output_video: str,
-    watermark_path: str,
-    position: str = "top-right",
-    margin: int = 10,
-):
+def _overlay_position(position: str, margin: int) -> str:
     pos_map = {
         "top-left": f"{margin}:{margin}",
         "top-right": f"W-w-{margin}:{margin}",
@@ -34,7 +186,17 @@ def add_watermark(
         "bottom-right": f"W-w-{margin}:H-h-{margin}",
         "center": "(W-w)/2:(H-h)/2",
     }
-    overlay = pos_map.get(position, pos_map["top-right"])
+    return pos_map.get(position, pos_map["top-right"])
+
+
+def add_watermark(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    position: str = "top-right",
+    margin: int = 10,
+):
+    overlay = _overlay_position(position, margin)
     cmd = [
         "ffmpeg",
         "-y",
@@ -54,7 +216,7 @@ def add_watermark(
         "copy",
         output_video,
     ]
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, stage="watermark")
 
 
 def scale_to_720p(input_video: str, output_video: str, fps: int = 30):
@@ -76,7 +238,7 @@ def scale_to_720p(input_video: str, output_video: str, fps: int = 30):
         "copy",
         output_video,
     ]
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, stage="scale")
 
 
 def remove_audio(input_video: str, output_video: str, reencode: bool = False):
@@ -106,7 +268,7 @@ def remove_audio(input_video: str, output_video: str, reencode: bool = False):
             "-an",
             output_video,
         ]
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, stage="remove_audio")
 
 
 def add_image_intro_outro(
@@ -129,7 +291,7 @@ def add_image_intro_outro(
         mid_with_audio = Path(td) / "mid_with_audio.mp4"
 
         # intro
-        subprocess.run(
+        run_ffmpeg(
             [
                 "ffmpeg",
                 "-y",
@@ -159,11 +321,11 @@ def add_image_intro_outro(
                 "-shortest",
                 str(intro),
             ],
-            check=True,
+            stage="intro",
         )
 
         # outro
-        subprocess.run(
+        run_ffmpeg(
             [
                 "ffmpeg",
                 "-y",
@@ -193,11 +355,11 @@ def add_image_intro_outro(
                 "-shortest",
                 str(outro),
             ],
-            check=True,
+            stage="outro",
         )
 
         # garantizar que el segmento medio tenga una pista de audio (silencio)
-        subprocess.run(
+        run_ffmpeg(
             [
                 "ffmpeg",
                 "-y",
@@ -214,11 +376,11 @@ def add_image_intro_outro(
                 "aac",
                 str(mid_with_audio),
             ],
-            check=True,
+            stage="silence",
         )
 
         # concat intro + video (con audio silencioso) + outro
-        subprocess.run(
+        run_ffmpeg(
             [
                 "ffmpeg",
                 "-y",
@@ -245,5 +407,512 @@ def add_image_intro_outro(
                 "-shortest",
                 str(out),
             ],
-            check=True,
+            stage="concat",
+        )
+
+
+def process_step_by_step(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    image_path: str,
+    workdir: str,
+    seconds: int = 30,
+):
+    """
+    Pipeline original: una invocacion de ffmpeg por etapa con archivos
+    intermedios. Se conserva como fallback del pipeline fusionado.
+    """
+    wd = Path(workdir)
+    trimmed = wd / "trimmed.mp4"
+    v720 = wd / "v720.mp4"
+    muted = wd / "muted.mp4"
+    wm = wd / "wm.mp4"
+
+    trim_to_seconds(input_video, str(trimmed), seconds=seconds)
+    scale_to_720p(str(trimmed), str(v720))
+    remove_audio(str(v720), str(muted), reencode=False)
+    add_watermark(str(muted), str(wm), watermark_path=watermark_path)
+    add_image_intro_outro(image_path, str(wm), output_video)
+
+
+def _fit_filter(profile: EncodeProfile, plan=None) -> str:
+    """
+    Filtro para llevar una entrada al tamano/fps del perfil. Con un plan
+    (ver planner.plan_pipeline) se omiten los pasos que la entrada no necesita.
+    """
+    w, h = profile.width, profile.height
+    steps = []
+    if plan is None or plan.scale:
+        steps += [
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease",
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2",
+        ]
+    steps.append("setsar=1")
+    if plan is None or plan.fps:
+        steps.append(f"fps={profile.fps}")
+    steps.append(f"format={profile.pix_fmt}")
+    return ",".join(steps)
+
+
+def _trim_args(seconds: int, plan=None) -> list[str]:
+    if plan is not None and not plan.trim:
+        return []
+    return ["-t", str(seconds)]
+
+
+def build_fused_command(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    image_path: str,
+    *,
+    seconds: int = 30,
+    intro_seconds: int = 3,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+    position: str = "top-right",
+    margin: int = 10,
+    plan=None,
+    threads: int | None = None,
+) -> list[str]:
+    """
+    Construye un unico comando ffmpeg con un filter_complex que hace
+    recorte -> escala/fps -> marca de agua -> concat con intro/outro, y
+    agrega una pista de silencio. El video se codifica una sola vez.
+    """
+    overlay = _overlay_position(position, margin)
+    graph = ";".join(
+        [
+            f"[0:v]{_fit_filter(profile, plan)}[body]",
+            f"[body][1:v]overlay={overlay},format={profile.pix_fmt}[wm]",
+            f"[2:v]{_fit_filter(profile)},split=2[intro][outro]",
+            "[intro][wm][outro]concat=n=3:v=1:a=0[v]",
+        ]
+    )
+    return [
+        "ffmpeg",
+        "-y",
+        *_trim_args(seconds, plan),
+        "-i",
+        input_video,
+        "-i",
+        watermark_path,
+        "-loop",
+        "1",
+        "-framerate",
+        str(profile.fps),
+        "-t",
+        str(intro_seconds),
+        "-i",
+        image_path,
+        "-f",
+        "lavfi",
+        "-i",
+        profile.silence_source(),
+        "-filter_complex",
+        graph,
+        "-map",
+        "[v]",
+        "-map",
+        "3:a",
+        *profile.video_args(),
+        *profile.audio_args(),
+        *_thread_args(threads),
+        "-shortest",
+        *_mp4_output_args(output_video),
+    ]
+
+
+def process_fused(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    image_path: str,
+    seconds: int = 30,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+    sink=None,
+    plan=None,
+    threads: int | None = None,
+):
+    if sink is not None:
+        output_video = STREAM_OUTPUT
+    else:
+        Path(output_video).parent.mkdir(parents=True, exist_ok=True)
+    cmd = build_fused_command(
+        input_video,
+        output_video,
+        watermark_path,
+        image_path,
+        seconds=seconds,
+        profile=profile,
+        plan=plan,
+        threads=threads,
+    )
+    run_ffmpeg(cmd, sink=sink, stage="fused")
+
+
+def encode_image_segment(
+    image_path: str,
+    output_video: str,
+    seconds: int = 3,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+):
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-loop",
+            "1",
+            "-framerate",
+            str(profile.fps),
+            "-t",
+            str(seconds),
+            "-i",
+            image_path,
+            "-f",
+            "lavfi",
+            "-t",
+            str(seconds),
+            "-i",
+            profile.silence_source(),
+            "-vf",
+            _fit_filter(profile),
+            *profile.video_args(),
+            *profile.audio_args(),
+            "-shortest",
+            "-f",
+            "mp4",
+            output_video,
+        ],
+        stage="image_segment",
+    )
+
+
+def _body_graph(profile: EncodeProfile, position: str, margin: int, plan=None) -> str:
+    overlay = _overlay_position(position, margin)
+    return (
+        f"[0:v]{_fit_filter(profile, plan)}[body];"
+        f"[body][1:v]overlay={overlay},format={profile.pix_fmt}[v]"
+    )
+
+
+def _thread_args(threads: int | None) -> list[str]:
+    if not threads:
+        return []
+    return ["-threads", str(threads), "-filter_threads", str(threads)]
+
+
+def encode_body_segment(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    seconds: int = 30,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+    position: str = "top-right",
+    margin: int = 10,
+    threads: int | None = None,
+    plan=None,
+):
+    """
+    Recorta, escala y marca el video del usuario con los mismos parametros
+    que los segmentos de intro/outro, reemplazando su audio por silencio.
+    """
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            *_trim_args(seconds, plan),
+            "-i",
+            input_video,
+            "-i",
+            watermark_path,
+            "-f",
+            "lavfi",
+            "-i",
+            profile.silence_source(),
+            "-filter_complex",
+            _body_graph(profile, position, margin, plan),
+            "-map",
+            "[v]",
+            "-map",
+            "2:a",
+            *profile.video_args(),
+            *_thread_args(threads),
+            *profile.audio_args(),
+            "-shortest",
+            output_video,
+        ],
+        stage="encode_body",
+    )
+
+
+def split_on_keyframes(
+    input_video: str,
+    out_dir: str,
+    seconds: int = 30,
+    chunk_seconds: int = 5,
+    plan=None,
+) -> list[Path]:
+    """
+    Corta el video (sin re-codificar) en fragmentos que empiezan en un
+    keyframe. El muxer segment solo corta en keyframes cuando se copia el
+    stream, asi que la union posterior es exacta.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            *_trim_args(seconds, plan),
+            "-i",
+            input_video,
+            "-map",
+            "0:v:0",
+            "-c",
+            "copy",
+            "-f",
+            "segment",
+            "-segment_time",
+            str(chunk_seconds),
+            "-reset_timestamps",
+            "1",
+            str(out / "chunk_%03d.mp4"),
+        ],
+        stage="split",
+    )
+    return sorted(out.glob("chunk_*.mp4"))
+
+
+def _encode_chunk(
+    chunk: Path,
+    output_video: Path,
+    watermark_path: str,
+    profile: EncodeProfile,
+    position: str,
+    margin: int,
+    threads: int,
+    plan=None,
+) -> Path:
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(chunk),
+            "-i",
+            watermark_path,
+            "-filter_complex",
+            _body_graph(profile, position, margin, plan),
+            "-map",
+            "[v]",
+            *profile.video_args(),
+            *_thread_args(threads),
+            "-an",
+            str(output_video),
+        ],
+        stage="encode_chunk",
+    )
+    return output_video
+
+
+def encode_body_parallel(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    workdir: str,
+    seconds: int = 30,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+    workers: int = 2,
+    chunk_seconds: int = 5,
+    cpu_count: int | None = None,
+    position: str = "top-right",
+    margin: int = 10,
+    plan=None,
+    thread_budget=None,
+):
+    """
+    Variante de encode_body_segment que codifica en paralelo fragmentos
+    alineados a keyframes. Cada fragmento corre en su propio proceso ffmpeg
+    con un presupuesto de hilos de cpu_count // workers; con thread_budget
+    (callable, p. ej. JobSlots.current_budget) se recalcula al iniciar cada
+    fragmento.
+
+    Los fragmentos se orquestan con un pool de hilos y no de procesos: cada
+    hilo solo espera a su subproceso ffmpeg, asi que el GIL no limita el
+    paralelismo, y un ProcessPoolExecutor no puede crear hijos dentro de los
+    procesos daemon del prefork de Celery.
+    """
+    wd = Path(workdir)
+    chunks = split_on_keyframes(
+        input_video,
+        str(wd / "chunks"),
+        seconds=seconds,
+        chunk_seconds=chunk_seconds,
+        plan=plan,
+    )
+    cores = cpu_count or os.cpu_count() or 1
+    threads = max(1, cores // max(1, workers))
+
+    def chunk_threads() -> int:
+        if thread_budget is None:
+            return threads
+        return max(1, thread_budget() // max(1, workers))
+
+    encoded_dir = wd / "encoded"
+    encoded_dir.mkdir(parents=True, exist_ok=True)
+
+    # Cada fragmento corre en una copia del contexto de este hilo (no del
+    # hilo del pool, que esta vacio) para conservar el ProgressReporter
+    # activo; una copia por fragmento porque un Context no admite run
+    # concurrentes.
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        encoded = list(
+            pool.map(
+                lambda c: ctx.copy().run(
+                    _encode_chunk,
+                    c,
+                    encoded_dir / c.name,
+                    watermark_path,
+                    profile,
+                    position,
+                    margin,
+                    chunk_threads(),
+                    plan,
+                ),
+                chunks,
+            )
+        )
+
+    video_only = wd / "body_video.mp4"
+    concat_copy([str(p) for p in encoded], str(video_only))
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(video_only),
+            "-f",
+            "lavfi",
+            "-i",
+            profile.silence_source(),
+            "-map",
+            "0:v",
+            "-map",
+            "1:a",
+            "-c:v",
+            "copy",
+            *profile.audio_args(),
+            "-shortest",
+            output_video,
+        ],
+        stage="mux_silence",
+    )
+
+
+def concat_copy(segments: list[str], output_video: str, sink=None):
+    """
+    Une segmentos con parametros identicos usando el demuxer concat, sin
+    volver a codificar.
+    """
+    if sink is not None:
+        output_video = STREAM_OUTPUT
+    else:
+        Path(output_video).parent.mkdir(parents=True, exist_ok=True)
+    fd, list_path = tempfile.mkstemp(suffix=".concat.txt")
+    with os.fdopen(fd, "w") as list_file:
+        list_file.write(
+            "".join(f"file '{Path(seg).resolve()}'\n" for seg in segments)
+        )
+    try:
+        run_ffmpeg(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path,
+                "-c",
+                "copy",
+                *_mp4_output_args(output_video),
+            ],
+            sink=sink,
+            stage="concat",
         )
+    finally:
+        os.remove(list_path)
+
+
+def process_with_cached_segments(
+    input_video: str,
+    output_video: str,
+    watermark_path: str,
+    image_path: str,
+    cache,
+    workdir: str,
+    seconds: int = 30,
+    intro_seconds: int = 3,
+    profile: EncodeProfile = DEFAULT_PROFILE,
+    parallel_workers: int = 0,
+    chunk_seconds: int = 5,
+    sink=None,
+    plan=None,
+    threads: int | None = None,
+    checkpoints=None,
+    thread_budget=None,
+):
+    """
+    Codifica solo el cuerpo del video y lo une por stream copy con la
+    intro/outro tomada del SegmentCache (se codifica una vez por perfil).
+    Con parallel_workers > 1 el cuerpo se codifica por fragmentos en paralelo,
+    repartiendo threads (o todos los nucleos si es None) entre los fragmentos.
+    Con checkpoints (JobCheckpoints) el cuerpo codificado se conserva entre
+    reintentos de la tarea. Con sink solo la concatenacion final se emite por
+    el sink: el cuerpo se codifica antes a un archivo local, asi que la subida
+    se solapa con el stream copy y no con la codificacion (eso solo ocurre en
+    el pipeline fused).
+    """
+    key = cache.key_for(image_path, intro_seconds, profile)
+    segment = cache.get_or_create(
+        key,
+        lambda tmp: encode_image_segment(
+            image_path, str(tmp), seconds=intro_seconds, profile=profile
+        ),
+    )
+
+    def encode_body(body: Path):
+        if parallel_workers > 1:
+            encode_body_parallel(
+                input_video,
+                str(body),
+                watermark_path,
+                workdir=workdir,
+                seconds=seconds,
+                profile=profile,
+                workers=parallel_workers,
+                chunk_seconds=chunk_seconds,
+                cpu_count=threads,
+                plan=plan,
+                thread_budget=thread_budget,
+            )
+        else:
+            encode_body_segment(
+                input_video,
+                str(body),
+                watermark_path,
+                seconds=seconds,
+                profile=profile,
+                threads=threads,
+                plan=plan,
+            )
+
+    if checkpoints is not None:
+        body = checkpoints.run("body", encode_body)
+    else:
+        body = Path(workdir) / "body.mp4"
+        encode_body(body)
+    concat_copy([str(segment), str(body), str(segment)], output_video, sink=sink)
@@ -0,0 +1,457 @@
+"""
+Buffer write-behind de votos (VOTE_WRITE_BEHIND = local | redis).
+
+Con un video viral cada voto es un commit sincrono que actualiza las mismas
+filas (videos.votes_count, user_vote_totals del dueno). En modo
+write-behind el voto se deduplica y se acepta contra un store rapido y un
+hilo de cada proceso (VoteFlusher) lo lleva a votes en lotes multi-fila,
+cada VOTE_BUFFER_FLUSH_INTERVAL_SECONDS o al juntar
+VOTE_BUFFER_FLUSH_SIZE pendientes:
+
+  - redis: SADD en votes:voters:{video} para deduplicar y RPUSH en
+    votes:pending. Cualquier proceso puede vaciar la lista; un lock en
+    Redis hace que solo uno lo haga a la vez.
+  - local: set y deque en memoria mas un journal por proceso en
+    VOTE_BUFFER_JOURNAL_DIR (un solo nodo). Sin VOTE_BUFFER_JOURNAL_FSYNC
+    el journal sobrevive a la caida del proceso pero no a la de la maquina.
+
+Los votos solo salen del buffer despues del commit del lote, y el insert es
+ON CONFLICT DO NOTHING con contadores sumados solo por filas insertadas, asi
+que repetir un lote no cuenta doble. Eso es la recuperacion ante caidas: lo
+que no se confirmo sigue en votes:pending o en el journal del proceso muerto
+y se vuelve a vaciar (recover() al arrancar).
+
+Mientras tanto los contadores y el listado publico van atrasados a lo sumo
+un intervalo de flush.
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter as Tally
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.leaderboard import bump_owner_total, bump_video_count
+from app.core.public_catalog import mark_catalog_changed
+from app.models import User, Video, Vote
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = Histogram(
+    "vote_buffer_flush_batch_size",
+    "Votos por lote llevado a la base de datos",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+FLUSH_LAG_SECONDS = Histogram(
+    "vote_buffer_flush_lag_seconds",
+    "Tiempo desde que se acepto el voto mas antiguo del lote hasta su commit",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+FLUSH_FAILURES = Counter(
+    "vote_buffer_flush_failures_total",
+    "Lotes que fallaron al escribirse (quedan en el buffer para reintentar)",
+)
+
+PENDING_KEY = "votes:pending"
+LOCK_KEY = "votes:flush:lock"
+VOTERS_TTL_SECONDS = 24 * 3600
+
+# recorta los votos escritos solo si el lock sigue siendo de este proceso; si
+# expiro, otro pudo tomar la misma cabeza y recortar de nuevo perderia votos
+TRIM_IF_OWNER = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('ltrim', KEYS[2], ARGV[2], -1)
+    redis.call('del', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+class PendingVote(NamedTuple):
+    user_id: int
+    video_id: int  # videos.id
+    accepted_at: float  # epoch
+
+    def encode(self) -> str:
+        return f"{self.user_id} {self.video_id} {self.accepted_at}"
+
+    @classmethod
+    def decode(cls, raw: str) -> "PendingVote":
+        user_id, video_id, accepted_at = raw.split()
+        return cls(int(user_id), int(video_id), float(accepted_at))
+
+
+def already_voted(db: Session, user_id: int, video_db_id: int) -> bool:
+    return db.scalar(
+        select(
+            exists().where(Vote.user_id == user_id, Vote.video_id == video_db_id)
+        )
+    )
+
+
+def write_votes(db: Session, batch: list[PendingVote]) -> int:
+    """
+    Inserta el lote y suma los contadores por las filas nuevas; devuelve
+    cuantas se insertaron. Descarta votos cuyo video o usuario ya no
+    existe. El llamador hace commit.
+    """
+    videos = set(
+        db.scalars(select(Video.id).where(Video.id.in_({v.video_id for v in batch})))
+    )
+    users = set(
+        db.scalars(select(User.id).where(User.id.in_({v.user_id for v in batch})))
+    )
+    rows = {
+        (v.user_id, v.video_id): {
+            "user_id": v.user_id,
+            "video_id": v.video_id,
+            "created_at": datetime.fromtimestamp(v.accepted_at, timezone.utc),
+        }
+        for v in batch
+        if v.video_id in videos and v.user_id in users
+    }
+    if not rows:
+        return 0
+    votes = Vote.__table__
+    inserted = db.execute(
+        pg_insert(votes)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=[votes.c.user_id, votes.c.video_id])
+        .returning(votes.c.video_id)
+    ).scalars()
+    per_video = Tally(inserted)
+    connection = db.connection()
+    for video_db_id, amount in sorted(per_video.items()):
+        bump_video_count(connection, video_db_id, amount)
+        bump_owner_total(connection, video_db_id, amount)
+    if per_video:
+        mark_catalog_changed(db)
+    return sum(per_video.values())
+
+
+class LocalVoteBuffer:
+    """Buffer en memoria del proceso con journal append-only para recuperar."""
+
+    def __init__(self, journal_dir: str, fsync: bool = False):
+        self.journal_dir = Path(journal_dir)
+        self.fsync = fsync
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._pending: deque[PendingVote] = deque()
+        self._claimed: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+        self._journal = None
+
+    def _open_journal(self):
+        # el flock exclusivo marca el journal como de un proceso vivo
+        if self._journal is None:
+            path = self.journal_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.log"
+            self._journal = open(path, "a+")
+            fcntl.flock(self._journal, fcntl.LOCK_EX)
+        return self._journal
+
+    def claim(self, user_id: int, video_db_id: int) -> bool:
+        with self._lock:
+            if (user_id, video_db_id) in self._claimed:
+                return False
+            self._claimed.add((user_id, video_db_id))
+            return True
+
+    def release(self, user_id: int, video_db_id: int) -> None:
+        with self._lock:
+            self._claimed.discard((user_id, video_db_id))
+
+    def push(self, vote: PendingVote) -> int:
+        with self._lock:
+            journal = self._open_journal()
+            journal.write(vote.encode() + "\n")
+            journal.flush()
+            if self.fsync:
+                os.fsync(journal.fileno())
+            self._pending.append(vote)
+            return len(self._pending)
+
+    def take(self, limit: int) -> list[PendingVote]:
+        with self._lock:
+            return [self._pending[i] for i in range(min(limit, len(self._pending)))]
+
+    def done(self, batch: list[PendingVote]) -> None:
+        with self._lock:
+            for _ in batch:
+                vote = self._pending.popleft()
+                self._claimed.discard((vote.user_id, vote.video_id))
+            if self._journal is not None:
+                self._compact()
+
+    def _compact(self) -> None:
+        """
+        Deja en el journal solo lo pendiente. Con pendientes se escribe un
+        journal nuevo, se bloquea y se renombra encima del actual: en todo
+        momento el archivo en disco contiene al menos lo no confirmado.
+        """
+        if not self._pending:
+            self._journal.truncate(0)
+            return
+        path = Path(self._journal.name)
+        tmp = path.with_name(path.name + ".tmp")
+        journal = open(tmp, "w+")
+        fcntl.flock(journal, fcntl.LOCK_EX)
+        journal.writelines(vote.encode() + "\n" for vote in self._pending)
+        journal.flush()
+        if self.fsync:
+            os.fsync(journal.fileno())
+        try:
+            os.rename(tmp, path)
+        except FileNotFoundError:
+            # otro proceso limpio el .tmp antes del flock: el journal actual
+            # sigue completo y se compacta en el proximo lote
+            journal.close()
+            return
+        self._journal.close()
+        self._journal = journal
+
+    def abort(self) -> None:
+        pass
+
+    def orphaned(self) -> list[tuple[Path, list[PendingVote]]]:
+        """Journals de procesos que ya no existen (su flock esta libre)."""
+        for path in self.journal_dir.glob("*.log.tmp"):
+            # compactacion interrumpida: el .log original sigue completo
+            with open(path) as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                path.unlink(missing_ok=True)
+        found = []
+        for path in sorted(self.journal_dir.glob("*.log")):
+            if self._journal is not None and path == Path(self._journal.name):
+                continue
+            with open(path) as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                        # su dueno lo compacto mientras tanto: sigue vivo
+                        continue
+                except FileNotFoundError:
+                    continue
+                votes = []
+                for line in f:
+                    try:
+                        votes.append(PendingVote.decode(line))
+                    except ValueError:
+                        # linea a medio escribir al caerse el proceso
+                        continue
+                found.append((path, votes))
+        return found
+
+
+class RedisVoteBuffer:
+    """Set de votantes por video y lista compartida de pendientes en Redis."""
+
+    def __init__(self, url: str, lock_seconds: int):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.lock_seconds = lock_seconds
+        self._token = uuid.uuid4().hex
+        self._trim_if_owner = self.client.register_script(TRIM_IF_OWNER)
+
+    @staticmethod
+    def _voters_key(video_db_id: int) -> str:
+        return f"votes:voters:{video_db_id}"
+
+    def claim(self, user_id: int, video_db_id: int) -> bool:
+        key = self._voters_key(video_db_id)
+        pipe = self.client.pipeline()
+        pipe.sadd(key, user_id)
+        pipe.expire(key, VOTERS_TTL_SECONDS)
+        added, _ = pipe.execute()
+        return bool(added)
+
+    def release(self, user_id: int, video_db_id: int) -> None:
+        self.client.srem(self._voters_key(video_db_id), user_id)
+
+    def push(self, vote: PendingVote) -> int:
+        return self.client.rpush(PENDING_KEY, vote.encode())
+
+    def take(self, limit: int) -> list[PendingVote]:
+        # solo el dueno del lock lee y recorta la cabeza de la lista
+        if not self.client.set(LOCK_KEY, self._token, nx=True, ex=self.lock_seconds):
+            return []
+        raw = self.client.lrange(PENDING_KEY, 0, limit - 1)
+        return [PendingVote.decode(item.decode()) for item in raw]
+
+    def done(self, batch: list[PendingVote]) -> None:
+        if not self._trim_if_owner(keys=[LOCK_KEY, PENDING_KEY], args=[self._token, len(batch)]):
+            logger.warning("vote buffer: lock expirado, el lote se reescribira")
+
+    def abort(self) -> None:
+        self._trim_if_owner(keys=[LOCK_KEY, PENDING_KEY], args=[self._token, 0])
+
+    def orphaned(self) -> list:
+        # lo no confirmado sigue en votes:pending y lo vacia cualquier flush
+        return []
+
+
+def flush_once(buffer, session_factory, limit: int) -> int:
+    """Lleva a la base a lo sumo `limit` votos pendientes; devuelve cuantos tomo."""
+    batch = buffer.take(limit)
+    if not batch:
+        buffer.abort()
+        return 0
+    db = session_factory()
+    try:
+        write_votes(db, batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        buffer.abort()
+        FLUSH_FAILURES.inc()
+        raise
+    finally:
+        db.close()
+    buffer.done(batch)
+    FLUSH_BATCH_SIZE.observe(len(batch))
+    FLUSH_LAG_SECONDS.observe(time.time() - min(v.accepted_at for v in batch))
+    return len(batch)
+
+
+def recover(buffer, session_factory, limit: int) -> int:
+    """Reescribe los votos que un proceso caido no alcanzo a confirmar."""
+    replayed = 0
+    for path, votes in buffer.orphaned():
+        for start in range(0, len(votes), limit):
+            db = session_factory()
+            try:
+                write_votes(db, votes[start : start + limit])
+                db.commit()
+            finally:
+                db.close()
+        path.unlink(missing_ok=True)
+        replayed += len(votes)
+    if replayed:
+        logger.info("vote buffer: %s votos recuperados de journals", replayed)
+    return replayed
+
+
+class VoteFlusher(threading.Thread):
+    """Vacia el buffer cada `interval` segundos o cuando se llama trigger()."""
+
+    def __init__(self, buffer, session_factory, interval: float, batch_size: int):
+        super().__init__(name="vote-flusher", daemon=True)
+        self.buffer = buffer
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def trigger(self) -> None:
+        self._wake.set()
+
+    def drain(self) -> None:
+        while flush_once(self.buffer, self.session_factory, self.batch_size) == (
+            self.batch_size
+        ):
+            pass
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("vote buffer: fallo el flush, se reintenta")
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout=self.interval + 5)
+        try:
+            self.drain()
+        except Exception:
+            logger.exception("vote buffer: no se pudo vaciar al detener")
+
+
+_buffer = None
+_flusher: VoteFlusher | None = None
+
+
+def get_vote_buffer():
+    """Buffer segun VOTE_WRITE_BEHIND (local | redis | off); None si no aplica."""
+    global _buffer
+    if _buffer is None:
+        mode = settings.VOTE_WRITE_BEHIND
+        if mode == "redis" and settings.REDIS_URL:
+            _buffer = RedisVoteBuffer(
+                settings.REDIS_URL,
+                lock_seconds=max(30, int(settings.VOTE_BUFFER_FLUSH_INTERVAL_SECONDS * 10)),
+            )
+        elif mode == "local":
+            _buffer = LocalVoteBuffer(
+                settings.VOTE_BUFFER_JOURNAL_DIR, fsync=settings.VOTE_BUFFER_JOURNAL_FSYNC
+            )
+        else:
+            _buffer = False
+    return _buffer or None
+
+
+def buffer_vote(db: Session, user_id: int, video_db_id: int) -> bool:
+    """
+    Acepta el voto en el buffer; False si el usuario ya habia votado (en el
+    buffer o en votes).
+    """
+    buffer = get_vote_buffer()
+    if not buffer.claim(user_id, video_db_id):
+        return False
+    if already_voted(db, user_id, video_db_id):
+        buffer.release(user_id, video_db_id)
+        return False
+    try:
+        pending = buffer.push(PendingVote(user_id, video_db_id, time.time()))
+    except Exception:
+        buffer.release(user_id, video_db_id)
+        raise
+    if pending >= settings.VOTE_BUFFER_FLUSH_SIZE and _flusher is not None:
+        _flusher.trigger()
+    return True
+
+
+def start_vote_flusher(session_factory) -> VoteFlusher | None:
+    global _flusher
+    buffer = get_vote_buffer()
+    if buffer is None or _flusher is not None:
+        return _flusher
+    recover(buffer, session_factory, settings.VOTE_BUFFER_FLUSH_SIZE)
+    _flusher = VoteFlusher(
+        buffer,
+        session_factory,
+        settings.VOTE_BUFFER_FLUSH_INTERVAL_SECONDS,
+        settings.VOTE_BUFFER_FLUSH_SIZE,
+    )
+    _flusher.start()
+    return _flusher
+
+
+def stop_vote_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
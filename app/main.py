@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.exception_handlers import request_validation_exception_handler
@@ -7,8 +9,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 from app.api.routes import auth, public, videos
+from app.core.database import SessionLocal
+from app.core.vote_buffer import start_vote_flusher, stop_vote_flusher
 
-app = FastAPI(title="API", description="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # con VOTE_WRITE_BEHIND tambien reescribe lo que dejo un proceso caido
+    await asyncio.to_thread(start_vote_flusher, SessionLocal)
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(stop_vote_flusher)
+
+
+app = FastAPI(title="API", description="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,7 +1,8 @@
-from app.models.models import User, Video, VideoStatus, Vote
+from app.models.models import User, UserVoteTotal, Video, VideoStatus, Vote
 
 __all__ = [
     "User",
+    "UserVoteTotal",
     "Video",
     "Vote",
     "VideoStatus",
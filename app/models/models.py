@@ -1,7 +1,19 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -11,6 +23,7 @@ UTC = timezone.utc
 
 
 class VideoStatus(enum.Enum):
+    pending_upload = "pending_upload"
     uploaded = "uploaded"
     processing = "processing"
     done = "done"
@@ -46,13 +59,34 @@ class Video(Base):
     task_id = Column(String(128))
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_public = Column(Boolean, default=False)
+    processing_info = Column(JSON)
+    progress = Column(JSON)
+    size_bytes = Column(BigInteger)
+    duration_seconds = Column(Float)
+    content_hash = Column(String(64), index=True)
+    pipeline_version = Column(String(32))
+    upload_id = Column(String(1024))
+    votes_count = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="videos")
     votes = relationship("Vote", back_populates="video", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # keyset de /api/public/videos
+        Index(
+            "ix_videos_public_listing",
+            updated_at.desc(),
+            id.desc(),
+            postgresql_where=(is_public.is_(True)) & (status == "done"),
+        ),
+    )
+
 
 class Vote(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        UniqueConstraint("user_id", "video_id", name="uq_votes_user_video"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False)
@@ -62,6 +96,22 @@ class Vote(Base):
     video = relationship("Video", back_populates="votes")
 
 
+class UserVoteTotal(Base):
+    """Votos acumulados por usuario en videos publicos (ranking)."""
+
+    __tablename__ = "user_vote_totals"
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    city = Column(String(255))
+    votes = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_user_vote_totals_rank", votes.desc(), user_id),
+        Index("ix_user_vote_totals_city_rank", city, votes.desc(), user_id),
+    )
+
+
 class test(Base):
     __tablename__ = "test"
     id = Column(Integer, primary_key=True)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput de un endpoint autenticado con y sin cache de principal.
+
+Registra un usuario, inicia sesion y lanza --concurrency clientes contra
+GET /api/videos durante --seconds. Se corre una vez por configuracion del
+API (reiniciandolo con otras variables de entorno) y se etiqueta con
+--label, por ejemplo:
+
+    AUTH_CACHE_ENABLED=false -> --label sin_cache
+    AUTH_CACHE_ENABLED=true  -> --label cache_local
+    AUTH_TRUST_TOKEN_CLAIMS=true -> --label claims_token
+"""
+
+import argparse
+import asyncio
+import csv
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    password = "BenchPassword123!"
+    email = f"bench_{uuid4().hex}@example.com"
+    await client.post(
+        "/api/auth/signup",
+        json={
+            "email": email,
+            "password1": password,
+            "password2": password,
+            "first_name": "Bench",
+            "last_name": "Auth",
+            "city": "Bogota",
+            "country": "CO",
+        },
+    )
+    r = await client.post("/api/auth/login", json={"email": email, "password": password})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def worker(client, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        r = await client.get("/api/videos", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if r.status_code != 200:
+            errors.append(r.status_code)
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.host, limits=limits, timeout=30) as client:
+        headers = {"Authorization": f"Bearer {await login(client)}"}
+        # calienta la cache y las conexiones
+        await client.get("/api/videos", headers=headers)
+        latencies: list[float] = []
+        errors: list[int] = []
+        start = time.perf_counter()
+        deadline = start + args.seconds
+        await asyncio.gather(
+            *(
+                worker(client, headers, deadline, latencies, errors)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "label": args.label,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache de principal autenticado")
+    parser.add_argument("--host", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--label", default="default")
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    row = asyncio.run(run(args))
+    print(
+        f"{row['label']}: {row['rps']} req/s, p50 {row['p50_ms']} ms, "
+        f"p95 {row['p95_ms']} ms, errores {row['errors']}/{row['requests']}"
+    )
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/auth_cache_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+        writer.writeheader()
+        writer.writerow(row)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
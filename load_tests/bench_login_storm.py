@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latencia de otros endpoints durante una rafaga de logins.
+
+Mide p50/p95 de GET /api/videos (autenticado) primero sin carga y luego
+mientras --login-concurrency clientes hacen login en bucle (lo que hace el
+on_start de locust al arrancar usuarios). Si bcrypt corre en el event loop
+el p95 se dispara durante la rafaga; con el executor dedicado deberia
+quedar cerca del de reposo.
+"""
+
+import argparse
+import asyncio
+import csv
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+PASSWORD = "BenchPassword123!"
+
+
+async def signup(client: httpx.AsyncClient) -> str:
+    email = f"bench_{uuid4().hex}@example.com"
+    r = await client.post(
+        "/api/auth/signup",
+        json={
+            "email": email,
+            "password1": PASSWORD,
+            "password2": PASSWORD,
+            "first_name": "Bench",
+            "last_name": "Login",
+            "city": "Bogota",
+            "country": "CO",
+        },
+    )
+    r.raise_for_status()
+    return email
+
+
+async def login(client: httpx.AsyncClient, email: str) -> str:
+    r = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def probe(client, headers, deadline, latencies):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/api/videos", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def login_loop(client, email, deadline, count):
+    while time.perf_counter() < deadline:
+        await login(client, email)
+        count.append(1)
+
+
+def summarize(phase: str, latencies: list[float], logins: int, seconds: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "phase": phase,
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 2),
+        "logins_per_s": round(logins / seconds, 1),
+    }
+
+
+async def run(args) -> list[dict]:
+    limits = httpx.Limits(max_connections=args.login_concurrency + args.probes + 1)
+    async with httpx.AsyncClient(base_url=args.host, limits=limits, timeout=60) as client:
+        email = await signup(client)
+        headers = {"Authorization": f"Bearer {await login(client, email)}"}
+
+        idle: list[float] = []
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            *(probe(client, headers, deadline, idle) for _ in range(args.probes))
+        )
+
+        storm: list[float] = []
+        logins: list[int] = []
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            *(probe(client, headers, deadline, storm) for _ in range(args.probes)),
+            *(
+                login_loop(client, email, deadline, logins)
+                for _ in range(args.login_concurrency)
+            ),
+        )
+
+    return [
+        summarize("reposo", idle, 0, args.seconds),
+        summarize("rafaga_login", storm, len(logins), args.seconds),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p95 de otros endpoints durante logins")
+    parser.add_argument("--host", default="http://localhost:8080")
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    print(f"\n{'fase':>14} {'req':>6} {'p50 ms':>9} {'p95 ms':>9} {'login/s':>8}")
+    for r in rows:
+        print(
+            f"{r['phase']:>14} {r['requests']:>6} {r['p50_ms']:>9} "
+            f"{r['p95_ms']:>9} {r['logins_per_s']:>8}"
+        )
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/login_storm_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
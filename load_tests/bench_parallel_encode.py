@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: codificacion serial vs. paralela por fragmentos (GOP-aligned).
+
+Para cada numero de nucleos se restringe la afinidad de CPU del proceso
+(los ffmpeg hijos la heredan) y se mide el tiempo de pared por video de
+encode_body_segment (serial) contra encode_body_parallel con tantos
+fragmentos en vuelo como nucleos.
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.core.utils import video_utils as vu
+
+WATERMARK = "assets/watermark.png"
+
+
+def create_source(path: Path, seconds: int, size: str, gop: int) -> Path:
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi",
+            "-i", f"testsrc2=duration={seconds}:size={size}:rate=30",
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-g", str(gop),
+            str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_serial(source: Path, workdir: Path, seconds: int) -> float:
+    out = workdir / "serial.mp4"
+    return timed(
+        lambda: vu.encode_body_segment(
+            str(source), str(out), WATERMARK, seconds=seconds
+        )
+    )
+
+
+def run_parallel(source: Path, workdir: Path, seconds: int, cores: int, chunk: int) -> float:
+    out = workdir / "parallel.mp4"
+    return timed(
+        lambda: vu.encode_body_parallel(
+            str(source),
+            str(out),
+            WATERMARK,
+            workdir=str(workdir / f"p{cores}"),
+            seconds=seconds,
+            workers=cores,
+            chunk_seconds=chunk,
+            cpu_count=cores,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs. parallel segment encoding")
+    parser.add_argument("--cores", default="1,2,4,8", help="Lista de nucleos a probar")
+    parser.add_argument("--seconds", type=int, default=30, help="Duracion del video fuente")
+    parser.add_argument("--size", default="1920x1080", help="Resolucion del video fuente")
+    parser.add_argument("--gop", type=int, default=60, help="Intervalo de keyframes del fuente")
+    parser.add_argument("--chunk-seconds", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=2, help="Repeticiones por medicion")
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    available = sorted(os.sched_getaffinity(0))
+    rows = []
+    with tempfile.TemporaryDirectory() as td:
+        workdir = Path(td)
+        source = create_source(workdir / "source.mp4", args.seconds, args.size, args.gop)
+
+        for cores in [int(c) for c in args.cores.split(",")]:
+            if cores > len(available):
+                print(f"Saltando {cores} nucleos: solo hay {len(available)} disponibles")
+                continue
+            os.sched_setaffinity(0, available[:cores])
+            serial = min(run_serial(source, workdir, args.seconds) for _ in range(args.repeat))
+            parallel = min(
+                run_parallel(source, workdir, args.seconds, cores, args.chunk_seconds)
+                for _ in range(args.repeat)
+            )
+            rows.append(
+                {
+                    "cores": cores,
+                    "serial_seconds": round(serial, 2),
+                    "parallel_seconds": round(parallel, 2),
+                    "speedup": round(serial / parallel, 2) if parallel else None,
+                }
+            )
+        os.sched_setaffinity(0, available)
+
+    print("\n=== Serial vs. paralelo (segundos por video) ===")
+    print(f"{'cores':>5} {'serial':>8} {'paralelo':>9} {'speedup':>8}")
+    for r in rows:
+        print(f"{r['cores']:>5} {r['serial_seconds']:>8} {r['parallel_seconds']:>9} {r['speedup']:>8}")
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/parallel_encode_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["cores", "serial_seconds", "parallel_seconds", "speedup"])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/public/rankings con agregacion sobre votes vs. user_vote_totals.
+
+Para cada escala siembra (dentro de una transaccion que se revierte al
+final) usuarios, un video publico por usuario y N votos con
+generate_series contra DATABASE_URL, reconstruye user_vote_totals y mide
+la mediana de:
+  - la consulta anterior (users JOIN videos LEFT JOIN votes GROUP BY +
+    ORDER BY count + OFFSET),
+  - ranking_page (primera pagina y una pagina profunda por cursor).
+
+Ejemplo (base de pruebas, no produccion):
+    PYTHONPATH=. python load_tests/bench_rankings.py --votes 10000,100000,1000000
+"""
+
+import argparse
+import csv
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.core.leaderboard import ranking_page, rebuild_vote_totals
+from app.models import User, Video, Vote
+
+
+def median_ms(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def seed(db: Session, votes: int) -> None:
+    users = max(100, votes // 1000)
+    db.execute(
+        text(
+            """
+            INSERT INTO users (email, first_name, last_name, city, country,
+                               hashed_password, is_active)
+            SELECT 'bench_' || g || '@example.com', 'Bench', 'User ' || g,
+                   'Ciudad ' || (g % 20), 'CO', 'x', true
+            FROM generate_series(1, :users) g
+            """
+        ),
+        {"users": users},
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO videos (video_id, title, status, user_id, is_public)
+            SELECT 'bench-' || u.id, 'Bench', 'done', u.id, true
+            FROM users u WHERE u.email LIKE 'bench_%'
+            """
+        )
+    )
+    db.execute(
+        text(
+            """
+            WITH v AS (
+                SELECT array_agg(id) AS ids FROM videos WHERE video_id LIKE 'bench-%'
+            ), u AS (
+                SELECT array_agg(id) AS ids FROM users WHERE email LIKE 'bench_%'
+            )
+            INSERT INTO votes (user_id, video_id, created_at)
+            SELECT u.ids[1 + (g % array_length(u.ids, 1))],
+                   v.ids[1 + ((g * 7919) % array_length(v.ids, 1))],
+                   now()
+            FROM generate_series(1, :votes) g, u, v
+            """
+        ),
+        {"votes": votes},
+    )
+    rebuild_vote_totals(db)
+
+
+def aggregate_page(db: Session, page: int, page_size: int = 50):
+    return (
+        db.query(
+            User.id,
+            User.first_name,
+            User.last_name,
+            User.city,
+            func.count(Vote.id).label("votes"),
+        )
+        .join(Video, and_(Video.user_id == User.id, Video.is_public))
+        .outerjoin(Vote, Vote.video_id == Video.id)
+        .group_by(User.id, User.first_name, User.last_name, User.city)
+        .order_by(func.count(Vote.id).desc(), User.id.asc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+
+
+def deep_cursor(db: Session, pages: int):
+    cursor = None
+    for _ in range(pages):
+        _, cursor = ranking_page(db, 50, cursor=cursor)
+    return cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking agregado vs. mantenido")
+    parser.add_argument("--votes", default="10000,100000,1000000")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--deep-page", type=int, default=20)
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    rows = []
+    for votes in (int(v) for v in args.votes.split(",")):
+        connection = engine.connect()
+        trans = connection.begin()
+        db = Session(bind=connection)
+        try:
+            seed(db, votes)
+            db.execute(text("ANALYZE users; ANALYZE videos; ANALYZE votes"))
+            cursor = deep_cursor(db, args.deep_page - 1)
+            rows.append(
+                {
+                    "votes": votes,
+                    "aggregate_first_ms": median_ms(
+                        lambda: aggregate_page(db, 1), args.repeats
+                    ),
+                    "aggregate_deep_ms": median_ms(
+                        lambda: aggregate_page(db, args.deep_page), args.repeats
+                    ),
+                    "totals_first_ms": median_ms(
+                        lambda: ranking_page(db, 50), args.repeats
+                    ),
+                    "totals_deep_ms": median_ms(
+                        lambda: ranking_page(db, 50, cursor=cursor), args.repeats
+                    ),
+                }
+            )
+        finally:
+            db.close()
+            trans.rollback()
+            connection.close()
+        print(rows[-1])
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/rankings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
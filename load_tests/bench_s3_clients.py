@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cliente boto3 nuevo por llamada vs. cliente compartido del proceso.
+
+Levanta un servidor moto local (o usa el endpoint de --endpoint) y mide por
+llamada generate_presigned_url y head_object creando el cliente en cada
+llamada (comportamiento anterior de _get_s3_client) contra get_s3_client(),
+que reutiliza cliente y pool de conexiones.
+"""
+
+import argparse
+import csv
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import boto3
+
+BUCKET = "bench-bucket"
+KEY = "uploads/bench.mp4"
+
+
+def per_call_ms(fn, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="boto3 client por llamada vs. compartido")
+    parser.add_argument("--calls", type=int, default=200, help="Llamadas por operacion")
+    parser.add_argument("--endpoint", default=None, help="Endpoint S3 (default: moto local)")
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+        server.start()
+        host, port = server.get_host_and_port()
+        endpoint = f"http://{host}:{port}"
+    # boto3 toma el endpoint de esta variable tanto en clientes nuevos como pooled
+    os.environ["AWS_ENDPOINT_URL_S3"] = endpoint
+
+    from app.core.config import settings
+    from app.core.storage import get_s3_client
+
+    region = settings.AWS_REGION or "us-east-1"
+    setup = boto3.client("s3", region_name=region)
+    setup.create_bucket(Bucket=BUCKET)
+    setup.put_object(Bucket=BUCKET, Key=KEY, Body=b"x" * 1024)
+
+    def fresh():
+        return boto3.client("s3", region_name=region)
+
+    def presign(client):
+        client.generate_presigned_url(
+            "get_object", Params={"Bucket": BUCKET, "Key": KEY}, ExpiresIn=3600
+        )
+
+    def head(client):
+        client.head_object(Bucket=BUCKET, Key=KEY)
+
+    get_s3_client(region)  # la primera creacion no cuenta
+    cases = {
+        "presigned_url": presign,
+        "head_object": head,
+    }
+    rows = []
+    for name, op in cases.items():
+        new = per_call_ms(lambda: op(fresh()), args.calls)
+        pooled = per_call_ms(lambda: op(get_s3_client(region)), args.calls)
+        rows.append(
+            {
+                "operation": name,
+                "new_client_ms": round(statistics.median(new), 3),
+                "pooled_client_ms": round(statistics.median(pooled), 3),
+                "saved_ms_per_call": round(
+                    statistics.median(new) - statistics.median(pooled), 3
+                ),
+            }
+        )
+
+    if server is not None:
+        server.stop()
+
+    print("\n=== Mediana por llamada (ms) ===")
+    print(f"{'operacion':>14} {'nuevo':>9} {'pooled':>9} {'ahorro':>9}")
+    for r in rows:
+        print(
+            f"{r['operation']:>14} {r['new_client_ms']:>9} "
+            f"{r['pooled_client_ms']:>9} {r['saved_ms_per_call']:>9}"
+        )
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/s3_clients_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark: S3Storage.save_async con archivo temporal (implementacion
+anterior) vs. streaming directo a multipart upload.
+
+Levanta un servidor moto en otro proceso (su memoria no cuenta en la
+medicion; o usa --endpoint) y simula un cliente que
+envia el cuerpo a --client-mbps. Mide por tamano la latencia de punta a punta
+(desde el primer chunk hasta que el objeto existe en S3) y el pico de
+memoria asignada por Python (tracemalloc) de cada implementacion.
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import aiofiles
+import boto3
+
+BUCKET = "bench-bucket"
+MB = 1024 * 1024
+CHUNK = 1024 * 1024
+
+
+async def client_body(size: int, mbps: float | None):
+    """Cuerpo de la peticion llegando en chunks de 1MB al ritmo del cliente."""
+    chunk = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        n = min(CHUNK, size - sent)
+        if mbps:
+            await asyncio.sleep(n / (mbps * MB))
+        sent += n
+        yield chunk[:n]
+
+
+async def save_with_temp_file(client, source, key: str) -> None:
+    """Implementacion anterior: spool a disco y upload_file al terminar."""
+    from app.core.storage import _write_stream_to_file, get_transfer_config
+
+    tmp_fd, tmp_path = tempfile.mkstemp()
+    os.close(tmp_fd)
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            await _write_stream_to_file(source, out, chunk_size=CHUNK, max_size=None)
+        await asyncio.to_thread(
+            client.upload_file, tmp_path, BUCKET, key, Config=get_transfer_config()
+        )
+    finally:
+        os.remove(tmp_path)
+
+
+async def save_streaming(client, source, key: str) -> None:
+    from app.core.storage import S3Storage
+
+    await S3Storage(bucket=BUCKET, upload_prefix="").save_async(source, key)
+
+
+def start_moto_server() -> tuple[subprocess.Popen, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def measure(fn, client, size: int, mbps: float | None, key: str):
+    tracemalloc.start()
+    started = time.perf_counter()
+    asyncio.run(fn(client, client_body(size, mbps), key))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="save_async: temp file vs streaming")
+    parser.add_argument("--sizes-mb", default="5,25,100", help="Tamanos a subir")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--client-mbps",
+        type=float,
+        default=50.0,
+        help="Ritmo de envio del cliente en MB/s (0 = sin limite)",
+    )
+    parser.add_argument("--endpoint", default=None, help="Endpoint S3 (default: moto local)")
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        server, endpoint = start_moto_server()
+    os.environ["AWS_ENDPOINT_URL_S3"] = endpoint
+
+    from app.core.config import settings
+    from app.core.storage import get_s3_client
+
+    region = settings.AWS_REGION or "us-east-1"
+    boto3.client("s3", region_name=region).create_bucket(Bucket=BUCKET)
+    client = get_s3_client(region)
+    mbps = args.client_mbps or None
+
+    rows = []
+    for size_mb in [float(s) for s in args.sizes_mb.split(",") if s]:
+        size = int(size_mb * MB)
+        for name, fn in (("temp_file", save_with_temp_file), ("streaming", save_streaming)):
+            samples = [
+                measure(fn, client, size, mbps, f"bench/{name}-{i}.bin")
+                for i in range(args.repeat)
+            ]
+            rows.append(
+                {
+                    "size_mb": size_mb,
+                    "implementation": name,
+                    "latency_s": round(statistics.median(s[0] for s in samples), 3),
+                    "peak_mem_mb": round(max(s[1] for s in samples) / MB, 1),
+                }
+            )
+
+    if server is not None:
+        server.terminate()
+        server.wait()
+
+    print(f"\n=== save_async (cliente a {args.client_mbps or 'sin limite'} MB/s) ===")
+    print(f"{'MB':>7} {'impl':>10} {'latencia s':>11} {'pico MB':>9}")
+    for r in rows:
+        print(
+            f"{r['size_mb']:>7} {r['implementation']:>10} "
+            f"{r['latency_s']:>11} {r['peak_mem_mb']:>9}"
+        )
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/s3_upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
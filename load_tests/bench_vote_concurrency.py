@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput de votos concurrentes, flujo anterior vs. cast_vote.
+
+Crea (con commit, prefijo bench_vote_) --voters usuarios y un video
+publico, y hace que todos voten por el mismo video desde --concurrency
+hilos, cada uno con su Session:
+  - anterior: SELECT video, SELECT voto existente, INSERT por el ORM y
+    commit (3 round-trips; con la restriccion unica, las carreras terminan
+    en IntegrityError en vez de en votos duplicados),
+  - cast_vote: un solo INSERT ... ON CONFLICT DO NOTHING RETURNING que
+    tambien suma los contadores.
+Cada voto se envia dos veces para medir tambien los duplicados. Al final
+borra lo sembrado.
+
+Ejemplo (base de pruebas, no produccion):
+    PYTHONPATH=. python load_tests/bench_vote_concurrency.py --concurrency 8,32,64
+"""
+
+import argparse
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import and_, text
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal, engine
+from app.core.leaderboard import cast_vote
+from app.models import Video, VideoStatus, Vote
+
+VIDEO_ID = "bench-vote"
+
+
+def seed(voters: int) -> list[int]:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO users (email, first_name, last_name, city, country,
+                                   hashed_password, is_active)
+                SELECT 'bench_vote_' || g || '@example.com', 'Bench', 'Vote',
+                       'Bogota', 'CO', 'x', true
+                FROM generate_series(0, :voters) g
+                """
+            ),
+            {"voters": voters},
+        )
+        ids = conn.execute(
+            text("SELECT id FROM users WHERE email LIKE 'bench_vote_%' ORDER BY id")
+        ).scalars().all()
+        conn.execute(
+            text(
+                """
+                INSERT INTO videos (video_id, title, status, user_id, is_public)
+                VALUES (:video_id, 'Bench', 'done', :owner, true)
+                """
+            ),
+            {"video_id": VIDEO_ID, "owner": ids[0]},
+        )
+    return ids[1:]
+
+
+def reset_votes() -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                DELETE FROM votes WHERE video_id IN
+                    (SELECT id FROM videos WHERE video_id = :video_id)
+                """
+            ),
+            {"video_id": VIDEO_ID},
+        )
+        conn.execute(
+            text("UPDATE videos SET votes_count = 0 WHERE video_id = :video_id"),
+            {"video_id": VIDEO_ID},
+        )
+        conn.execute(
+            text(
+                """
+                DELETE FROM user_vote_totals WHERE user_id IN
+                    (SELECT user_id FROM videos WHERE video_id = :video_id)
+                """
+            ),
+            {"video_id": VIDEO_ID},
+        )
+
+
+def cleanup() -> None:
+    reset_votes()
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM videos WHERE video_id = :video_id"),
+            {"video_id": VIDEO_ID},
+        )
+        conn.execute(text("DELETE FROM users WHERE email LIKE 'bench_vote_%'"))
+
+
+def legacy_vote(user_id: int) -> str:
+    db = SessionLocal()
+    try:
+        video = (
+            db.query(Video)
+            .filter(
+                and_(
+                    Video.video_id == VIDEO_ID,
+                    Video.is_public,
+                    Video.status == VideoStatus.done.value,
+                )
+            )
+            .first()
+        )
+        already = (
+            db.query(Vote)
+            .filter(and_(Vote.user_id == user_id, Vote.video_id == video.id))
+            .first()
+        )
+        if already:
+            return "duplicate"
+        db.add(Vote(user_id=user_id, video_id=video.id))
+        db.commit()
+        return "counted"
+    except IntegrityError:
+        db.rollback()
+        return "race"
+    finally:
+        db.close()
+
+
+def single_statement_vote(user_id: int) -> str:
+    db = SessionLocal()
+    try:
+        counted = cast_vote(db, user_id, VIDEO_ID)
+        db.commit()
+        return "counted" if counted else "duplicate"
+    finally:
+        db.close()
+
+
+def run(strategy, voters: list[int], concurrency: int) -> dict:
+    reset_votes()
+    attempts = voters + voters
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(strategy, attempts))
+    elapsed = time.perf_counter() - start
+    return {
+        "votes_per_s": round(len(attempts) / elapsed, 1),
+        "counted": outcomes.count("counted"),
+        "duplicates": outcomes.count("duplicate"),
+        "races": outcomes.count("race"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Votos concurrentes: anterior vs. cast_vote")
+    parser.add_argument("--voters", type=int, default=2000)
+    parser.add_argument("--concurrency", default="8,32,64")
+    parser.add_argument("--output-csv", default=None)
+    args = parser.parse_args()
+
+    rows = []
+    voters = seed(args.voters)
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            for name, strategy in (
+                ("anterior", legacy_vote),
+                ("cast_vote", single_statement_vote),
+            ):
+                rows.append(
+                    {
+                        "strategy": name,
+                        "concurrency": concurrency,
+                        **run(strategy, voters, concurrency),
+                    }
+                )
+                print(rows[-1])
+    finally:
+        cleanup()
+
+    output_csv = args.output_csv or (
+        f"./load_tests/results/vote_concurrency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV guardado en: {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import argparse
 import csv
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
-from statistics import mean, median
+from statistics import mean, median, quantiles
 from typing import Iterable, List
 
 from dotenv import load_dotenv
@@ -12,6 +13,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app.core.database import SessionLocal
+from app.core.routing import JOB_CLASSES, classify_job
 from app.models.models import Video, VideoStatus
 
 UTC = timezone.utc
@@ -36,6 +38,20 @@ def to_minutes(seconds: float) -> float:
     return seconds / 60.0
 
 
+def p95(values: List[float]) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return quantiles(values, n=20, method="inclusive")[18]
+
+
+def service_seconds(v: Video) -> float | None:
+    if v.uploaded_at and v.updated_at and v.updated_at >= v.uploaded_at:
+        return (v.updated_at - v.uploaded_at).total_seconds()
+    return None
+
+
 def compute_metrics_from_videos(videos: List[Video]) -> dict:
     total = len(videos)
     done = [v for v in videos if v.status == VideoStatus.done.value]
@@ -56,14 +72,30 @@ def compute_metrics_from_videos(videos: List[Video]) -> dict:
         throughput_videos_per_min = len(done) / elapsed_minutes if elapsed_minutes > 0 else None
 
     # "S" aproximado: (updated_at - uploaded_at) por video done
-    service_times_sec = []
-    for v in done:
-        if v.uploaded_at and v.updated_at and v.updated_at >= v.uploaded_at:
-            service_times_sec.append((v.updated_at - v.uploaded_at).total_seconds())
+    service_times_sec = [s for s in map(service_seconds, done) if s is not None]
 
     service_avg_s = mean(service_times_sec) if service_times_sec else None
     service_p50_s = median(service_times_sec) if service_times_sec else None
 
+    # tiempo hasta done por clase de enrutamiento (size_bytes / duration_seconds)
+    by_class = {}
+    for job_class in JOB_CLASSES:
+        times = [
+            s
+            for v in done
+            if classify_job(v.size_bytes, v.duration_seconds) == job_class
+            and (s := service_seconds(v)) is not None
+        ]
+        by_class[f"{job_class}_done"] = len(times)
+        by_class[f"{job_class}_avg_seconds"] = mean(times) if times else None
+        by_class[f"{job_class}_p95_seconds"] = p95(times)
+
+    # perfil elegido por el worker (ENCODING_ADAPTIVE), p. ej. "superfast:12,medium:3"
+    presets = Counter(
+        ((v.processing_info or {}).get("encoding") or {}).get("preset") for v in done
+    )
+    presets.pop(None, None)
+
     return {
         "total": total,
         "done": len(done),
@@ -75,6 +107,9 @@ def compute_metrics_from_videos(videos: List[Video]) -> dict:
         "throughput_videos_per_min": throughput_videos_per_min,
         "service_avg_seconds": service_avg_s,
         "service_p50_seconds": service_p50_s,
+        "service_p95_seconds": p95(service_times_sec),
+        **by_class,
+        "encoding_presets": ",".join(f"{p}:{n}" for p, n in presets.most_common()),
     }
 
 
@@ -150,6 +185,19 @@ def main():
         print(f"S p50:                {metrics['service_p50_seconds']:.2f} s")
     else:
         print("S p50:                -")
+    if metrics['service_p95_seconds'] is not None:
+        print(f"S p95:                {metrics['service_p95_seconds']:.2f} s")
+    else:
+        print("S p95:                -")
+    for job_class in JOB_CLASSES:
+        if metrics[f"{job_class}_done"]:
+            print(
+                f"  {job_class:<7} n={metrics[f'{job_class}_done']:<4} "
+                f"avg={metrics[f'{job_class}_avg_seconds']:.2f} s "
+                f"p95={metrics[f'{job_class}_p95_seconds']:.2f} s"
+            )
+    if metrics["encoding_presets"]:
+        print(f"Presets:              {metrics['encoding_presets']}")
     print("=====================================\n")
 
     if args.output_csv:
@@ -137,13 +137,16 @@ def get_default_user_id(db) -> int:
     return int(u.id)
 
 
-def create_video_record(db, user_id: int, original_path: str, title: str) -> Video:
+def create_video_record(
+    db, user_id: int, original_path: str, title: str, size_bytes: Optional[int] = None
+) -> Video:
     v = Video(
         video_id=str(uuid.uuid4()),
         title=title,
         status=VideoStatus.uploaded.value,
         original_path=original_path,
         user_id=user_id,
+        size_bytes=size_bytes,
     )
     db.add(v)
     db.commit()
@@ -178,11 +181,17 @@ def inject_tasks(
         try:
             resolved_user_id = int(user_id) if user_id else get_default_user_id(db)
             title = f"Load Test Video {size_mb}MB #{i + 1}"
-            v = create_video_record(db, resolved_user_id, str(test_file_path), title)
-            from app.celery_worker import process_video_task
+            v = create_video_record(
+                db,
+                resolved_user_id,
+                str(test_file_path),
+                title,
+                size_bytes=size_mb * 1024 * 1024,
+            )
+            from app.celery_worker import enqueue_video_task
 
-            # Usar .delay() como en la API (más simple y funciona mejor con SQS)
-            task = process_video_task.delay(v.id, str(test_file_path))
+            # Igual que la API: con PRIORITY_ROUTING va a la cola de su clase
+            task = enqueue_video_task(v, str(test_file_path))
             v.task_id = task.id
             db.commit()
             task_ids.append(task.id)
@@ -0,0 +1,133 @@
+"""
+Escenario: subida por formulario (/api/videos/upload) vs. subida directa a S3
+con URLs prefirmadas (/api/videos/uploads + /complete).
+
+Correr cada clase por separado con la misma carga y comparar el p95 de las
+rutas de la API en Locust y el CPU del servicio api en Grafana
+("Container CPU by service (%)"):
+
+    locust -f load_tests/locustfile_direct_upload.py FormUploadUser
+    locust -f load_tests/locustfile_direct_upload.py DirectUploadUser
+
+UPLOAD_SIZE_MB controla el tamano de cada video (por defecto 20).
+Ambas rutas encolan procesamiento real: usar con el worker apagado o con
+una cola de pruebas si solo interesa la capa web.
+"""
+
+import os
+import random
+from uuid import uuid4
+
+from locust import HttpUser, between, events, task
+from locust.runners import MasterRunner
+
+BASE_URL = os.getenv("WEB_SEVER_URL", "http://localhost:8080")
+UPLOAD_SIZE = int(float(os.getenv("UPLOAD_SIZE_MB", "20")) * 1024 * 1024)
+PAYLOAD = os.urandom(UPLOAD_SIZE)
+
+
+class _AuthenticatedUser(HttpUser):
+    abstract = True
+    wait_time = between(0.5, 1.5)
+    host = BASE_URL
+
+    def on_start(self):
+        password = "TestPassword123!"
+        email = f"loadtest_{uuid4().hex}@example.com"
+        self.client.post(
+            "/api/auth/signup",
+            json={
+                "email": email,
+                "password1": password,
+                "password2": password,
+                "first_name": "Load",
+                "last_name": "Test",
+                "city": "TestCity",
+                "country": "CO",
+            },
+            name="/api/auth/signup",
+        )
+        r = self.client.post(
+            "/api/auth/login",
+            json={"email": email, "password": password},
+            name="/api/auth/login",
+        )
+        token = r.json().get("access_token") if r.status_code == 200 else None
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def title(self) -> str:
+        return f"Load Test Video {random.randint(1, 100000)}"
+
+
+class FormUploadUser(_AuthenticatedUser):
+    """Los bytes pasan por la API (multipart/form-data)."""
+
+    @task
+    def upload_form(self):
+        if not self.headers:
+            return
+        self.client.post(
+            "/api/videos/upload",
+            files={"video_file": ("load.mp4", PAYLOAD, "video/mp4")},
+            data={"title": self.title()},
+            headers=self.headers,
+            name="/api/videos/upload",
+        )
+
+
+class DirectUploadUser(_AuthenticatedUser):
+    """La API solo crea y completa el multipart; los bytes van directo a S3."""
+
+    @task
+    def upload_direct(self):
+        if not self.headers:
+            return
+        with self.client.post(
+            "/api/videos/uploads",
+            json={
+                "title": self.title(),
+                "filename": "load.mp4",
+                "content_type": "video/mp4",
+                "size_bytes": len(PAYLOAD),
+            },
+            headers=self.headers,
+            name="/api/videos/uploads",
+            catch_response=True,
+        ) as r:
+            if r.status_code != 201:
+                r.failure(f"Init failed with status {r.status_code}")
+                return
+            body = r.json()
+
+        part_size = body["part_size"]
+        completed = []
+        for part in body["parts"]:
+            offset = (part["part_number"] - 1) * part_size
+            put = self.client.put(
+                part["url"],
+                data=PAYLOAD[offset : offset + part_size],
+                name="s3 upload_part",
+            )
+            if put.status_code != 200:
+                return
+            completed.append(
+                {"part_number": part["part_number"], "etag": put.headers["ETag"]}
+            )
+
+        self.client.post(
+            f"/api/videos/uploads/{body['video_id']}/complete",
+            json={"parts": completed},
+            headers=self.headers,
+            name="/api/videos/uploads/[id]/complete",
+        )
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    if isinstance(environment.runner, MasterRunner):
+        print("\n" + "=" * 60)
+        print("LOAD TEST: Form upload vs. direct-to-S3 upload")
+        print("=" * 60)
+        print(f"Upload size: {UPLOAD_SIZE / 1024 / 1024:.1f} MB")
+        print("Compare: API p95 (Locust) and api container CPU (Grafana)")
+        print("=" * 60 + "\n")
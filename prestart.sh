@@ -8,7 +8,8 @@ set -eu
 : "${GRACEFUL_TIMEOUT:=30}"
 : "${FORWARDED_ALLOW_IPS:=*}"
 
-export FORWARDED_ALLOW_IPS
+# los pools de la API se dimensionan con WORKERS si DB_POOL_AUTO=true
+export FORWARDED_ALLOW_IPS WORKERS
 
 exec gunicorn \
   -k uvicorn.workers.UvicornWorker \
@@ -3,7 +3,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
-from app.core.database import engine, get_db
+from app.core.database import engine, get_async_db, get_db
 from app.core.security import create_access_token
 from app.main import app
 from tests.factories import UserFactory, VideoFactory, VoteFactory
@@ -23,6 +23,47 @@ def db_session():
         connection.close()
 
 
+class TransactionalAsyncSession:
+    """
+    Interfaz de AsyncSession sobre la sesion sync de la prueba: las rutas
+    async ven los datos de las factories dentro de la misma transaccion que
+    se revierte al final (asyncpg no puede compartir la conexion psycopg2).
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return self.sync_session.scalar(statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return self.sync_session.scalars(statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        self.sync_session.delete(instance)
+
+    async def refresh(self, instance, *args, **kwargs):
+        self.sync_session.refresh(instance, *args, **kwargs)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.sync_session.rollback()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
 @pytest.fixture
 def client(db_session):
     def override_get_db():
@@ -31,7 +72,11 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        yield TransactionalAsyncSession(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -50,9 +95,25 @@ def _override_settings_and_fs(tmp_path, monkeypatch):
     yield
 
 
+@pytest.fixture(autouse=True)
+def _clear_principal_cache():
+    from app.core.principal import get_principal_cache
+
+    get_principal_cache().clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_public_videos_cache():
+    from app.core.public_catalog import get_page_cache
+
+    get_page_cache().clear()
+    yield
+
+
 @pytest.fixture(autouse=True)
 def _mock_celery_delay(monkeypatch):
-    from app.api.routes import videos as videos_module
+    from app.celery_worker import process_video_task
 
     class DummyResult:
         def __init__(self, id: str):
@@ -61,7 +122,7 @@ def _mock_celery_delay(monkeypatch):
     def fake_delay(video_db_id: int, original_path: str):
         return DummyResult("test-task-id")
 
-    monkeypatch.setattr(videos_module.process_video_task, "delay", fake_delay)
+    monkeypatch.setattr(process_video_task, "delay", fake_delay)
     yield
 
 
@@ -0,0 +1,79 @@
+from io import BytesIO
+
+import pytest
+from faker import Faker
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal, async_engine
+from app.main import app
+from app.models import User, Video
+
+fake = Faker()
+
+
+@pytest.fixture
+def async_client():
+    """
+    Cliente sin override de get_async_db: las rutas usan AsyncSessionLocal
+    sobre asyncpg, como en produccion.
+    """
+    with TestClient(app) as c:
+        yield c
+        # las conexiones del pool quedan atadas al loop de este cliente
+        c.portal.call(async_engine.dispose)
+
+
+@pytest.fixture
+def committed_email():
+    """
+    asyncpg no ve la transaccion de db_session: los datos se confirman de
+    verdad y se borran al terminar.
+    """
+    email = fake.unique.email()
+    yield email
+    with SessionLocal() as db:
+        user = db.query(User).filter_by(email=email).one_or_none()
+        if user is not None:
+            db.query(Video).filter_by(user_id=user.id).delete()
+            db.delete(user)
+            db.commit()
+
+
+def test_real_async_session_auth_and_upload(
+    async_client, committed_email, make_auth_headers
+):
+    password = fake.password()
+    r = async_client.post(
+        "/api/auth/signup",
+        json={
+            "email": committed_email,
+            "password1": password,
+            "password2": password,
+            "first_name": fake.first_name(),
+            "last_name": fake.last_name(),
+            "city": fake.city(),
+            "country": fake.country(),
+        },
+    )
+    assert r.status_code == 201
+    user_id = r.json()["id"]
+
+    r = async_client.post(
+        "/api/auth/login", json={"email": committed_email, "password": password}
+    )
+    assert r.status_code == 200
+
+    # token sin claims de principal: get_current_user carga el usuario con
+    # la sesion async (la cache de principals se limpia en cada prueba)
+    headers = make_auth_headers(user_id)
+    files = {"video_file": ("demo.mp4", BytesIO(fake.binary(2048)), "video/mp4")}
+    r = async_client.post(
+        "/api/videos/upload", files=files, data={"title": "t"}, headers=headers
+    )
+    assert r.status_code == 201
+    video_id = r.json()["video_id"]
+
+    with SessionLocal() as db:
+        video = db.query(Video).filter_by(video_id=video_id).one()
+        assert video.user_id == user_id
+        assert video.task_id == "test-task-id"
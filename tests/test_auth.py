@@ -1,4 +1,8 @@
 from faker import Faker
+from passlib.hash import bcrypt
+
+from app.core.config import settings
+from app.core.security import pwd_context
 
 fake = Faker()
 
@@ -40,3 +44,18 @@ def test_signup_duplicate_email(client):
 def test_login_invalid_credentials(client):
     r = client.post("/api/auth/login", json={"email": fake.email(), "password": "bad"})
     assert r.status_code == 401
+
+
+def test_login_rehashes_when_bcrypt_cost_changes(client, user_factory, db_session):
+    password = fake.password()
+    user = user_factory.create(password=password)
+    cheap = bcrypt.using(rounds=4).hash(password)
+    user.hashed_password = cheap
+    db_session.commit()
+
+    r = client.post("/api/auth/login", json={"email": user.email, "password": password})
+    assert r.status_code == 200
+    db_session.refresh(user)
+    assert user.hashed_password != cheap
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert pwd_context.verify(password, user.hashed_password)
@@ -0,0 +1,114 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app import celery_worker as cw
+from app.core.config import settings
+from app.core.utils import video_utils as vu
+from app.core.utils.checkpoints import CheckpointStore
+from app.core.utils.segment_cache import SegmentCache
+
+STAGES = ("download", "body", "final", "upload")
+ORIGINAL = "s3://bucket/uploads/7.mp4"
+
+
+class FakeS3:
+    def __init__(self, record):
+        self.record = record
+
+    def download_file(self, bucket, key, path, Config=None):
+        self.record("download")
+        Path(path).write_bytes(b"original")
+
+    def upload_file(self, path, bucket, key, Config=None):
+        self.record("upload")
+
+
+@pytest.mark.parametrize("failing", STAGES)
+def test_retry_resumes_from_first_incomplete_stage(failing, tmp_path, monkeypatch):
+    calls = []
+    pending_failure = [failing]
+
+    def record(stage):
+        calls.append(stage)
+        if stage in pending_failure:
+            pending_failure.remove(stage)
+            raise RuntimeError(f"fallo inyectado en {stage}")
+
+    def encode_body(input_video, output_video, *args, **kwargs):
+        record("body")
+        Path(output_video).write_bytes(b"body")
+
+    def concat(segments, output_video, sink=None):
+        record("final")
+        Path(output_video).write_bytes(b"final")
+
+    for name, value in {
+        "S3_INPUT_MODE": "download",
+        "S3_STREAM_UPLOAD": False,
+        "ADAPTIVE_PIPELINE": False,
+        "VIDEO_PIPELINE": "segments",
+        "PARALLEL_ENCODE_WORKERS": 0,
+        "CHECKPOINTS_ENABLED": True,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(cw, "_checkpoint_store", CheckpointStore(tmp_path / "ckpt"))
+    monkeypatch.setattr(cw, "_segment_cache", SegmentCache(tmp_path / "segments"))
+    monkeypatch.setattr(cw, "get_s3_client", lambda: FakeS3(record))
+    monkeypatch.setattr(
+        vu,
+        "encode_image_segment",
+        lambda image, output, **kwargs: Path(output).write_bytes(b"intro"),
+    )
+    monkeypatch.setattr(vu, "encode_body_segment", encode_body)
+    monkeypatch.setattr(vu, "concat_copy", concat)
+
+    with pytest.raises(RuntimeError):
+        cw.process_video(7, ORIGINAL)
+    assert cw.process_video(7, ORIGINAL) == "s3://bucket/processed/7_processed.mp4"
+
+    # el reintento solo repite la etapa que fallo y las posteriores
+    i = STAGES.index(failing)
+    assert calls == [*STAGES[: i + 1], *STAGES[i:]]
+
+
+def test_evicts_expired_and_oversized_jobs(tmp_path):
+    store = CheckpointStore(
+        tmp_path, max_bytes=10, ttl_seconds=3600, min_age_seconds=0
+    )
+    for video_id, size in ((1, 8), (2, 8), (3, 1)):
+        store.job(video_id, "v1").run(
+            "final", lambda path, n=size: path.write_bytes(b"x" * n)
+        )
+    old = time.time() - 7200
+    os.utime(tmp_path / "3-v1", (old, old))
+    os.utime(tmp_path / "1-v1", (old + 3700, old + 3700))
+
+    store.evict()
+
+    # 3 expira por TTL, 1 sale por tamano (el menos reciente)
+    assert not store.job(3, "v1").done("final")
+    assert not store.job(1, "v1").done("final")
+    assert store.job(2, "v1").done("final")
+
+
+def test_evict_skips_jobs_held_by_a_running_task(tmp_path):
+    store = CheckpointStore(tmp_path, max_bytes=0, ttl_seconds=60, min_age_seconds=0)
+    job = store.job(4, "v1")
+    old = time.time() - 3600
+
+    with job.hold():
+        job.run("input", lambda path: path.write_bytes(b"original"))
+        # etapa larga: el mtime del directorio queda viejo
+        os.utime(tmp_path / "4-v1", (old, old))
+        store.evict()
+        assert job.done("input")
+
+    store.evict()
+    assert not job.done("input")
+
+    # el directorio borrado se recrea al volver a tomar el trabajo
+    with job.hold():
+        assert (tmp_path / "4-v1" / ".lock").exists()
@@ -0,0 +1,52 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.database import async_database_url
+from app.core.db_pool import TimedQueuePool, budget_pool_size, instrument_pool
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_async_database_url_swaps_driver():
+    assert (
+        async_database_url("postgresql+psycopg2://u:p@db:5432/app")
+        == "postgresql+asyncpg://u:p@db:5432/app"
+    )
+    assert (
+        async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    )
+
+
+def test_budget_pool_size_splits_connections_across_processes():
+    # 80 conexiones, 9 workers de gunicorn con 2 engines cada uno
+    assert budget_pool_size(80, 9) == (3, 1)
+    assert budget_pool_size(200, 4) == (19, 6)
+    assert budget_pool_size(4, 9) == (1, 0)
+
+
+def test_timed_pool_exports_checkout_metrics():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+        pool_logging_name="test_pool",
+    )
+    instrument_pool(engine.pool)
+    waits = _sample("db_pool_wait_seconds_count", pool="test_pool")
+    timeouts = _sample("db_pool_timeouts_total", pool="test_pool")
+
+    conn = engine.connect()
+    assert _sample("db_pool_checked_out_connections", pool="test_pool") == 1
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    conn.close()
+
+    assert _sample("db_pool_checked_out_connections", pool="test_pool") == 0
+    assert _sample("db_pool_wait_seconds_count", pool="test_pool") == waits + 2
+    assert _sample("db_pool_timeouts_total", pool="test_pool") == timeouts + 1
@@ -0,0 +1,89 @@
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.celery_worker import current_pipeline_version, process_video_task
+from app.core.utils.video_utils import EncodeProfile
+from app.models import Video, VideoStatus
+
+CONTENT = b"mismo-video" * 512
+
+
+def _hits():
+    return REGISTRY.get_sample_value("upload_dedup_lookups_total", {"result": "hit"}) or 0
+
+
+def _upload(client, auth_headers):
+    files = {"video_file": ("demo.mp4", BytesIO(CONTENT), "video/mp4")}
+    return client.post(
+        "/api/videos/upload", files=files, data={"title": "t"}, headers=auth_headers
+    )
+
+
+@pytest.fixture
+def processed_original(tmp_path, video_factory, auth_user, db_session):
+    processed = tmp_path / "processed" / "original_processed.mp4"
+    processed.write_bytes(b"salida")
+    video = video_factory.create(
+        user=auth_user, status=VideoStatus.done.value, processed_path=str(processed)
+    )
+    video.content_hash = hashlib.sha256(CONTENT).hexdigest()
+    video.pipeline_version = current_pipeline_version()
+    db_session.commit()
+    return video
+
+
+def test_upload_reuses_processed_duplicate(
+    client, auth_headers, db_session, processed_original, monkeypatch
+):
+    def fail_delay(*args, **kwargs):
+        raise AssertionError("no debe encolarse una tarea para un duplicado")
+
+    monkeypatch.setattr(process_video_task, "delay", fail_delay)
+    hits = _hits()
+
+    r = _upload(client, auth_headers)
+
+    assert r.status_code == 201
+    assert r.json()["task_id"].startswith("dedup-")
+    video = db_session.query(Video).filter_by(video_id=r.json()["video_id"]).one()
+    assert video.status == VideoStatus.done.value
+    assert video.processing_info == {"dedup_of": processed_original.video_id}
+    # hardlink: mismo inodo que la salida original
+    assert os.stat(video.processed_path).st_ino == os.stat(
+        processed_original.processed_path
+    ).st_ino
+    assert _hits() == hits + 1
+
+
+def test_upload_with_other_pipeline_version_is_processed(
+    client, auth_headers, db_session, processed_original
+):
+    processed_original.pipeline_version = "otra-version"
+    db_session.commit()
+
+    r = _upload(client, auth_headers)
+
+    assert r.json()["task_id"] == "test-task-id"
+    video = db_session.query(Video).filter_by(video_id=r.json()["video_id"]).one()
+    assert video.status == VideoStatus.uploaded.value
+    assert video.content_hash == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_upload_ignores_output_of_adaptive_profile(
+    client, auth_headers, db_session, processed_original
+):
+    # salida codificada con un perfil rapido por backlog: otra calidad
+    busy = EncodeProfile(preset="superfast", crf=26)
+    processed_original.pipeline_version = current_pipeline_version(busy)
+    db_session.commit()
+    assert processed_original.pipeline_version != current_pipeline_version()
+
+    r = _upload(client, auth_headers)
+
+    assert r.json()["task_id"] == "test-task-id"
+    video = db_session.query(Video).filter_by(video_id=r.json()["video_id"]).one()
+    assert video.status == VideoStatus.uploaded.value
@@ -0,0 +1,176 @@
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.api.routes import videos as videos_module
+from app.core import storage
+from app.core.utils.planner import parse_probe
+from app.models import Video, VideoStatus
+
+BUCKET = "direct-bucket"
+MB = 1024 * 1024
+VIDEO_PROBE = parse_probe(
+    {"streams": [{"codec_type": "video", "codec_name": "h264"}], "format": {"duration": "12"}}
+)
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(videos_module.settings, "AWS_S3_BUCKET", BUCKET)
+    monkeypatch.setattr(videos_module.settings, "AWS_REGION", "us-east-1")
+    monkeypatch.setattr(videos_module.settings, "UPLOAD_PROBE_DURATION", False)
+    monkeypatch.setattr(videos_module, "probe_media", lambda path: VIDEO_PROBE)
+    with mock_aws():
+        storage._reset_s3_clients()
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+    storage._reset_s3_clients()
+
+
+def _upload_parts(s3_client, video, parts, payload, part_size):
+    """Sube cada parte como lo haria el cliente con la URL prefirmada."""
+    completed = []
+    for part in parts:
+        query = parse_qs(urlparse(part["url"]).query)
+        number = int(query["partNumber"][0])
+        offset = (number - 1) * part_size
+        resp = s3_client.upload_part(
+            Bucket=BUCKET,
+            Key=urlparse(video.original_path).path.lstrip("/"),
+            UploadId=query["uploadId"][0],
+            PartNumber=number,
+            Body=payload[offset : offset + part_size],
+        )
+        completed.append({"part_number": number, "etag": resp["ETag"]})
+    return completed
+
+
+def test_direct_upload_flow(client, auth_headers, db_session, s3_client):
+    payload = b"v" * (12 * MB)
+    r = client.post(
+        "/api/videos/uploads",
+        json={
+            "title": "Directo",
+            "filename": "clip.mp4",
+            "content_type": "video/mp4",
+            "size_bytes": len(payload),
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 201
+    body = r.json()
+    assert len(body["parts"]) == 2
+
+    video = db_session.query(Video).filter_by(video_id=body["video_id"]).one()
+    assert video.status == VideoStatus.pending_upload.value
+    completed = _upload_parts(
+        s3_client, video, body["parts"], payload, body["part_size"]
+    )
+
+    r = client.post(
+        f"/api/videos/uploads/{body['video_id']}/complete",
+        json={"parts": completed},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201
+    db_session.refresh(video)
+    assert video.status == VideoStatus.uploaded.value
+    assert video.size_bytes == len(payload)
+    assert video.task_id == r.json()["task_id"]
+
+    # completar dos veces no vuelve a encolar
+    r = client.post(
+        f"/api/videos/uploads/{body['video_id']}/complete",
+        json={"parts": completed},
+        headers=auth_headers,
+    )
+    assert r.status_code == 409
+
+
+def test_direct_upload_rejects_oversized_object(
+    client, auth_headers, db_session, s3_client, monkeypatch
+):
+    r = client.post(
+        "/api/videos/uploads",
+        json={
+            "title": "Grande",
+            "filename": "clip.mp4",
+            "content_type": "video/mp4",
+            "size_bytes": 1024,
+        },
+        headers=auth_headers,
+    )
+    body = r.json()
+    video = db_session.query(Video).filter_by(video_id=body["video_id"]).one()
+    # el cliente sube mas de lo declarado
+    monkeypatch.setattr(videos_module.settings, "MAX_FILE_SIZE", 2 * MB)
+    completed = _upload_parts(
+        s3_client, video, body["parts"], b"x" * (3 * MB), 3 * MB
+    )
+
+    r = client.post(
+        f"/api/videos/uploads/{body['video_id']}/complete",
+        json={"parts": completed},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+    db_session.refresh(video)
+    assert video.status == VideoStatus.failed.value
+    assert s3_client.list_objects_v2(Bucket=BUCKET).get("KeyCount", 0) == 0
+
+
+def test_direct_upload_rejects_object_that_is_not_a_video(
+    client, auth_headers, db_session, s3_client, monkeypatch
+):
+    r = client.post(
+        "/api/videos/uploads",
+        json={
+            "title": "Falso",
+            "filename": "clip.mp4",
+            "content_type": "video/mp4",
+            "size_bytes": 1024,
+        },
+        headers=auth_headers,
+    )
+    body = r.json()
+    video = db_session.query(Video).filter_by(video_id=body["video_id"]).one()
+    completed = _upload_parts(s3_client, video, body["parts"], b"%PDF" * 256, 1024)
+    monkeypatch.setattr(videos_module, "probe_media", lambda path: None)
+
+    r = client.post(
+        f"/api/videos/uploads/{body['video_id']}/complete",
+        json={"parts": completed},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+    db_session.refresh(video)
+    assert video.status == VideoStatus.failed.value
+    assert s3_client.list_objects_v2(Bucket=BUCKET).get("KeyCount", 0) == 0
+
+
+def test_direct_upload_aborts_multipart_when_commit_fails(
+    client, auth_headers, db_session, s3_client, monkeypatch
+):
+    def failing_commit():
+        raise RuntimeError("db caida")
+
+    # la sesion async de las rutas delega el commit en db_session
+    monkeypatch.setattr(db_session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        client.post(
+            "/api/videos/uploads",
+            json={
+                "title": "Huerfano",
+                "filename": "clip.mp4",
+                "content_type": "video/mp4",
+                "size_bytes": 1024,
+            },
+            headers=auth_headers,
+        )
+    assert not s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
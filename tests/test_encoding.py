@@ -0,0 +1,49 @@
+from app.core.encoding import ProfileSelector
+from app.core.utils.video_utils import DEFAULT_PROFILE
+
+
+def test_profile_follows_backlog_between_bounds():
+    selector = ProfileSelector(idle_depth=0, busy_depth=20)
+
+    idle = selector.profile_for(0)
+    busy = selector.profile_for(50)
+    middle = selector.profile_for(10)
+
+    assert (idle.preset, idle.crf) == ("medium", 23)
+    assert (busy.preset, busy.crf) == ("superfast", 26)
+    assert middle.preset == "faster"
+    # solo cambia la calidad de codificacion: los segmentos siguen siendo concatenables
+    assert busy.width == DEFAULT_PROFILE.width
+    assert busy.h264_level == DEFAULT_PROFILE.h264_level
+    assert "-crf" in busy.video_args()
+    assert "-crf" not in DEFAULT_PROFILE.video_args()
+
+
+def test_backlog_is_cached_and_survives_read_errors():
+    now = [0.0]
+    reads = []
+
+    def backlog():
+        reads.append(now[0])
+        if len(reads) == 2:
+            raise RuntimeError("sqs no disponible")
+        return 30
+
+    selector = ProfileSelector(backlog, cache_seconds=5, clock=lambda: now[0])
+
+    profile, info = selector.select()
+    assert info == {"preset": "superfast", "crf": 26, "backlog": 30}
+    now[0] = 1.0
+    selector.select()
+    assert len(reads) == 1
+
+    now[0] = 6.0
+    profile, info = selector.select()
+    assert len(reads) == 2
+    assert info["backlog"] == 30
+
+
+def test_without_backlog_source_uses_default_profile():
+    profile, info = ProfileSelector(None).select()
+    assert profile == DEFAULT_PROFILE
+    assert info["backlog"] is None
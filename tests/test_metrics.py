@@ -0,0 +1,45 @@
+import shutil
+import subprocess
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.metrics import classify_failure
+from app.core.utils import video_utils as vu
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_classify_failure():
+    assert classify_failure(subprocess.CalledProcessError(1, ["ffmpeg"])) == "ffmpeg"
+    assert classify_failure(ValueError("Video with id 1 not found")) == "input"
+    assert classify_failure(RuntimeError("boom")) == "other"
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg no disponible")
+def test_run_ffmpeg_records_stage_and_speed(tmp_path):
+    before = _sample("worker_stage_duration_seconds_count", stage="test_stage")
+    speed_before = _sample("worker_ffmpeg_speed_ratio_count", stage="test_stage")
+    vu.run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc=duration=1:size=320x240:rate=25",
+            str(tmp_path / "out.mp4"),
+        ],
+        stage="test_stage",
+    )
+    assert _sample("worker_stage_duration_seconds_count", stage="test_stage") == before + 1
+    assert _sample("worker_ffmpeg_speed_ratio_count", stage="test_stage") == speed_before + 1
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg no disponible")
+def test_run_ffmpeg_failure_keeps_stderr(tmp_path):
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        vu.run_ffmpeg(["ffmpeg", "-i", str(tmp_path / "missing.mp4")], stage="probe_fail")
+    assert "missing.mp4" in exc_info.value.stderr
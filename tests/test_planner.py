@@ -0,0 +1,70 @@
+import shutil
+import subprocess
+
+import pytest
+
+from app.core.utils import video_utils as vu
+from app.core.utils.planner import moov_before_mdat, parse_probe, plan_pipeline
+
+
+def _probe_payload(width, height, rate, duration, rotation=None):
+    video = {
+        "codec_type": "video",
+        "codec_name": "h264",
+        "width": width,
+        "height": height,
+        "avg_frame_rate": rate,
+        "pix_fmt": "yuv420p",
+    }
+    if rotation is not None:
+        video["side_data_list"] = [{"rotation": rotation}]
+    return {
+        "streams": [video, {"codec_type": "audio", "codec_name": "aac"}],
+        "format": {"duration": str(duration)},
+    }
+
+
+def test_plan_skips_stages_for_short_720p30_clip():
+    info = parse_probe(_probe_payload(1280, 720, "30/1", 12.5))
+    plan = plan_pipeline(info)
+    assert not plan.trim and not plan.scale and not plan.fps
+    assert plan.operations == ["watermark", "intro_outro", "silence"]
+
+    cmd = vu.build_fused_command(
+        "in.mp4", "out.mp4", "wm.png", "intro.jpg", plan=plan
+    )
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    body = graph.split(";")[0]
+    assert "scale=" not in body and "fps=" not in body
+    assert "-t" not in cmd[: cmd.index("-i")]
+
+
+def test_plan_full_for_long_rotated_phone_clip():
+    info = parse_probe(_probe_payload(1920, 1080, "30000/1001", 95, rotation=-90))
+    assert (info.width, info.height) == (1080, 1920)
+    plan = plan_pipeline(info)
+    assert plan.trim and plan.scale and plan.fps
+    assert plan.probe["duration"] == 95.0
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg no disponible")
+@pytest.mark.parametrize("faststart", [True, False])
+def test_moov_position_detection(tmp_path, faststart):
+    out = tmp_path / "clip.mp4"
+    movflags = ["-movflags", "+faststart"] if faststart else []
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc=duration=1:size=320x240:rate=25",
+            *movflags,
+            str(out),
+        ],
+        check=True,
+    )
+    assert moov_before_mdat(str(out)) is faststart
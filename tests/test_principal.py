@@ -0,0 +1,68 @@
+from jose import jwt
+
+from app.core import principal as principal_module
+from app.core.config import settings
+from app.core.principal import Principal, PrincipalCache
+
+
+def _principal(user_id: int) -> Principal:
+    return Principal(
+        id=user_id,
+        email=f"u{user_id}@example.com",
+        first_name="Ana",
+        last_name="Diaz",
+        city="Bogota",
+        country="CO",
+        is_active=True,
+    )
+
+
+def test_principal_cache_is_bounded_lru():
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60)
+    cache.put(_principal(1))
+    cache.put(_principal(2))
+    assert cache.get(1) is not None  # 1 pasa a ser el mas reciente
+    cache.put(_principal(3))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+
+def test_principal_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principal_module.time, "monotonic", lambda: now[0])
+    cache = PrincipalCache(max_entries=10, ttl_seconds=5)
+    cache.put(_principal(1))
+    now[0] += 4
+    assert cache.get(1) is not None
+    now[0] += 2
+    assert cache.get(1) is None
+
+
+def test_cached_principal_skips_db_and_is_invalidated_on_update(
+    client, auth_user, auth_headers, db_session
+):
+    assert client.get("/api/videos", headers=auth_headers).status_code == 200
+    assert principal_module.get_principal_cache().get(auth_user.id) is not None
+
+    auth_user.is_active = False
+    db_session.commit()
+    assert principal_module.get_principal_cache().get(auth_user.id) is None
+    r = client.get("/api/videos", headers=auth_headers)
+    assert r.status_code == 401
+
+
+def test_trusted_token_claims(client, auth_user, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    r = client.post(
+        "/api/auth/login",
+        json={"email": auth_user.email, "password": auth_user._plain_password},
+    )
+    token = r.json()["access_token"]
+    claims = jwt.get_unverified_claims(token)
+    assert claims["usr"]["id"] == auth_user.id
+
+    assert principal_module.get_principal_cache().get(auth_user.id) is None
+    r = client.get("/api/videos", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    # el principal salio del token: no hubo consulta ni entrada en cache
+    assert principal_module.get_principal_cache().get(auth_user.id) is None
@@ -0,0 +1,119 @@
+import shutil
+
+import pytest
+
+from app.core.progress import ProgressReporter, current_reporter, parse_progress_block
+from app.core.utils import video_utils as vu
+
+
+class FakeStore:
+    def __init__(self):
+        self.payloads = []
+
+    def publish(self, video_db_id, payload):
+        self.payloads.append(payload)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_progress_block():
+    block = parse_progress_block(
+        ["frame=50", "out_time_us=2000000", "speed=1.5x", "progress=continue"]
+    )
+    assert block == {"done": False, "out_seconds": 2.0, "speed": 1.5}
+    assert parse_progress_block(["out_time_us=N/A", "speed=N/A", "progress=end"]) == {
+        "done": True
+    }
+
+
+def test_reporter_throttles_and_estimates_eta():
+    store, clock = FakeStore(), FakeClock()
+    reporter = ProgressReporter(1, total_seconds=10, store=store, clock=clock)
+
+    reporter.update("encode_body", 1, {"out_seconds": 1.0})
+    clock.now = 0.5
+    reporter.update("encode_body", 1, {"out_seconds": 2.0})
+    assert len(store.payloads) == 1
+
+    clock.now = 2.0
+    reporter.update("encode_body", 1, {"out_seconds": 4.0})
+    assert store.payloads[-1]["percent"] == 40.0
+    assert store.payloads[-1]["eta_seconds"] == 3.0
+
+    # cambio de etapa publica aunque no haya pasado el intervalo
+    reporter.update("concat", 2, {"out_seconds": 10.0})
+    assert store.payloads[-1]["stage"] == "concat"
+    assert store.payloads[-1]["percent"] == 40.0
+
+    reporter.finish("done")
+    assert store.payloads[-1]["percent"] == 100.0
+
+
+def test_reporter_sums_parallel_chunks():
+    reporter = ProgressReporter(1, total_seconds=10, interval=0)
+    reporter.update("encode_chunk", 1, {"out_seconds": 3.0})
+    reporter.update("encode_chunk", 2, {"out_seconds": 2.0})
+    assert reporter.published["percent"] == 50.0
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg no disponible")
+def test_run_ffmpeg_feeds_active_reporter(tmp_path):
+    store = FakeStore()
+    reporter = ProgressReporter(1, total_seconds=2, store=store, interval=0)
+    token = current_reporter.set(reporter)
+    try:
+        vu.run_ffmpeg(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "lavfi",
+                "-i",
+                "testsrc=duration=2:size=320x240:rate=25",
+                str(tmp_path / "out.mp4"),
+            ],
+            stage="encode_body",
+        )
+    finally:
+        current_reporter.reset(token)
+
+    assert store.payloads
+    assert store.payloads[-1]["stage"] == "encode_body"
+    assert store.payloads[-1]["percent"] > 90
+
+
+def test_parallel_chunks_see_active_reporter(tmp_path, monkeypatch):
+    chunks = [tmp_path / f"chunk{i}.mp4" for i in range(3)]
+    seen = []
+    monkeypatch.setattr(vu, "split_on_keyframes", lambda *a, **k: chunks)
+    monkeypatch.setattr(
+        vu, "_encode_chunk", lambda chunk, out, *a: seen.append(current_reporter.get()) or out
+    )
+    monkeypatch.setattr(vu, "concat_copy", lambda *a, **k: None)
+    monkeypatch.setattr(vu, "run_ffmpeg", lambda *a, **k: None)
+
+    reporter = ProgressReporter(1, total_seconds=10, interval=0)
+    token = current_reporter.set(reporter)
+    try:
+        vu.encode_body_parallel(
+            "in.mp4", "out.mp4", "wm.png", workdir=str(tmp_path), workers=2
+        )
+    finally:
+        current_reporter.reset(token)
+
+    assert seen == [reporter] * len(chunks)
+
+
+def test_progress_store_falls_back_to_db_without_redis(monkeypatch):
+    from app.core import progress
+
+    monkeypatch.setattr(progress, "_store", None)
+    monkeypatch.setattr(progress.settings, "PROGRESS_BACKEND", "redis")
+    monkeypatch.setattr(progress.settings, "REDIS_URL", None)
+    assert isinstance(progress.get_progress_store(), progress.DBProgressStore)
@@ -1,3 +1,9 @@
+from sqlalchemy import update
+
+from app.core.leaderboard import rebuild_vote_totals
+from app.models import UserVoteTotal
+
+
 def test_list_public_videos_only_processed(client, video_factory):
     v1 = video_factory.create(is_public=True, processed_path="/tmp/x1.mp4")
     v2 = video_factory.create(is_public=True, processed_path=None, status="uploaded")
@@ -20,6 +26,22 @@ def test_vote_public_video_once_only(client, auth_headers, video_factory, vote_f
     assert r2.status_code == 400
 
 
+def test_vote_public_video_bumps_counters(
+    client, auth_headers, db_session, video_factory
+):
+    v = video_factory.create(is_public=True, processed_path="/tmp/pv3.mp4")
+    r = client.post(f"/api/public/videos/{v.video_id}/vote", headers=auth_headers)
+    assert r.status_code == 200
+    client.post(f"/api/public/videos/{v.video_id}/vote", headers=auth_headers)
+
+    db_session.refresh(v)
+    assert v.votes_count == 1
+    assert db_session.get(UserVoteTotal, v.user_id).votes == 1
+
+    r = client.post("/api/public/videos/no-existe/vote", headers=auth_headers)
+    assert r.status_code == 404
+
+
 def test_vote_public_video_requires_auth(client, video_factory):
     v = video_factory.create(is_public=True, processed_path="/tmp/pv2.mp4")
     r = client.post(f"/api/public/videos/{v.video_id}/vote")
@@ -47,3 +69,96 @@ def test_rankings_with_and_without_city(
     assert r2.status_code == 200
     data2 = r2.json()
     assert all(item.get("city") == "Bogotá" for item in data2)
+
+
+def test_rankings_keyset_pagination(client, user_factory, video_factory, vote_factory):
+    city = "Ciudad Keyset"
+    owners = [user_factory.create(city=city) for _ in range(3)]
+    for owner, votes in zip(owners, (3, 2, 1)):
+        video = video_factory.create(user=owner, is_public=True)
+        for _ in range(votes):
+            vote_factory.create(video=video)
+
+    r1 = client.get("/api/public/rankings", params={"city": city, "page_size": 2})
+    assert [it["votes"] for it in r1.json()] == [3, 2]
+    cursor = r1.headers["X-Next-Cursor"]
+
+    r2 = client.get(
+        "/api/public/rankings",
+        params={"city": city, "page_size": 2, "cursor": cursor},
+    )
+    assert [(it["position"], it["votes"]) for it in r2.json()] == [(3, 1)]
+    assert "X-Next-Cursor" not in r2.headers
+
+    r3 = client.get("/api/public/rankings", params={"cursor": "no-es-cursor"})
+    assert r3.status_code == 400
+
+
+def test_rebuild_vote_totals_matches_votes(
+    db_session, user_factory, video_factory, vote_factory
+):
+    owner = user_factory.create()
+    video = video_factory.create(user=owner, is_public=True)
+    vote_factory.create(video=video)
+    vote_factory.create(video=video)
+    # desviacion artificial del contador
+    db_session.execute(
+        update(UserVoteTotal).where(UserVoteTotal.user_id == owner.id).values(votes=99)
+    )
+    db_session.commit()
+
+    rebuild_vote_totals(db_session)
+    db_session.commit()
+    total = db_session.get(UserVoteTotal, owner.id)
+    db_session.refresh(total)
+    assert total.votes == 2
+
+
+def test_list_public_videos_cursor_pagination(client, video_factory):
+    created = {
+        video_factory.create(is_public=True, processed_path=f"/tmp/page{i}.mp4").video_id
+        for i in range(5)
+    }
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/public/videos", params=params)
+        assert r.status_code == 200
+        assert len(r.json()) <= 2
+        seen.extend(it["video_id"] for it in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen))
+    assert created <= set(seen)
+
+    r = client.get("/api/public/videos", params={"cursor": "no-es-un-cursor"})
+    assert r.status_code == 400
+
+
+def test_list_public_videos_etag_and_invalidation(
+    client, auth_headers, db_session, video_factory
+):
+    v = video_factory.create(is_public=True, processed_path="/tmp/etag.mp4")
+    r1 = client.get("/api/public/videos")
+    etag = r1.headers["ETag"]
+
+    r2 = client.get("/api/public/videos", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    strong_in_list = f'"otro", {etag.removeprefix("W/")}'
+    r2 = client.get("/api/public/videos", headers={"If-None-Match": strong_in_list})
+    assert r2.status_code == 304
+    r2 = client.get("/api/public/videos", headers={"If-None-Match": "*"})
+    assert r2.status_code == 304
+
+    client.post(f"/api/public/videos/{v.video_id}/vote", headers=auth_headers)
+    # el contador lo sube un UPDATE de Core: la sesion compartida con la ruta
+    # conserva el Video con el valor anterior si no se expira
+    db_session.expire_all()
+    r3 = client.get("/api/public/videos", headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+    assert r3.headers["ETag"] != etag
+    votes = {it["video_id"]: it["votes"] for it in r3.json()}
+    assert votes[v.video_id] == 1
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.api.routes import videos as videos_module
+from app.core import storage
+from app.core.upload_sessions import expire_upload_sessions
+from app.models import Video, VideoStatus
+from app.models.models import UTC
+
+BUCKET = "resumable-bucket"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def local_backend(monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "local")
+    monkeypatch.setattr(videos_module.settings, "UPLOAD_PROBE_DURATION", False)
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(videos_module.settings, "AWS_S3_BUCKET", BUCKET)
+    monkeypatch.setattr(videos_module.settings, "AWS_REGION", "us-east-1")
+    monkeypatch.setattr(videos_module.settings, "UPLOAD_PROBE_DURATION", False)
+    with mock_aws():
+        storage._reset_s3_clients()
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+    storage._reset_s3_clients()
+
+
+def _create(client, auth_headers, size: int):
+    r = client.post(
+        "/api/videos/resumable",
+        json={
+            "title": "Reanudable",
+            "filename": "clip.mp4",
+            "content_type": "video/mp4",
+            "size_bytes": size,
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 201
+    return r.json()
+
+
+def _put(client, auth_headers, video_id: str, offset: int, chunk: bytes):
+    return client.put(
+        f"/api/videos/resumable/{video_id}",
+        params={"offset": offset},
+        content=chunk,
+        headers=auth_headers,
+    )
+
+
+def test_resumable_local_flow_resumes_from_offset(
+    client, auth_headers, db_session, local_backend
+):
+    payload = b"a" * MB + b"b" * MB + b"c" * 512
+    body = _create(client, auth_headers, len(payload))
+    video_id = body["video_id"]
+    assert body["offset"] == 0
+
+    r = _put(client, auth_headers, video_id, 0, payload[:MB])
+    assert r.json()["offset"] == MB
+
+    # un reintento del mismo chunk se rechaza y devuelve el offset real
+    r = _put(client, auth_headers, video_id, 0, payload[:MB])
+    assert r.status_code == 409
+    assert r.headers["Upload-Offset"] == str(MB)
+
+    r = client.get(f"/api/videos/resumable/{video_id}", headers=auth_headers)
+    assert r.json()["offset"] == MB
+
+    r = client.post(
+        f"/api/videos/resumable/{video_id}/complete", headers=auth_headers
+    )
+    assert r.status_code == 409
+
+    r = _put(client, auth_headers, video_id, MB, payload[MB:])
+    assert r.json()["offset"] == len(payload)
+
+    r = client.post(
+        f"/api/videos/resumable/{video_id}/complete", headers=auth_headers
+    )
+    assert r.status_code == 201
+    video = db_session.query(Video).filter_by(video_id=video_id).one()
+    assert video.status == VideoStatus.uploaded.value
+    assert video.upload_id is None
+    assert Path(video.original_path).read_bytes() == payload
+    assert not Path(video.original_path + ".part").exists()
+
+
+def test_resumable_rejects_bytes_past_declared_size(
+    client, auth_headers, local_backend
+):
+    body = _create(client, auth_headers, 1024)
+    r = _put(client, auth_headers, body["video_id"], 0, b"x" * 2048)
+    assert r.status_code == 400
+
+
+def test_resumable_s3_flow_uses_multipart_parts(
+    client, auth_headers, db_session, s3_client
+):
+    payload = b"v" * (12 * MB)
+    body = _create(client, auth_headers, len(payload))
+    video_id, part_size = body["video_id"], body["chunk_size"]
+
+    # las partes intermedias deben medir exactamente chunk_size
+    r = _put(client, auth_headers, video_id, 0, payload[: part_size - 1])
+    assert r.status_code == 400
+
+    for offset in range(0, len(payload), part_size):
+        r = _put(
+            client, auth_headers, video_id, offset, payload[offset : offset + part_size]
+        )
+        assert r.status_code == 200
+    assert r.json()["offset"] == len(payload)
+
+    r = client.post(
+        f"/api/videos/resumable/{video_id}/complete", headers=auth_headers
+    )
+    assert r.status_code == 201
+    video = db_session.query(Video).filter_by(video_id=video_id).one()
+    bucket, key = storage.parse_s3_uri(video.original_path)
+    obj = s3_client.get_object(Bucket=bucket, Key=key)
+    assert obj["ContentLength"] == len(payload)
+
+
+def test_expired_sessions_are_collected(
+    client, auth_headers, db_session, local_backend
+):
+    body = _create(client, auth_headers, 1024)
+    _put(client, auth_headers, body["video_id"], 0, b"x" * 100)
+    video = db_session.query(Video).filter_by(video_id=body["video_id"]).one()
+    partial = Path(video.original_path + ".part")
+    assert partial.exists()
+
+    later = datetime.now(UTC) + timedelta(
+        seconds=videos_module.settings.UPLOAD_SESSION_TTL_SECONDS + 60
+    )
+    assert expire_upload_sessions(db_session, now=later) == 1
+    assert not partial.exists()
+    assert db_session.query(Video).filter_by(video_id=body["video_id"]).count() == 0
@@ -0,0 +1,93 @@
+from io import BytesIO
+
+from app.celery_worker import process_video_task
+from app.core.config import settings
+from app.core.routing import (
+    WeightedRoundRobin,
+    class_for_queue,
+    classify_job,
+    parse_weights,
+    queue_for_class,
+)
+from app.models import Video
+
+MB = 1024 * 1024
+
+
+def test_classify_job_uses_largest_class():
+    assert classify_job(5 * MB, 20) == "short"
+    assert classify_job(50 * MB, 20) == "medium"
+    assert classify_job(5 * MB, 600) == "long"
+    assert classify_job(None, None) == "short"
+
+
+def test_size_threshold_for_long_is_reachable_below_upload_limit():
+    assert settings.ROUTING_LONG_MIN_MB * MB < settings.MAX_FILE_SIZE
+    assert classify_job(settings.MAX_FILE_SIZE, None) == "long"
+
+
+def test_queue_names_round_trip():
+    assert class_for_queue(queue_for_class("long")) == "long"
+    assert class_for_queue("otra-cola") is None
+
+
+def test_weighted_round_robin_is_smooth():
+    rr = WeightedRoundRobin(parse_weights("short:3,medium:1"))
+    turns = [rr.next() for _ in range(8)]
+    assert turns.count("short") == 6
+    assert turns.count("medium") == 2
+    # sin rafagas: medium aparece en cada ventana de 4 turnos
+    assert "medium" in turns[:4] and "medium" in turns[4:]
+
+
+def test_upload_routes_by_size_class(client, auth_headers, db_session, monkeypatch):
+    from app.api.routes import videos as videos_module
+
+    monkeypatch.setattr(videos_module.settings, "PRIORITY_ROUTING", True)
+    monkeypatch.setattr(videos_module.settings, "ROUTING_SHORT_MAX_MB", 0)
+    calls = []
+
+    class DummyResult:
+        id = "routed-task-id"
+
+    def fake_apply_async(args=None, queue=None, **kwargs):
+        calls.append((args, queue))
+        return DummyResult()
+
+    monkeypatch.setattr(process_video_task, "apply_async", fake_apply_async)
+    files = {"video_file": ("demo.mp4", BytesIO(b"0" * 2048), "video/mp4")}
+    r = client.post(
+        "/api/videos/upload", files=files, data={"title": "t"}, headers=auth_headers
+    )
+
+    assert r.status_code == 201
+    video = db_session.query(Video).filter_by(video_id=r.json()["video_id"]).one()
+    assert video.size_bytes == 2048
+    assert calls == [((video.id, video.original_path), queue_for_class("medium"))]
+
+
+def test_weighted_drain_skips_empty_turns(monkeypatch):
+    from app.core import routing
+
+    monkeypatch.setattr(routing.settings, "ROUTING_DRAIN_WEIGHTS", "short:2,long:1")
+    monkeypatch.setattr(routing.settings, "ROUTING_IDLE_SKIP_SECONDS", 0)
+
+    class FakeConsumer:
+        def __init__(self):
+            self.queues = set()
+
+        def add_task_queue(self, name):
+            self.queues.add(name)
+
+        def cancel_task_queue(self, name):
+            self.queues.discard(name)
+
+    step = routing.WeightedDrain(object())
+    step.consumer = FakeConsumer()
+    monkeypatch.setattr(step, "_has_free_slots", lambda: True)
+    step._advance()
+    assert step.consumer.queues == {queue_for_class("short")}
+
+    # short no entrega nada con procesos libres: pasa al siguiente turno
+    step._tick()
+    assert step.consumer.queues == {queue_for_class("long")}
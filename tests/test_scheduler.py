@@ -0,0 +1,68 @@
+from app.core.scheduler import CpuAutoscaler, CpuSampler, JobSlots
+
+
+class FakePool:
+    def __init__(self, num_processes):
+        self.num_processes = num_processes
+
+
+def test_job_slots_split_cores_between_active_jobs(tmp_path):
+    slots = JobSlots(str(tmp_path), cores=8, min_threads=2)
+    with slots.reserve() as first:
+        assert first == 8
+        with slots.reserve() as second:
+            assert second == 4
+            assert slots.active() == 2
+    assert slots.active() == 0
+
+
+def test_job_slots_ignore_stale_slots(tmp_path):
+    # slot de un proceso muerto: el archivo existe pero nadie tiene el flock
+    (tmp_path / "12345-dead.slot").write_text("")
+    slots = JobSlots(str(tmp_path), cores=4)
+    with slots.reserve() as threads:
+        assert threads == 4
+    assert not list(tmp_path.glob("*.slot"))
+
+
+def test_cpu_sampler_reads_utilization(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text("cpu  100 0 100 800 0 0 0 0\nprocs_running 3\n")
+    sampler = CpuSampler(cores=2, stat_path=str(stat))
+    stat.write_text("cpu  250 0 250 900 0 0 0 0\nprocs_running 5\n")
+    sampler.tick()
+    utilization, runnable = sampler.sample()
+    assert utilization == 0.75
+    assert runnable == 2.5
+
+
+def test_autoscaler_decisions():
+    scaler = CpuAutoscaler(FakePool(2), max_concurrency=4, min_concurrency=1)
+    scaler.overload = 1.5
+    scaler.target_utilization = 0.85
+    # tareas esperando y CPU con margen: crece
+    assert scaler._decide(2, 4, 0.5, 0.9) == ("up", 1, "cpu_headroom")
+    # CPU saturada sin thrashing: se mantiene
+    assert scaler._decide(2, 4, 0.97, 1.1) is None
+    # mas hilos ejecutables que nucleos: decrece aunque haya cola
+    assert scaler._decide(3, 6, 0.99, 2.0) == ("down", 1, "cpu_overload")
+    # procesos ociosos
+    assert scaler._decide(4, 1, 0.2, 0.3) == ("down", 3, "idle")
+
+
+def test_job_slots_cap_single_job_share(tmp_path):
+    slots = JobSlots(str(tmp_path), cores=8, max_share=0.5)
+    with slots.reserve() as first:
+        assert first == 4
+        with slots.reserve():
+            assert slots.current_budget() == 4
+            with slots.reserve():
+                assert slots.current_budget() == 2
+
+
+def test_job_slots_cleanup_does_not_count_pending_reservations(tmp_path):
+    # .tmp de un reserve() interrumpido: nadie lo cuenta y active() lo limpia
+    (tmp_path / "12345-dead.tmp").write_text("")
+    slots = JobSlots(str(tmp_path), cores=4)
+    assert slots.active() == 0
+    assert not list(tmp_path.glob("*.tmp"))
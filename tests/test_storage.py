@@ -0,0 +1,149 @@
+import asyncio
+import io
+import os
+import shutil
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.core import storage
+from app.core.storage import S3MultipartWriter, S3Storage, get_s3_client
+from app.core.utils import video_utils as vu
+
+BUCKET = "test-bucket"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_multipart_writer_uploads_stream(s3_client):
+    payload = b"".join(bytes([i]) * MB for i in range(12))
+    with S3MultipartWriter(
+        s3_client, BUCKET, "out.bin", part_size=5 * MB, concurrency=2
+    ) as writer:
+        for offset in range(0, len(payload), 700 * 1024):
+            writer.write(payload[offset : offset + 700 * 1024])
+
+    body = s3_client.get_object(Bucket=BUCKET, Key="out.bin")["Body"].read()
+    assert body == payload
+    assert writer._next_part - 1 == 3
+
+
+def test_multipart_writer_aborts_on_error(s3_client):
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(s3_client, BUCKET, "broken.bin", part_size=5 * MB):
+            raise RuntimeError("ffmpeg fallo")
+
+    uploads = s3_client.list_multipart_uploads(Bucket=BUCKET)
+    assert not uploads.get("Uploads")
+    listing = s3_client.list_objects_v2(Bucket=BUCKET)
+    assert listing.get("KeyCount", 0) == 0
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg no disponible")
+def test_fused_pipeline_streams_to_s3(s3_client, tmp_path):
+    import subprocess
+
+    clip = tmp_path / "in.mp4"
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc=duration=2:size=640x480:rate=25",
+            str(clip),
+        ],
+        check=True,
+    )
+    with S3MultipartWriter(s3_client, BUCKET, "processed.mp4") as writer:
+        vu.process_fused(
+            str(clip),
+            vu.STREAM_OUTPUT,
+            watermark_path="assets/watermark.png",
+            image_path="assets/intro-outro.jpg",
+            sink=writer,
+        )
+
+    head = s3_client.head_object(Bucket=BUCKET, Key="processed.mp4")
+    assert head["ContentLength"] == writer.bytes_written > 0
+
+
+def test_s3_client_registry_reuses_client_per_process(s3_client):
+    storage._reset_s3_clients()
+    client = get_s3_client("us-east-1")
+    assert get_s3_client("us-east-1") is client
+    assert client.meta.config.max_pool_connections == storage.settings.S3_MAX_POOL_CONNECTIONS
+
+    pid = os.fork()
+    if pid == 0:
+        # el hijo no debe reutilizar el cliente (ni sus sockets) del padre
+        os._exit(0 if get_s3_client("us-east-1") is not client else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+
+def test_s3_storage_save_uses_pooled_client(s3_client, monkeypatch):
+    storage._reset_s3_clients()
+    monkeypatch.setattr(storage.settings, "AWS_REGION", "us-east-1")
+    s3 = S3Storage(bucket=BUCKET, upload_prefix="uploads")
+    uri = s3.save(io.BytesIO(b"video"), "a.mp4")
+
+    assert uri == f"s3://{BUCKET}/uploads/a.mp4"
+    body = s3_client.get_object(Bucket=BUCKET, Key="uploads/a.mp4")["Body"].read()
+    assert body == b"video"
+    storage._reset_s3_clients()
+
+
+async def _chunks(payload: bytes, size: int = 256 * 1024):
+    for offset in range(0, len(payload), size):
+        yield payload[offset : offset + size]
+
+
+@pytest.mark.parametrize("size", [3 * MB, 13 * MB])
+def test_s3_storage_save_async_streams_without_temp_file(
+    s3_client, monkeypatch, size
+):
+    storage._reset_s3_clients()
+    monkeypatch.setattr(storage.settings, "AWS_REGION", "us-east-1")
+    monkeypatch.setattr(storage.settings, "S3_MULTIPART_PART_SIZE", 5 * MB)
+    monkeypatch.setattr(
+        storage.tempfile, "mkstemp", lambda *a, **k: pytest.fail("archivo temporal")
+    )
+    payload = os.urandom(size)
+    s3 = S3Storage(bucket=BUCKET, upload_prefix="uploads")
+
+    uri = asyncio.run(s3.save_async(_chunks(payload), "a.mp4", max_size=20 * MB))
+
+    assert uri == f"s3://{BUCKET}/uploads/a.mp4"
+    body = s3_client.get_object(Bucket=BUCKET, Key="uploads/a.mp4")["Body"].read()
+    assert body == payload
+    storage._reset_s3_clients()
+
+
+def test_s3_storage_save_async_aborts_over_max_size(s3_client, monkeypatch):
+    storage._reset_s3_clients()
+    monkeypatch.setattr(storage.settings, "AWS_REGION", "us-east-1")
+    monkeypatch.setattr(storage.settings, "S3_MULTIPART_PART_SIZE", 5 * MB)
+    s3 = S3Storage(bucket=BUCKET, upload_prefix="uploads")
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            s3.save_async(_chunks(os.urandom(12 * MB)), "big.mp4", max_size=11 * MB)
+        )
+
+    assert not s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+    assert s3_client.list_objects_v2(Bucket=BUCKET).get("KeyCount", 0) == 0
+    storage._reset_s3_clients()
@@ -0,0 +1,162 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from app.core.utils import video_utils as vu
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg no disponible"
+)
+
+
+def _make_clip(
+    path, seconds: int, size: str = "640x480", rate: int = 25, gop: int = 250
+):
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc=duration={seconds}:size={size}:rate={rate}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-g",
+            str(gop),
+            str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+def _probe(path) -> dict:
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-count_frames",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            str(path),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _streams(info: dict, kind: str) -> list[dict]:
+    return [s for s in info["streams"] if s["codec_type"] == kind]
+
+
+def test_fused_command_encodes_once():
+    cmd = vu.build_fused_command(
+        "in.mp4", "out.mp4", watermark_path="wm.png", image_path="intro.jpg"
+    )
+    assert cmd.count("-filter_complex") == 1
+    assert cmd.count("libx264") == 1
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "overlay=" in graph
+    assert "concat=n=3" in graph
+    assert cmd[-1] == "out.mp4"
+
+
+@requires_ffmpeg
+def test_process_fused_output_duration(tmp_path):
+    clip = _make_clip(tmp_path / "in.mp4", seconds=4)
+    out = tmp_path / "out.mp4"
+    vu.process_fused(
+        str(clip),
+        str(out),
+        watermark_path="assets/watermark.png",
+        image_path="assets/intro-outro.jpg",
+        seconds=2,
+    )
+    info = _probe(out)
+    # intro 3 s + clip recortado a 2 s + outro 3 s
+    assert float(info["format"]["duration"]) == pytest.approx(8, abs=0.2)
+    (video,) = _streams(info, "video")
+    assert (video["width"], video["height"]) == (1280, 720)
+    assert len(_streams(info, "audio")) == 1
+
+
+def test_segment_cache_reuses_and_evicts(tmp_path):
+    from app.core.utils.segment_cache import SegmentCache
+
+    image = tmp_path / "intro.jpg"
+    image.write_bytes(b"image-v1")
+    cache = SegmentCache(tmp_path / "cache", max_bytes=10, min_age_seconds=0)
+    builds = []
+
+    def builder(tmp):
+        builds.append(tmp)
+        tmp.write_bytes(b"x" * 8)
+
+    key = cache.key_for(image, 3, vu.DEFAULT_PROFILE)
+    first = cache.get_or_create(key, builder)
+    second = cache.get_or_create(key, builder)
+    assert first == second and len(builds) == 1
+
+    other = cache.key_for(image, 3, vu.EncodeProfile(preset="fast"))
+    assert other != key
+    cache.get_or_create(other, builder)
+    assert len(list((tmp_path / "cache").glob("*.mp4"))) == 1
+
+
+@requires_ffmpeg
+def test_cached_segments_pipeline(tmp_path):
+    from app.core.utils.segment_cache import SegmentCache
+
+    clip = _make_clip(tmp_path / "in.mp4", seconds=2)
+    out = tmp_path / "out.mp4"
+    cache = SegmentCache(tmp_path / "cache")
+    vu.process_with_cached_segments(
+        str(clip),
+        str(out),
+        watermark_path="assets/watermark.png",
+        image_path="assets/intro-outro.jpg",
+        cache=cache,
+        workdir=str(tmp_path),
+    )
+    assert out.exists() and out.stat().st_size > 0
+    assert len(list((tmp_path / "cache").glob("*.mp4"))) == 1
+
+
+@requires_ffmpeg
+def test_parallel_body_matches_serial_duration(tmp_path):
+    clip = _make_clip(tmp_path / "in.mp4", seconds=4, gop=25)
+    parallel = tmp_path / "parallel.mp4"
+    serial = tmp_path / "serial.mp4"
+    vu.encode_body_parallel(
+        str(clip),
+        str(parallel),
+        "assets/watermark.png",
+        workdir=str(tmp_path / "work"),
+        workers=2,
+        chunk_seconds=1,
+    )
+    vu.encode_body_segment(str(clip), str(serial), "assets/watermark.png")
+    assert len(list((tmp_path / "work" / "encoded").glob("chunk_*.mp4"))) > 1
+
+    par_info, ser_info = _probe(parallel), _probe(serial)
+    (par_video,) = _streams(par_info, "video")
+    (ser_video,) = _streams(ser_info, "video")
+    frame = 1 / vu.DEFAULT_PROFILE.fps
+    assert float(par_info["format"]["duration"]) == pytest.approx(
+        float(ser_info["format"]["duration"]), abs=frame
+    )
+    assert abs(
+        int(par_video["nb_read_frames"]) - int(ser_video["nb_read_frames"])
+    ) <= 1
@@ -79,3 +79,17 @@ def test_delete_video_bad_request_if_public(
     )
     r = client.delete(f"/api/videos/{v.video_id}", headers=auth_headers)
     assert r.status_code == 400
+
+
+def test_video_detail_includes_progress(
+    client, db_session, auth_headers, video_factory, auth_user
+):
+    v = video_factory.create(user=auth_user, status=VideoStatus.processing.value)
+    v.progress = {"stage": "encode_body", "percent": 42.5, "eta_seconds": 7.0}
+    db_session.commit()
+
+    r = client.get(f"/api/videos/{v.video_id}", headers=auth_headers)
+    assert r.status_code == 200
+    progress = r.json()["progress"]
+    assert progress["stage"] == "encode_body"
+    assert progress["percent"] == 42.5
@@ -0,0 +1,102 @@
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core import vote_buffer
+from app.core.config import settings
+from app.core.vote_buffer import LocalVoteBuffer, PendingVote, recover, write_votes
+from app.models import UserVoteTotal
+
+
+def _local_mode(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "VOTE_WRITE_BEHIND", "local")
+    monkeypatch.setattr(settings, "VOTE_BUFFER_JOURNAL_DIR", str(tmp_path / "votes"))
+    monkeypatch.setattr(vote_buffer, "_buffer", None)
+
+
+def test_write_behind_vote_is_acknowledged_then_flushed(
+    client, auth_headers, db_session, video_factory, monkeypatch, tmp_path
+):
+    _local_mode(monkeypatch, tmp_path)
+    v = video_factory.create(is_public=True, processed_path="/tmp/wb.mp4")
+    url = f"/api/public/videos/{v.video_id}/vote"
+
+    assert client.post(url, headers=auth_headers).status_code == 200
+    assert client.post(url, headers=auth_headers).status_code == 400
+    db_session.refresh(v)
+    assert v.votes_count == 0
+
+    buffer = vote_buffer.get_vote_buffer()
+    batch = buffer.take(100)
+    assert len(batch) == 1
+    assert write_votes(db_session, batch) == 1
+    buffer.done(batch)
+
+    db_session.refresh(v)
+    assert v.votes_count == 1
+    assert db_session.get(UserVoteTotal, v.user_id).votes == 1
+    assert all(p.stat().st_size == 0 for p in (tmp_path / "votes").glob("*.log"))
+    # ya fuera del buffer, el duplicado se detecta en votes
+    assert client.post(url, headers=auth_headers).status_code == 400
+
+    r = client.post("/api/public/videos/no-existe/vote", headers=auth_headers)
+    assert r.status_code == 404
+
+
+def test_write_votes_is_idempotent(db_session, user_factory, video_factory):
+    voter = user_factory.create()
+    v = video_factory.create(is_public=True)
+    now = time.time()
+    batch = [
+        PendingVote(voter.id, v.id, now),
+        PendingVote(voter.id, v.id, now),
+        PendingVote(voter.id, 999_999_999, now),
+    ]
+
+    assert write_votes(db_session, batch) == 1
+    assert write_votes(db_session, batch) == 0
+    db_session.refresh(v)
+    assert v.votes_count == 1
+
+
+def test_orphaned_journal_is_replayed(tmp_path, db_session, user_factory, video_factory):
+    voters = [user_factory.create() for _ in range(3)]
+    v = video_factory.create(is_public=True)
+    journal_dir = tmp_path / "votes"
+    journal_dir.mkdir()
+    lines = [PendingVote(u.id, v.id, time.time()).encode() for u in voters]
+    (journal_dir / "4242-dead.log").write_text("\n".join(lines) + "\n12 3")
+
+    # recover cierra cada sesion que abre: sesiones propias sobre la conexion
+    # de la prueba, para ver los datos de las factories
+    def session_factory():
+        return Session(
+            bind=db_session.connection(), join_transaction_mode="create_savepoint"
+        )
+
+    buffer = LocalVoteBuffer(str(journal_dir))
+    assert recover(buffer, session_factory, limit=2) == 3
+
+    db_session.refresh(v)
+    assert v.votes_count == 3
+    assert not list(journal_dir.glob("*.log"))
+
+
+def test_local_journal_keeps_only_pending_votes(tmp_path):
+    buffer = LocalVoteBuffer(str(tmp_path))
+    votes = [PendingVote(user_id, 1, time.time()) for user_id in range(1, 6)]
+    for vote in votes:
+        buffer.push(vote)
+
+    batch = buffer.take(3)
+    buffer.done(batch)
+
+    (journal,) = tmp_path.glob("*.log")
+    lines = journal.read_text().splitlines()
+    assert [PendingVote.decode(line) for line in lines] == votes[3:]
+    assert not list(tmp_path.glob("*.tmp"))
+    # sigue siendo del proceso vivo: no se toma como huerfano
+    assert LocalVoteBuffer(str(tmp_path)).orphaned() == []
+
+    buffer.push(PendingVote(9, 1, time.time()))
+    assert len(journal.read_text().splitlines()) == 3